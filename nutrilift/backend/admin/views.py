@@ -12,7 +12,8 @@ from .serializers import FAQSerializer
 from authentications.models import SupportTicket
 from authentications.serializers import SupportTicketSerializer, UserProfileSerializer
 from challenges.models import Challenge
-from challenges.serializers import ChallengeSerializer
+from challenges.serializers import ChallengeSerializer, annotate_challenges
+from challenges.task_specs import structure_tasks
 
 
 def _build_tasks(raw_tasks):
@@ -31,7 +32,8 @@ def _build_tasks(raw_tasks):
                 result.append({'label': label, 'type': task_type})
         elif isinstance(t, str) and t.strip():
             result.append({'label': t.strip(), 'type': 'manual'})
-    return result
+    # Parse labels and resolve exercises/foods once, at save time
+    return structure_tasks(result)
 
 User = get_user_model()
 
@@ -162,7 +164,7 @@ class AdminChallengeListView(APIView):
             challenges = challenges.filter(Q(name__icontains=search) | Q(description__icontains=search))
         if type_filter:
             challenges = challenges.filter(challenge_type=type_filter)
-        challenges = challenges.order_by('-created_at')
+        challenges = annotate_challenges(challenges.order_by('-created_at'), request.user)
         
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(challenges, request)
@@ -452,8 +454,11 @@ class AdminRemovePostView(APIView):
         except Post.DoesNotExist:
             return Response({'detail': 'Post not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        post.is_removed = True
-        post.save(update_fields=['is_removed'])
+        if not post.is_removed:
+            from challenges import social_stats
+            post.is_removed = True
+            post.save(update_fields=['is_removed'])
+            social_stats.adjust(post.user_id, post_count=-1)
 
         Report.objects.filter(post=post, status='pending').update(
             status='reviewed',
@@ -502,9 +507,11 @@ class AdminDismissReportsView(APIView):
 class AdminChallengeLeaderboardView(APIView):
     """
     GET /api/admin/challenges/<challenge_id>/leaderboard/
-    Returns top participants with rank, progress, and prize_paid status.
+    Returns a page of participants with rank, progress, and prize_paid status.
+    Paginated with ?page= / ?page_size= (20 per page, max 100).
     """
     permission_classes = [IsAdminUser]
+    pagination_class = AdminPagination
 
     def get(self, request, challenge_id):
         try:
@@ -512,18 +519,16 @@ class AdminChallengeLeaderboardView(APIView):
         except Challenge.DoesNotExist:
             return Response({'detail': 'Challenge not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        from challenges.models import ChallengeParticipant
-        participants = (
-            ChallengeParticipant.objects
-            .filter(challenge=challenge)
-            .select_related('user')
-            .order_by('-progress')
-        )
+        from challenges.leaderboard import ranked_participants
+        participants = ranked_participants(challenge.id).select_related('user')
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(participants, request)
 
         data = []
-        for i, p in enumerate(participants, start=1):
+        for p in page:
             data.append({
-                'rank': i,
+                'rank': p.leaderboard_rank,
                 'user_id': str(p.user.id),
                 'name': getattr(p.user, 'name', None) or p.user.email,
                 'email': p.user.email,
@@ -543,6 +548,9 @@ class AdminChallengeLeaderboardView(APIView):
             'prize_description': challenge.prize_description,
             'end_date': challenge.end_date,
             'has_ended': challenge.end_date <= now,
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
             'leaderboard': data,
         })
 
@@ -573,7 +581,7 @@ class AdminAwardPrizeView(APIView):
         except ChallengeParticipant.DoesNotExist:
             return Response({'detail': 'Participant not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        # Compute rank
+        # Exact rank from the database (the cached leaderboard may trail it)
         rank = ChallengeParticipant.objects.filter(
             challenge=challenge, progress__gt=participant.progress
         ).count() + 1
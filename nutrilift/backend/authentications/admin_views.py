@@ -8,7 +8,7 @@ from django.db.models import Q, Count
 from .models import SupportTicket
 from .serializers import SupportTicketSerializer, UserProfileSerializer
 from challenges.models import Challenge
-from challenges.serializers import ChallengeSerializer
+from challenges.serializers import ChallengeSerializer, annotate_challenges
 
 User = get_user_model()
 
@@ -117,7 +117,7 @@ class AdminChallengeListView(APIView):
     pagination_class = AdminPagination
 
     def get(self, request):
-        challenges = Challenge.objects.all().order_by('-created_at')
+        challenges = annotate_challenges(Challenge.objects.order_by('-created_at'), request.user)
         
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(challenges, request)
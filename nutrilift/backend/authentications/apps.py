@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AuthenticationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentications'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .models import User
+        from .user_cache import handle_user_changed
+        post_save.connect(handle_user_changed, sender=User)
+        post_delete.connect(handle_user_changed, sender=User)
@@ -4,15 +4,76 @@ JWT Authentication for Django REST Framework
 import jwt
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
 from rest_framework import authentication, exceptions
-from datetime import datetime, timezone
+
+from . import user_cache
 
 User = get_user_model()
 
 
+def _load_user(user_id):
+    try:
+        return User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        raise exceptions.AuthenticationFailed('User not found')
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    request.user for an access token whose claims are current: id, pk,
+    is_active and is_staff come from the token, so endpoints that only filter
+    by request.user.id never load the user. Anything else (including
+    comparisons and isinstance checks) loads the full User, through the user
+    cache, on first access.
+
+    The claims are checked against the user's stamp in the shared cache on
+    every request, so a deactivation or staff demotion made through any
+    worker stops being trusted everywhere on the next request. Without a
+    shared cache no claims are trusted and the user is loaded.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        user_id = User._meta.pk.to_python(payload['user_id'])
+        super().__init__(lambda: user_cache.get_user(user_id, _load_user))
+        self.__dict__.update(
+            _user_id=user_id, _is_active=payload['is_active'], _is_staff=payload['is_staff'],
+        )
+
+    @classmethod
+    def from_payload(cls, payload):
+        """A TokenUser if the payload's claims can be trusted, else None."""
+        if not isinstance(payload.get('is_active'), bool) or not isinstance(payload.get('is_staff'), bool):
+            return None  # issued before these claims existed
+        if not user_cache.claims_current(payload['user_id'], payload['is_active'], payload['is_staff']):
+            return None
+        return cls(payload)
+
+    @property
+    def id(self):
+        return self.__dict__['_user_id']
+
+    pk = id
+
+    @property
+    def is_active(self):
+        return self.__dict__['_is_active']
+
+    @property
+    def is_staff(self):
+        return self.__dict__['_is_staff']
+
+    def __bool__(self):
+        return True
+
+
 class JWTAuthentication(authentication.BaseAuthentication):
     """
-    Custom JWT authentication class for Django REST Framework
+    Custom JWT authentication class for Django REST Framework.
+    Users are served from a per-process cache (see authentications.user_cache),
+    or as a TokenUser when the token's claims are known to be current.
     """
     
     def authenticate(self, request):
@@ -33,35 +94,31 @@ class JWTAuthentication(authentication.BaseAuthentication):
                 
             token = auth_parts[1]
             
-            # Decode and validate the JWT token
+            # Decode and validate the JWT token (signature and exp)
             payload = jwt.decode(
                 token,
                 settings.JWT_SECRET_KEY,
                 algorithms=[settings.JWT_ALGORITHM]
             )
             
-            # Check token expiration
-            exp_timestamp = payload.get('exp')
-            if exp_timestamp:
-                exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-                if datetime.now(timezone.utc) > exp_datetime:
-                    raise exceptions.AuthenticationFailed('Token has expired')
-            
+            # Refresh tokens are only accepted by /api/auth/token/refresh/
+            if payload.get('type', 'access') != 'access':
+                raise exceptions.AuthenticationFailed('Invalid token type')
+
             # Get user from token payload
             user_id = payload.get('user_id')
             if not user_id:
                 raise exceptions.AuthenticationFailed('Invalid token payload')
                 
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                raise exceptions.AuthenticationFailed('User not found')
+            user = TokenUser.from_payload(payload) or user_cache.get_user(user_id, _load_user)
                 
             if not user.is_active:
                 raise exceptions.AuthenticationFailed('User account is disabled')
                 
             return (user, token)
             
+        except exceptions.AuthenticationFailed:
+            raise
         except jwt.ExpiredSignatureError:
             raise exceptions.AuthenticationFailed('Token has expired')
         except jwt.InvalidTokenError:
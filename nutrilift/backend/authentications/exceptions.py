@@ -157,4 +157,16 @@ def handle_permission_error(message="Permission denied"):
         'success': False,
         'message': message,
         'errors': {'detail': message}
-    }, status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+    }, status=status.HTTP_403_FORBIDDEN)
+
+def handle_throttled_error(message, retry_after, status_code=status.HTTP_429_TOO_MANY_REQUESTS):
+    """
+    Helper function to create consistent rate-limit (429) or overload (503)
+    responses with a Retry-After header
+    """
+    retry_after = max(1, int(round(retry_after)))
+    return Response({
+        'success': False,
+        'message': message,
+        'errors': {'detail': f'{message}. Try again in {retry_after} seconds.'}
+    }, status=status_code, headers={'Retry-After': str(retry_after)})
@@ -0,0 +1,61 @@
+"""
+Password verification with bounded concurrency (login view).
+
+A PBKDF2 check at production iterations is tens of milliseconds of CPU, so a
+burst of logins can leave every request worker hashing. With
+LOGIN_HASH_WORKERS set, check_password() runs checks on a process-wide pool
+of that many threads (hashlib releases the GIL while hashing) and admits at
+most LOGIN_HASH_WORKERS + LOGIN_HASH_QUEUE checks at a time; past that, or
+if a check waits longer than LOGIN_HASH_TIMEOUT seconds, it raises
+HashingBusy straight away and the view answers 503 instead of queueing.
+Unset (the default), checks run inline in the request thread.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+
+
+class HashingBusy(Exception):
+    """Too many password checks in flight; retry shortly."""
+
+
+def _workers():
+    return getattr(settings, 'LOGIN_HASH_WORKERS', 0)
+
+
+def _get_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            workers = _workers()
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-check')
+            _slots = threading.BoundedSemaphore(
+                workers + getattr(settings, 'LOGIN_HASH_QUEUE', workers * 4)
+            )
+    return _pool, _slots
+
+
+def check_password(password, encoded):
+    """django.contrib.auth.hashers.check_password, on the pool when enabled."""
+    if not _workers():
+        return hashers.check_password(password, encoded)
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = pool.submit(hashers.check_password, password, encoded)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is freed when the check finishes, even if we stopped waiting
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=getattr(settings, 'LOGIN_HASH_TIMEOUT', 5))
+    except FutureTimeout:
+        raise HashingBusy()
@@ -1,15 +1,22 @@
 """
 JWT Token utilities for user authentication
 """
+import secrets
+
 import jwt
 from django.conf import settings
 from datetime import datetime, timedelta, timezone
 
+REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+
 
 def generate_jwt_token(user):
     payload = {
         'user_id': str(user.id),
         'email': user.email,
+        # Let JWTAuthentication answer these without loading the user
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
         'exp': datetime.now(timezone.utc) + timedelta(seconds=settings.JWT_EXPIRATION_DELTA),
         'iat': datetime.now(timezone.utc),
         'type': 'access',
@@ -17,11 +24,20 @@ def generate_jwt_token(user):
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
-def generate_refresh_token(user):
-    """Generate a long-lived refresh token (7 days)."""
+def generate_refresh_token(user, family=None):
+    """
+    Generate a long-lived refresh token (7 days) and record it in the
+    rotation store, in `family` or as the start of a new one.
+    """
+    from . import refresh_tokens
+
+    jti = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc) + REFRESH_TOKEN_LIFETIME
+    refresh_tokens.store(user, jti, family or refresh_tokens.new_family(), expires_at)
     payload = {
         'user_id': str(user.id),
-        'exp': datetime.now(timezone.utc) + timedelta(days=7),
+        'jti': jti,
+        'exp': expires_at,
         'iat': datetime.now(timezone.utc),
         'type': 'refresh',
     }
@@ -0,0 +1,43 @@
+"""
+Management command: purge_refresh_tokens
+Delete expired refresh tokens from the rotation store in batches (using the
+expires_at index). Used tokens are kept until they expire so replays are
+still detected, so run this daily rather than deleting on use.
+
+Usage:
+    python manage.py purge_refresh_tokens
+    python manage.py purge_refresh_tokens --batch-size 10000
+    python manage.py purge_refresh_tokens --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Delete expired refresh tokens.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per statement (default: 5000).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count expired tokens without deleting them.',
+        )
+
+    def handle(self, *args, **options):
+        from django.utils import timezone
+        from authentications.models import RefreshToken
+        from authentications.refresh_tokens import purge_expired
+
+        now = timezone.now()
+        if options['dry_run']:
+            count = RefreshToken.objects.filter(expires_at__lt=now).count()
+            self.stdout.write(self.style.SUCCESS(f'{count} expired refresh token(s) would be deleted.'))
+            return
+
+        deleted = purge_expired(before=now, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired refresh token(s).'))
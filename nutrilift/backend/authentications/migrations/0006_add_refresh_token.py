@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentications', '0005_add_password_reset_otp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshToken',
+            fields=[
+                ('jti_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('family', models.UUIDField(db_index=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'refresh_tokens',
+            },
+        ),
+    ]
@@ -152,3 +152,19 @@ class PasswordResetOTP(models.Model):
         from django.utils import timezone
         from datetime import timedelta
         return not self.is_used and (timezone.now() - self.created_at) < timedelta(minutes=10)
+
+
+class RefreshToken(models.Model):
+    """
+    An issued refresh token, stored by the SHA-256 of its jti (see
+    authentications.refresh_tokens). Tokens from one login form a family;
+    each refresh marks its token used and issues the next one in the family.
+    """
+    jti_hash = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='refresh_tokens')
+    family = models.UUIDField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'refresh_tokens'
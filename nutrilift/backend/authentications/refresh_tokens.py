@@ -0,0 +1,142 @@
+"""
+Refresh-token rotation store.
+
+Every refresh token carries a random jti; the RefreshToken table keeps only
+its SHA-256, the user, a family id and the expiry. Logging in starts a
+family, and each POST /api/auth/token/refresh/ runs rotate():
+
+  - one primary-key read (locked, joined to the user) finds the token;
+  - an unused token is marked used and the next one is issued in the same
+    family;
+  - a used token is being replayed — the holder of the newer token and the
+    replayer can't be told apart, so the whole family is deleted and both
+    must log in again;
+  - an unknown jti (logged out, revoked or purged) is rejected.
+
+Revoking deletes rows: revoke() for one family (logout), revoke_all() for
+all of a user's sessions given one of their live tokens (logout
+everywhere), revoke_user() unconditionally (password reset). Used rows are
+kept until they expire so replays are still detected; purge_refresh_tokens
+deletes expired rows in bulk via the expires_at index.
+
+Tokens issued before the store existed have no jti, so a replay could never
+be detected; they are rejected and their holders log in again.
+
+Clients must not exchange the same token twice, even concurrently: the
+second exchange is a replay and ends the session (the app funnels every
+refresh through one in-flight request in TokenService).
+"""
+import hashlib
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+PURGE_BATCH_SIZE = 5000
+
+
+class RefreshTokenError(Exception):
+    """A refresh token that can't be exchanged; str() is the client-facing detail."""
+
+
+def hash_jti(jti):
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+def new_family():
+    return uuid.uuid4()
+
+
+def store(user, jti, family, expires_at):
+    from .models import RefreshToken
+    RefreshToken.objects.create(
+        jti_hash=hash_jti(jti), user=user, family=family, expires_at=expires_at,
+    )
+
+
+def rotate(payload):
+    """
+    Exchange a decoded, signature-checked refresh token payload.
+    Returns (user, new_refresh_token); raises RefreshTokenError.
+    """
+    from .jwt_utils import generate_refresh_token
+    from .models import RefreshToken
+
+    jti = payload.get('jti')
+    if not jti:
+        raise RefreshTokenError('Refresh token is no longer valid. Please log in again.')
+
+    with transaction.atomic():
+        token = (
+            RefreshToken.objects.select_for_update(of=('self',))
+            .select_related('user')
+            .filter(pk=hash_jti(jti))
+            .first()
+        )
+        if token is not None and token.used_at is not None:
+            RefreshToken.objects.filter(family=token.family).delete()
+        elif token is not None and token.user.is_active:
+            token.used_at = timezone.now()
+            token.save(update_fields=['used_at'])
+            return token.user, generate_refresh_token(token.user, family=token.family)
+
+    # Raised outside the transaction so the family deletion above commits
+    if token is None:
+        raise RefreshTokenError('Refresh token has been revoked. Please log in again.')
+    if token.used_at is not None:
+        raise RefreshTokenError('Refresh token has already been used. Please log in again.')
+    raise RefreshTokenError('User not found or inactive.')
+
+
+def revoke(payload):
+    """Delete the family of a decoded refresh token (logout). Returns rows deleted."""
+    from .models import RefreshToken
+
+    jti = payload.get('jti')
+    if not jti:
+        return 0
+    family = RefreshToken.objects.filter(pk=hash_jti(jti)).values_list('family', flat=True).first()
+    if family is None:
+        return 0
+    return RefreshToken.objects.filter(family=family).delete()[0]
+
+
+def revoke_all(payload):
+    """
+    Delete every refresh token of the user who holds `payload`, which must
+    be unused, unexpired and in the store (logout everywhere). Returns rows
+    deleted; raises RefreshTokenError otherwise.
+    """
+    from .models import RefreshToken
+
+    jti = payload.get('jti')
+    user_id = None
+    if jti:
+        user_id = RefreshToken.objects.filter(
+            pk=hash_jti(jti), used_at__isnull=True, expires_at__gt=timezone.now(),
+        ).values_list('user_id', flat=True).first()
+    if user_id is None:
+        raise RefreshTokenError('Refresh token has been revoked. Please log in again.')
+    return revoke_user(user_id)
+
+
+def revoke_user(user_id):
+    """Delete every refresh token of a user (all sessions). Returns rows deleted."""
+    from .models import RefreshToken
+    return RefreshToken.objects.filter(user_id=user_id).delete()[0]
+
+
+def purge_expired(before=None, batch_size=PURGE_BATCH_SIZE):
+    """Delete tokens that expired before `before` (default now), in batches. Returns rows deleted."""
+    from .models import RefreshToken
+
+    before = before or timezone.now()
+    deleted = 0
+    while True:
+        batch = list(
+            RefreshToken.objects.filter(expires_at__lt=before)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += RefreshToken.objects.filter(pk__in=batch).delete()[0]
@@ -2604,4 +2604,312 @@ class HTTPStatusCodesPropertyTest(HypothesisTestCase):
         self.client.credentials()
         
         # Clean up test data
-        User.objects.all().delete()
\ No newline at end of file
+        User.objects.all().delete()
+
+# A LocMemCache is shared by everything in the test process
+SHARED_CACHES = {
+    **django_settings.CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared-test'},
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedUserAuthenticationTest(TestCase):
+    """
+    JWTAuthentication serves users from the per-process cache; saving a user
+    (deactivation, password change) revokes the cached copy through the
+    shared cache. Without one, or when it fails, users are loaded by key.
+    """
+
+    def setUp(self):
+        import jwt
+        from django.core.cache import cache
+        from backend.cache import shared_cache
+        from . import user_cache
+        cache.clear()
+        shared_cache().clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(email='cached@example.com', password='password123')
+        # Without is_active / is_staff claims, so every request goes through the cache
+        token = jwt.encode(
+            {'user_id': str(self.user.id), 'exp': timezone.now() + timedelta(hours=1), 'type': 'access'},
+            django_settings.JWT_SECRET_KEY, algorithm=django_settings.JWT_ALGORITHM,
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def _users_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [q for q in queries if User._meta.db_table in q['sql']]
+
+    def test_second_request_skips_users_table(self):
+        from . import user_cache
+        url = '/api/notifications/unread-count/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self._users_queries(url), [])
+        self.assertEqual(user_cache.stats()['hits'], 1)
+
+    def test_deactivation_revokes_cached_user(self):
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    def test_without_shared_cache_users_are_loaded(self):
+        url = '/api/notifications/unread-count/'
+        caches = {k: v for k, v in SHARED_CACHES.items() if k != 'shared'}
+        with override_settings(CACHES=caches):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(len(self._users_queries(url)), 1)
+
+    def test_shared_cache_errors_fall_back_to_the_database(self):
+        from unittest import mock
+        from backend.cache import shared_cache
+        url = '/api/notifications/unread-count/'
+        with mock.patch.object(shared_cache(), 'get', side_effect=ConnectionError):
+            self.assertEqual(len(self._users_queries(url)), 1)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TokenUserTest(TestCase):
+    """
+    Access tokens carry is_active / is_staff claims; while they match the
+    user's stamp, request.user is a TokenUser that loads nothing until an
+    attribute outside the claims is read.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        from backend.cache import shared_cache
+        from . import user_cache
+        from .jwt_utils import generate_jwt_token
+        cache.clear()
+        shared_cache().clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(email='lazy@example.com', password='password123')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_jwt_token(self.user)}')
+
+    def test_claims_only_endpoint_never_loads_user(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/notifications/').status_code, 200)
+        self.assertFalse([q for q in queries if User._meta.db_table in q['sql']])
+
+    def test_other_attributes_load_full_user(self):
+        from django.test import RequestFactory
+        from .authentication import JWTAuthentication, TokenUser
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=self.client._credentials['HTTP_AUTHORIZATION'])
+        user, _ = JWTAuthentication().authenticate(request)
+        self.assertIsInstance(user, TokenUser)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_active)
+            self.assertFalse(user.is_staff)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'lazy@example.com')
+            self.assertEqual(user, self.user)
+
+    def test_changed_claims_are_not_trusted(self):
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/notifications/').status_code, 401)
+
+    def test_demotion_is_seen_by_other_workers(self):
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from backend.cache import shared_cache
+        from . import user_cache
+        from .authentication import JWTAuthentication, TokenUser
+        from .jwt_utils import generate_jwt_token
+        self.user.is_staff = True
+        self.user.save()
+        header = f'Bearer {generate_jwt_token(self.user)}'
+        key = user_cache._version_key(self.user.pk)
+        staff_stamp = shared_cache().get(key)
+
+        self.user.is_staff = False
+        self.user.save()
+        # Another worker, whose own caches still hold the staff stamp
+        user_cache.clear()
+        cache.set(key, staff_stamp)
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=header)
+        user, _ = JWTAuthentication().authenticate(request)
+        self.assertNotIsInstance(user, TokenUser)
+        self.assertFalse(user.is_staff)
+
+
+class RefreshTokenRotationTest(TestCase):
+    """
+    Refresh tokens rotate on every use; replaying a used one revokes its
+    family, and logout revokes the session.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='rotate@example.com', password='password123')
+        self.client = APIClient()
+
+    def _login(self):
+        from .jwt_utils import generate_refresh_token
+        return generate_refresh_token(self.user)
+
+    def _refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh_token': token}, format='json')
+
+    def test_rotation_and_reuse_detection(self):
+        from .models import RefreshToken
+        first = self._login()
+        response = self._refresh(first)
+        self.assertEqual(response.status_code, 200)
+        second = response.data['refresh_token']
+        self.assertNotEqual(second, first)
+        self.assertEqual(RefreshToken.objects.values('family').distinct().count(), 1)
+
+        # Replaying the used token revokes the family, including the newer token
+        self.assertEqual(self._refresh(first).status_code, 401)
+        self.assertEqual(self._refresh(second).status_code, 401)
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_refresh_is_one_indexed_read(self):
+        import jwt
+        from .refresh_tokens import rotate
+        payload = jwt.decode(
+            self._login(), django_settings.JWT_SECRET_KEY, algorithms=[django_settings.JWT_ALGORITHM],
+        )
+        # Savepoint, read by primary key joined to the user, mark used, insert next, release
+        with self.assertNumQueries(5):
+            rotate(payload)
+
+    def test_logout_revokes_session_only(self):
+        other_device = self._login()
+        token = self._login()
+        response = self.client.post('/api/auth/logout/', {'refresh_token': token}, format='json')
+        self.assertEqual(response.data['revoked'], 1)
+        self.assertEqual(self._refresh(token).status_code, 401)
+        self.assertEqual(self._refresh(other_device).status_code, 200)
+
+    def test_logout_everywhere_needs_a_live_token(self):
+        other_device = self._login()
+        used = self._login()
+        current = self._refresh(used).data['refresh_token']
+
+        # A token already exchanged (e.g. stolen from an old backup) can't end every session
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh_token': used, 'all_devices': True}, format='json',
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self._refresh(other_device).status_code, 200)
+
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh_token': current, 'all_devices': True}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._refresh(current).status_code, 401)
+
+    def test_legacy_token_without_jti_is_rejected(self):
+        import jwt
+        legacy = jwt.encode(
+            {'user_id': str(self.user.id), 'exp': timezone.now() + timedelta(days=1), 'type': 'refresh'},
+            django_settings.JWT_SECRET_KEY, algorithm=django_settings.JWT_ALGORITHM,
+        )
+        self.assertEqual(self._refresh(legacy).status_code, 401)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self._login()}')
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    def test_purge_deletes_only_expired(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import RefreshToken
+        self._login()
+        self._login()
+        RefreshToken.objects.filter(pk=RefreshToken.objects.first().pk).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        call_command('purge_refresh_tokens', stdout=StringIO())
+        self.assertEqual(RefreshToken.objects.count(), 1)
+
+
+class LoginThrottleTest(TestCase):
+    """
+    Failed logins are throttled per IP and per email before the password is
+    hashed; password checks can run on a bounded pool.
+    """
+
+    RATES = {'login_ip': '5/min', 'login_email': '3/hour'}
+
+    def setUp(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from .throttles import LoginFailureThrottle
+        cache.clear()
+        patcher = mock.patch.object(LoginFailureThrottle, 'THROTTLE_RATES', self.RATES)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email='throttle@example.com', password='password123')
+        self.client = APIClient()
+
+    def _login(self, password, email='throttle@example.com', ip='10.0.0.1'):
+        return self.client.post(
+            '/api/auth/login/', {'email': email, 'password': password}, format='json', REMOTE_ADDR=ip,
+        )
+
+    def test_email_throttled_before_hashing(self):
+        from unittest import mock
+        for _ in range(3):
+            self.assertEqual(self._login('wrong', ip='10.0.0.1').status_code, 401)
+        with mock.patch('authentications.hashing.check_password') as check:
+            # A fresh IP, but the account's window is full
+            response = self._login('password123', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        check.assert_not_called()
+
+    def test_ip_throttle_spans_emails(self):
+        for i in range(5):
+            self.assertEqual(self._login('wrong', email=f'nobody{i}@example.com').status_code, 401)
+        self.assertEqual(self._login('password123').status_code, 429)
+        self.assertEqual(self._login('password123', ip='10.0.0.9').status_code, 200)
+
+    def test_successful_logins_are_not_counted(self):
+        for _ in range(5):
+            self.assertEqual(self._login('password123').status_code, 200)
+
+    def test_forwarded_for_header_does_not_change_the_client(self):
+        for i in range(5):
+            response = self.client.post(
+                '/api/auth/login/', {'email': f'nobody{i}@example.com', 'password': 'wrong'},
+                format='json', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}',
+            )
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(self._login('password123').status_code, 429)
+
+    def test_attempts_in_flight_are_counted(self):
+        from django.test import RequestFactory
+        from . import throttles
+        request = RequestFactory().post('/api/auth/login/', REMOTE_ADDR='10.0.0.1')
+        # A parallel burst: every attempt is checked before any has finished
+        waits = [throttles.check_login(request, 'throttle@example.com')[1] for _ in range(4)]
+        self.assertEqual([wait is None for wait in waits], [True, True, True, False])
+
+    def test_hashing_pool(self):
+        from . import hashing
+
+        def shutdown_pool():
+            hashing._pool.shutdown()
+            hashing._pool = None
+        self.addCleanup(shutdown_pool)
+        with override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0):
+            self.assertEqual(self._login('password123').status_code, 200)
+            self.assertTrue(hashing._slots.acquire(blocking=False))  # occupy the only slot
+            try:
+                response = self._login('password123')
+            finally:
+                hashing._slots.release()
+        self.assertEqual(response.status_code, 503)
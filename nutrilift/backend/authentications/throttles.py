@@ -0,0 +1,120 @@
+"""
+Login throttles.
+
+Login attempts are counted per client IP (login_ip) and per email address
+(login_email) in fixed windows kept in the shared cache, with rates
+from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] like the workout throttles.
+Each attempt is counted before the password is checked, with cache.add()
+then cache.incr(), so a parallel burst gets distinct counts and only the
+first N pass; a successful login gives its count back, so users who log in
+often are never locked out by their own successes, while a
+credential-stuffing burst is stopped per source IP and per targeted account.
+
+add() and incr() are atomic on Redis (REDIS_URL) and on the per-process
+default cache; without Redis each worker counts separately, so the limits
+apply per worker.
+
+The client IP is DRF's get_ident(), which trusts X-Forwarded-For only as far
+as REST_FRAMEWORK['NUM_PROXIES'] says there are proxies in front (0 by
+default: REMOTE_ADDR).
+
+The login view checks both before it looks the user up, so a throttled
+attempt never reaches password hashing.
+"""
+import hashlib
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+from backend.cache import shared_cache
+
+
+class LoginFailureThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle over a fixed-window counter: allow_request() counts
+    the attempt and checks the limit, release() takes the attempt back.
+    """
+
+    def __init__(self):
+        self.cache = shared_cache() or caches['default']
+        super().__init__()
+
+    def get_rate(self):
+        # An unconfigured scope disables the throttle rather than failing logins
+        return self.THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        self.key = None
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        self.key = f'{key}_{window}'
+        if self.cache.add(self.key, 1, self.duration):
+            count = 1
+        else:
+            try:
+                count = self.cache.incr(self.key)
+            except ValueError:  # expired between add() and incr()
+                self.cache.add(self.key, 1, self.duration)
+                count = 1
+        return count <= self.num_requests
+
+    def release(self):
+        if self.key is None:
+            return
+        try:
+            self.cache.decr(self.key)
+        except ValueError:  # the window has ended
+            pass
+        self.key = None
+
+    def wait(self):
+        return self.window_end - self.now
+
+
+class LoginIPThrottle(LoginFailureThrottle):
+    """Failed logins from one client IP."""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(LoginFailureThrottle):
+    """Failed logins for one email address, from anywhere."""
+    scope = 'login_email'
+
+    def __init__(self, email):
+        super().__init__()
+        self.email = email
+
+    def get_cache_key(self, request, view):
+        # Hashed: keeps addresses out of the cache and keys a fixed length
+        ident = hashlib.sha256(self.email.encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+def check_login(request, email):
+    """
+    (throttles, wait): counts this attempt against the throttles. wait is
+    None if it may proceed (pass the throttles to release() if it succeeds),
+    else the seconds until another attempt is allowed; a rejected attempt is
+    not counted.
+    """
+    throttles = [LoginIPThrottle(), LoginEmailThrottle(email)]
+    allowed = [throttle.allow_request(request, None) for throttle in throttles]
+    if all(allowed):
+        return throttles, None
+    release(throttles)
+    return throttles, max(t.wait() for t, ok in zip(throttles, allowed) if not ok)
+
+
+def release(throttles):
+    """Take back the attempt counted by check_login() (it was not a failure)."""
+    for throttle in throttles:
+        throttle.release()
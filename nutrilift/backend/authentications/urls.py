@@ -46,6 +46,9 @@ urlpatterns = [
     # Token refresh — exchange refresh token for new access token
     path('token/refresh/', views.token_refresh, name='auth-token-refresh'),
 
+    # Logout — revoke the refresh token's session (or all sessions)
+    path('logout/', views.logout, name='auth-logout'),
+
     # Admin endpoints
     path('admin/dashboard/', admin_views.AdminDashboardView.as_view(), name='admin-dashboard'),
     path('admin/users/', admin_views.AdminUserListView.as_view(), name='admin-users'),
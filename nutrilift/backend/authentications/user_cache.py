@@ -0,0 +1,173 @@
+"""
+Per-process cache of authenticated users (JWTAuthentication).
+
+Each worker keeps up to JWT_USER_CACHE_SIZE recently authenticated users in
+an LRU for JWT_USER_CACHE_TTL seconds, so most requests authenticate without
+touching the users table. Revocation is by version stamp: every save or
+delete of a User (deactivation, password change, profile edit) writes a new
+stamp to the shared cache (backend.cache), and a cached user whose stamp no
+longer matches is reloaded on its next request, in every worker.
+
+Stamps are only safe in a cache every worker sees, so the LRU is used only
+when a shared cache (Redis) is configured. Without one — or while it is
+unreachable — every request loads the user by primary key, as if nothing
+were cached. A stamp write that fails is logged; entries it should have
+revoked survive at most JWT_USER_CACHE_TTL, which also bounds a stale entry
+if the shared cache loses a stamp.
+
+The stamp also records the user's current is_active and is_staff, so
+claims_current() can confirm an access token's claims without loading the
+user (authentication.TokenUser).
+
+Hits, misses and stale reloads are counted per process; stats() returns
+them and the hit rate is logged every STATS_LOG_EVERY lookups.
+"""
+import copy
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+
+from backend.cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+STATS_LOG_EVERY = 10000
+
+_lock = threading.Lock()
+_users = OrderedDict()  # user_id -> (user, version, loaded_at)
+_stats = {'hits': 0, 'misses': 0, 'stale': 0}
+
+
+def _max_size():
+    return getattr(settings, 'JWT_USER_CACHE_SIZE', 10000)
+
+
+def _ttl():
+    return getattr(settings, 'JWT_USER_CACHE_TTL', 60)
+
+
+def _version_key(user_id):
+    return f'auth_user_version_{user_id}'
+
+
+def _new_stamp(user):
+    # (version, is_active, is_staff); a deleted user is stamped inactive
+    if user is None:
+        return (uuid.uuid4().hex, False, False)
+    return (uuid.uuid4().hex, user.is_active, user.is_staff)
+
+
+def bump(user_id, user=None):
+    """Invalidate the user's cached principal in every process."""
+    with _lock:
+        _users.pop(str(user_id), None)
+    stamps = shared_cache()
+    if stamps is None:
+        return
+    try:
+        stamps.set(_version_key(user_id), _new_stamp(user), timeout=None)
+    except Exception:
+        logger.error("Failed to bump the version stamp of user %s", user_id, exc_info=True)
+
+
+def handle_user_changed(sender, instance, **kwargs):
+    """post_save / post_delete handler for the User model."""
+    from django.db import transaction
+    user = instance if 'created' in kwargs else None  # post_delete has no `created`
+    bump(instance.pk, user)
+    # Again once committed, in case another request re-cached the old row meanwhile
+    transaction.on_commit(lambda: bump(instance.pk, user))
+
+
+def _count(outcome):
+    _stats[outcome] += 1
+    lookups = _stats['hits'] + _stats['misses'] + _stats['stale']
+    if lookups % STATS_LOG_EVERY == 0:
+        logger.info(
+            "JWT user cache: %.1f%% hit rate over %d lookups (%d stale reloads), %d cached",
+            100.0 * _stats['hits'] / lookups, lookups, _stats['stale'], len(_users),
+        )
+
+
+def stats():
+    """This process's counters: hits, misses, stale, size and hit_rate."""
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses'] + _stats['stale']
+        return {
+            **_stats,
+            'size': len(_users),
+            'hit_rate': _stats['hits'] / lookups if lookups else 0.0,
+        }
+
+
+def clear():
+    with _lock:
+        _users.clear()
+        _stats.update(hits=0, misses=0, stale=0)
+
+
+def get_user(user_id, load):
+    """
+    The user with `user_id`, from the cache when its entry is fresh and its
+    version stamp current, else from `load(user_id)` (which may raise).
+    Returns a copy, so callers may modify it freely.
+    """
+    user_id = str(user_id)
+    stamps = shared_cache()
+    if stamps is None:
+        return load(user_id)
+    try:
+        version = stamps.get(_version_key(user_id))
+    except Exception:
+        logger.warning("Shared cache unavailable; loading user %s", user_id, exc_info=True)
+        return load(user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _users.get(user_id)
+        if entry is not None:
+            user, cached_version, loaded_at = entry
+            if cached_version == version and now - loaded_at < _ttl():
+                _users.move_to_end(user_id)
+                _count('hits')
+                return copy.copy(user)
+            _count('stale')
+        else:
+            _count('misses')
+
+    user = load(user_id)
+    try:
+        if version is None:
+            # No stamp yet (first sight, or the shared cache was cleared): start one
+            version = _new_stamp(user)
+            if not stamps.add(_version_key(user_id), version, timeout=None):
+                version = stamps.get(_version_key(user_id))
+    except Exception:
+        logger.warning("Shared cache unavailable; not caching user %s", user_id, exc_info=True)
+        return user
+    with _lock:
+        _users[user_id] = (copy.copy(user), version, now)
+        _users.move_to_end(user_id)
+        while len(_users) > _max_size():
+            _users.popitem(last=False)
+    return user
+
+
+def claims_current(user_id, is_active, is_staff):
+    """
+    Whether a token's is_active / is_staff claims match the user's stamp, so
+    they can be trusted without loading the user. False when there is no
+    shared cache, it is unreachable, or it has no stamp for the user.
+    """
+    stamps = shared_cache()
+    if stamps is None:
+        return False
+    try:
+        stamp = stamps.get(_version_key(user_id))
+    except Exception:
+        logger.warning("Shared cache unavailable; checking user %s in the database", user_id, exc_info=True)
+        return False
+    return stamp is not None and stamp[1:] == (is_active, is_staff)
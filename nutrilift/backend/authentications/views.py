@@ -3,12 +3,13 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import authenticate
-from django.contrib.auth.hashers import check_password
 from django.db import transaction, IntegrityError
+from django.conf import settings
 from .models import User, SupportTicket
 from .serializers import UserRegistrationSerializer, UserProfileSerializer, ProfileUpdateSerializer
 from .jwt_utils import generate_jwt_token
-from .exceptions import handle_authentication_error, handle_validation_error
+from .exceptions import handle_authentication_error, handle_validation_error, handle_throttled_error
+from . import hashing, throttles
 import logging
 
 logger = logging.getLogger(__name__)
@@ -245,6 +246,12 @@ def login(request):
                 message='Invalid email format'
             )
         
+        # Count the attempt and reject throttled ones before any lookup or
+        # hashing; only a successful login gives its count back
+        login_throttles, wait = throttles.check_login(request, email)
+        if wait is not None:
+            return handle_throttled_error('Too many failed login attempts', wait)
+        
         # Find user by email
         try:
             user = User.objects.get(email=email)
@@ -257,8 +264,17 @@ def login(request):
             return handle_authentication_error('User account is disabled')
         
         # Verify password securely using Django's check_password
-        if not check_password(password, user.password):
+        # (on the bounded hashing pool when LOGIN_HASH_WORKERS is set)
+        try:
+            password_ok = hashing.check_password(password, user.password)
+        except hashing.HashingBusy:
+            throttles.release(login_throttles)
+            return handle_throttled_error(
+                'Login is busy', 1, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        if not password_ok:
             return handle_authentication_error('Invalid email or password')
+        throttles.release(login_throttles)
         
         # Generate JWT token for successful login
         token = generate_jwt_token(user)
@@ -516,6 +532,9 @@ def password_reset_confirm(request):
     # Reset password
     user.password = make_password(new_password)
     user.save(update_fields=['password'])
+    # Sign out every session that used the old password
+    from . import refresh_tokens
+    refresh_tokens.revoke_user(user.pk)
 
     # Mark OTP as used
     otp_obj.is_used = True
@@ -532,9 +551,10 @@ def token_refresh(request):
     Exchange a valid refresh token for a new access token.
     Body: { "refresh_token": "<token>" }
     Returns: { "token": "<new_access_token>", "refresh_token": "<new_refresh_token>" }
+    Each refresh token works once (see authentications.refresh_tokens).
     """
     import jwt as pyjwt
-    from .jwt_utils import generate_refresh_token
+    from . import refresh_tokens
 
     refresh_token = request.data.get('refresh_token', '').strip()
     if not refresh_token:
@@ -554,16 +574,55 @@ def token_refresh(request):
     if payload.get('type') != 'refresh':
         return Response({'detail': 'Invalid token type.'}, status=status.HTTP_401_UNAUTHORIZED)
 
-    user_id = payload.get('user_id')
     try:
-        user = User.objects.get(id=user_id, is_active=True)
-    except User.DoesNotExist:
-        return Response({'detail': 'User not found or inactive.'}, status=status.HTTP_401_UNAUTHORIZED)
+        user, new_refresh = refresh_tokens.rotate(payload)
+    except refresh_tokens.RefreshTokenError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
     new_access = generate_jwt_token(user)
-    new_refresh = generate_refresh_token(user)
 
     return Response({
         'token': new_access,
         'refresh_token': new_refresh,
     }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def logout(request):
+    """
+    POST /api/auth/logout/
+    Revoke a refresh token and the rest of its family (this device's session).
+    Body: { "refresh_token": "<token>", "all_devices": false }
+    With "all_devices": true every refresh token of the user is revoked; that
+    needs a live token (unused, unexpired, not revoked), else 401.
+    Access tokens stay valid until they expire.
+    """
+    import jwt as pyjwt
+    from . import refresh_tokens
+
+    refresh_token = request.data.get('refresh_token', '').strip()
+    if not refresh_token:
+        return Response({'detail': 'refresh_token is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        payload = pyjwt.decode(
+            refresh_token,
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.JWT_ALGORITHM],
+            options={'verify_exp': False},
+        )
+    except pyjwt.InvalidTokenError:
+        return Response({'detail': 'Invalid refresh token.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    if payload.get('type') != 'refresh':
+        return Response({'detail': 'Invalid token type.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    if request.data.get('all_devices') in (True, 'true', '1'):
+        try:
+            revoked = refresh_tokens.revoke_all(payload)
+        except refresh_tokens.RefreshTokenError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+    else:
+        revoked = refresh_tokens.revoke(payload)
+    return Response({'revoked': revoked}, status=status.HTTP_200_OK)
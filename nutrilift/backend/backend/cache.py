@@ -0,0 +1,21 @@
+"""
+The cache shared by every worker process.
+
+CACHES['default'] is a per-process LocMemCache: each worker has its own
+copy, so it only suits data that any worker may serve stale until it
+expires. Anything another worker must see — revocation stamps, snapshot
+invalidations, counters — goes in CACHES['shared'], which is configured
+(Redis) only when REDIS_URL is set. shared_cache() returns it, or None when
+there is none; callers then skip caching and read the database.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+SHARED_ALIAS = 'shared'
+
+
+def shared_cache():
+    """The cache shared by all workers, or None if none is configured."""
+    if SHARED_ALIAS not in settings.CACHES:
+        return None
+    return caches[SHARED_ALIAS]
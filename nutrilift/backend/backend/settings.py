@@ -119,6 +119,19 @@ CACHES = {
     }
 }
 
+# A cache shared by every worker (backend.cache.shared_cache) for state the
+# other workers must see: user revocation stamps, login throttle counters,
+# leaderboard snapshots. Redis only (needs the redis package); without
+# REDIS_URL those features read the database instead (and login throttles
+# count per worker).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'TIMEOUT': 300,
+    }
+
 
 
 # Password validation
@@ -188,6 +201,9 @@ REST_FRAMEWORK = {
     ],
     # Custom exception handler for consistent error responses
     'EXCEPTION_HANDLER': 'authentications.exceptions.custom_exception_handler',
+    # Proxies in front of Django that append to X-Forwarded-For; throttles
+    # identify clients by REMOTE_ADDR when 0, so the header can't be spoofed
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
     # Rate limiting configuration
     'DEFAULT_THROTTLE_RATES': {
         'workout_user': '1000/hour',  # Authenticated users: 1000 requests per hour
@@ -195,9 +211,17 @@ REST_FRAMEWORK = {
         'exercise_user': '1000/hour', # Exercise browsing: 1000 requests per hour
         'exercise_anon': '200/hour',  # Anonymous exercise browsing: 200 requests per hour
         'pr_user': '1000/hour',       # Personal records: 1000 requests per hour
+        'login_ip': '30/min',         # Failed logins per client IP
+        'login_email': '10/hour',     # Failed logins per email address
     },
 }
 
+# Login password checks: run on a bounded thread pool instead of the request
+# thread (0 = inline). See authentications.hashing.
+LOGIN_HASH_WORKERS = config('LOGIN_HASH_WORKERS', default=0, cast=int)
+LOGIN_HASH_QUEUE = config('LOGIN_HASH_QUEUE', default=LOGIN_HASH_WORKERS * 4, cast=int)
+LOGIN_HASH_TIMEOUT = 5  # seconds a login waits for its check before giving up
+
 # JWT Configuration
 JWT_SECRET_KEY = config('JWT_SECRET_KEY', default=SECRET_KEY)
 JWT_ALGORITHM = 'HS256'
@@ -0,0 +1,188 @@
+"""
+Achievement unlocking driven by Achievement.criteria rules.
+
+Active rules ({"type": ..., "value": N}) are loaded once per process and
+grouped by type. Saving or deleting an Achievement reloads them in the
+current process and, with a shared cache (see backend.cache), bumps a
+version token there so every process reloads on its next evaluation.
+Rules are reloaded every RULES_TTL seconds regardless, which is how other
+processes see edits without a shared cache, or bulk edits.
+
+Counted rule types keep a per-user counter in the shared cache, seeded with
+one COUNT on a miss and incremented by the event that changed it; without a
+shared cache every event is counted with that COUNT:
+
+    workout_count       workouts logged
+    nutrition_count     intake entries logged
+    challenge_complete  challenges completed
+
+Streak rule types (streak, workout_streak, nutrition_streak) are checked
+only when challenges.streaks.record() moved that streak, by reading its row;
+every rule at or below the current streak is a candidate, so streaks that
+jumped or rules added mid-streak still unlock.
+
+Only rules whose threshold the new value just crossed are candidates, so a
+save that crosses nothing costs no further query. Each candidate is unlocked
+with get_or_create and only the rows this call created are awarded their
+points, in one batch (challenges.points.award_many), so concurrent unlocks
+of the same rule pay once.
+"""
+import time
+import uuid
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+
+from backend.cache import shared_cache
+
+RULES_VERSION_KEY = 'achievement_rules_version'
+RULES_TTL = 300  # seconds
+COUNTER_TIMEOUT = 60 * 60  # seconds
+
+Rule = namedtuple('Rule', 'value achievement_id name category points_reward')
+
+_rules = {'version': None, 'loaded_at': 0.0, 'by_type': {}}
+
+
+def _count_workouts(user_id):
+    from workouts.models import WorkoutLog
+    return WorkoutLog.objects.filter(user_id=user_id, is_deleted=False).count()
+
+
+def _count_intakes(user_id):
+    from nutrition.models import IntakeLog
+    return IntakeLog.objects.filter(user_id=user_id).count()
+
+
+def _count_completed_challenges(user_id):
+    from .models import ChallengeParticipant
+    return ChallengeParticipant.objects.filter(user_id=user_id, completed=True).count()
+
+
+COUNTERS = {
+    'workout_count': _count_workouts,
+    'nutrition_count': _count_intakes,
+    'challenge_complete': _count_completed_challenges,
+}
+
+STREAK_TYPES = {'overall': 'streak', 'workout': 'workout_streak', 'nutrition': 'nutrition_streak'}
+
+
+def invalidate_rules(*args, **kwargs):
+    """Make every process reload the rules (Achievement post_save/post_delete)."""
+    _rules['loaded_at'] = 0.0
+    cache = shared_cache()
+    if cache is not None:
+        cache.set(RULES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def _rules_version():
+    cache = shared_cache()
+    if cache is None:
+        return None
+    version = cache.get(RULES_VERSION_KEY)
+    if version is None:
+        cache.add(RULES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(RULES_VERSION_KEY)
+    return version
+
+
+def rules(rule_type):
+    """Active rules of a type, sorted by threshold."""
+    from .reward_models import Achievement
+
+    version = _rules_version()
+    if version != _rules['version'] or time.monotonic() - _rules['loaded_at'] > RULES_TTL:
+        by_type = defaultdict(list)
+        for pk, name, category, criteria, points in Achievement.objects.filter(
+            is_active=True
+        ).values_list('pk', 'name', 'category', 'criteria', 'points_reward'):
+            try:
+                value = int(criteria['value'])
+                by_type[criteria['type']].append(Rule(value, pk, name, category, points))
+            except (KeyError, TypeError, ValueError):
+                continue
+        for type_rules in by_type.values():
+            type_rules.sort()
+        _rules.update(version=version, loaded_at=time.monotonic(), by_type=dict(by_type))
+    return _rules['by_type'].get(rule_type, [])
+
+
+def _counter_key(rule_type, user_id):
+    return f'achievement_counter_{rule_type}_{user_id}'
+
+
+def record(user_id, rule_type, delta=1):
+    """
+    Count an event (`delta` more of `rule_type`) that has already been saved
+    and unlock the rules it crossed. Returns the unlocked Rules.
+    """
+    type_rules = rules(rule_type)
+    if not type_rules or not delta:
+        return []
+    cache = shared_cache()
+    if cache is None:
+        # The count already includes this event
+        new = COUNTERS[rule_type](user_id)
+        old = new - delta
+        return _unlock(user_id, [rule for rule in type_rules if old < rule.value <= new])
+    key = _counter_key(rule_type, user_id)
+    try:
+        new = cache.incr(key, delta)
+        old = new - delta
+    except ValueError:
+        # Not cached: the count already includes this event, and any lower
+        # threshold may be unmet if the counter was lost
+        new = COUNTERS[rule_type](user_id)
+        old = 0
+        cache.set(key, new, timeout=COUNTER_TIMEOUT)
+    return _unlock(user_id, [rule for rule in type_rules if old < rule.value <= new])
+
+
+def record_streaks(user_id, kinds):
+    """Unlock streak rules after challenges.streaks.record() moved the given kinds."""
+    from . import streaks
+
+    models = streaks.streak_models()
+    unlocked = []
+    for kind in kinds:
+        type_rules = rules(STREAK_TYPES[kind])
+        if not type_rules:
+            continue
+        current = models[kind].objects.filter(user_id=user_id).values_list(
+            'current_streak', flat=True
+        ).first() or 0
+        # Every rule the streak has reached: a streak can jump (recalculated,
+        # or a rule added later), and _unlock() skips rules already unlocked
+        unlocked += _unlock(user_id, [rule for rule in type_rules if rule.value <= current])
+    return unlocked
+
+
+def _unlock(user_id, candidates):
+    from . import points
+    from .reward_models import UserAchievement
+
+    if not candidates:
+        return []
+    with transaction.atomic():
+        # Award only the rows inserted here: a concurrent unlock of the same
+        # rule finds the row and pays nothing
+        new = []
+        for rule in candidates:
+            _, created = UserAchievement.objects.get_or_create(
+                user_id=user_id, achievement_id=rule.achievement_id,
+                defaults={'is_completed': True, 'progress': rule.value},
+            )
+            if created:
+                new.append(rule)
+        points.award_many([
+            points.Award(
+                user_id,
+                rule.points_reward,
+                'STREAK' if rule.category == 'STREAK' else 'CHALLENGE',
+                f'Achievement unlocked: {rule.name}',
+                str(rule.achievement_id),
+            )
+            for rule in new
+        ])
+    return new
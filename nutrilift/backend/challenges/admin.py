@@ -3,6 +3,7 @@ from .models import (
     Challenge, ChallengeParticipant, Badge, UserBadge, Streak,
     Post, Comment, Like, Report, Follow, ChallengeDailyLog,
 )
+from . import social_stats
 
 
 @admin.register(Challenge)
@@ -79,14 +80,23 @@ class PostAdmin(admin.ModelAdmin):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     content_preview.short_description = 'Content'
     
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # is_removed may have changed (list_editable) — recount the author's posts
+        social_stats.reconcile([obj.user_id])
+
     @admin.action(description='Remove selected posts')
     def remove_posts(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
         updated = queryset.update(is_removed=True)
+        social_stats.reconcile(user_ids)
         self.message_user(request, f'{updated} post(s) removed.')
     
     @admin.action(description='Restore selected posts')
     def restore_posts(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
         updated = queryset.update(is_removed=False, is_reported=False)
+        social_stats.reconcile(user_ids)
         self.message_user(request, f'{updated} post(s) restored.')
 
 
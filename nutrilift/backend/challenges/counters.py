@@ -0,0 +1,121 @@
+"""
+Contention-free like and comment counters for community posts.
+
+Counters are always changed with F() expressions, so concurrent requests
+never overwrite each other. Most posts are updated in place on the Post row.
+A post that is receiving more than HOT_WRITES_PER_MINUTE counter writes is
+"hot": its writes go to one of SHARD_COUNT PostCounterShard rows picked at
+random, spreading row locks across shards. The true count is
+Post.<field> + SUM(shard deltas); the shard sums for a page of posts are read
+with one grouped query and cached briefly. The compact_post_counters command
+periodically folds shards back into the Post row.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+SHARD_COUNT = getattr(settings, 'COMMUNITY_COUNTER_SHARDS', 8)
+HOT_WRITES_PER_MINUTE = getattr(settings, 'COMMUNITY_HOT_POST_WRITES_PER_MINUTE', 30)
+DELTA_CACHE_TIMEOUT = 10  # seconds
+
+# Post counter field -> PostCounterShard delta field
+FIELDS = {
+    'like_count': 'like_delta',
+    'comment_count': 'comment_delta',
+}
+
+
+def _rate_key(post_id):
+    return f'post_counter_rate_{post_id}'
+
+
+def _delta_key(post_id):
+    return f'post_counter_deltas_{post_id}'
+
+
+def _is_hot(post_id):
+    """Count this write against the post's per-minute budget; True once it is exceeded."""
+    key = _rate_key(post_id)
+    cache.add(key, 0, timeout=60)
+    try:
+        return cache.incr(key) > HOT_WRITES_PER_MINUTE
+    except ValueError:  # expired between add() and incr()
+        return False
+
+
+def increment(post_id, field, delta=1):
+    """Atomically add `delta` to a post's like_count or comment_count."""
+    from .models import Post, PostCounterShard
+
+    if not _is_hot(post_id):
+        Post.objects.filter(pk=post_id).update(**{field: F(field) + delta})
+        return
+
+    shard_field = FIELDS[field]
+    shard = random.randrange(SHARD_COUNT)
+    shards = PostCounterShard.objects.filter(post_id=post_id, shard=shard)
+    if not shards.update(**{shard_field: F(shard_field) + delta}):
+        try:
+            with transaction.atomic():
+                PostCounterShard.objects.create(post_id=post_id, shard=shard, **{shard_field: delta})
+        except IntegrityError:
+            shards.update(**{shard_field: F(shard_field) + delta})
+
+
+def pending_deltas(post_ids):
+    """
+    Un-compacted shard sums for the given posts as
+    {post_id: {'like_count': n, 'comment_count': n}}; posts without shards
+    are omitted. Cached for DELTA_CACHE_TIMEOUT seconds.
+    """
+    from .models import PostCounterShard
+
+    keys = {_delta_key(pk): pk for pk in post_ids}
+    cached = cache.get_many(keys.keys())
+    result = {keys[k]: v for k, v in cached.items() if v}
+    missing = [pk for k, pk in keys.items() if k not in cached]
+    if missing:
+        rows = (
+            PostCounterShard.objects.filter(post_id__in=missing)
+            .values('post_id')
+            .annotate(likes=Sum('like_delta'), comments=Sum('comment_delta'))
+        )
+        fresh = {pk: {} for pk in missing}
+        for row in rows:
+            fresh[row['post_id']] = {'like_count': row['likes'], 'comment_count': row['comments']}
+        cache.set_many({_delta_key(pk): v for pk, v in fresh.items()}, timeout=DELTA_CACHE_TIMEOUT)
+        result.update({pk: v for pk, v in fresh.items() if v})
+    return result
+
+
+def current_count(post_id, field):
+    """Exact, uncached count (Post row + shards) for a single post."""
+    from .models import Post, PostCounterShard
+
+    base = Post.objects.filter(pk=post_id).values_list(field, flat=True).first() or 0
+    shard_sum = PostCounterShard.objects.filter(post_id=post_id).aggregate(
+        total=Sum(FIELDS[field])
+    )['total'] or 0
+    return max(0, base + shard_sum)
+
+
+def compact(post_id):
+    """Fold a post's shards into its Post row. Returns the number of shards folded."""
+    from .models import Post, PostCounterShard
+
+    with transaction.atomic():
+        shards = list(
+            PostCounterShard.objects.select_for_update().filter(post_id=post_id)
+        )
+        if not shards:
+            return 0
+        Post.objects.filter(pk=post_id).update(
+            like_count=F('like_count') + sum(s.like_delta for s in shards),
+            comment_count=F('comment_count') + sum(s.comment_delta for s in shards),
+        )
+        PostCounterShard.objects.filter(pk__in=[s.pk for s in shards]).delete()
+    cache.delete(_delta_key(post_id))
+    return len(shards)
@@ -0,0 +1,161 @@
+"""
+Personalized home feed.
+
+Posts are fanned out on write: once a post is committed, a background job
+(notifications.dispatch) inserts a FeedEntry row for the author and for each
+follower, so reading a home feed is a cursor-paginated index range scan over
+the reader's own FeedEntry rows, (user, -created_at), joined to their posts.
+
+Accounts with more than FANOUT_FOLLOWER_LIMIT followers are "celebrities":
+their posts are not copied into every follower's timeline (that would be one
+INSERT per follower per post). Instead each reader pulls them in when they
+open the first page of their feed: posts by followed celebrities since the
+reader's last pull are copied into the reader's own timeline, which keeps
+every page a plain timeline scan.
+
+Users who follow nobody get the global feed so new accounts are not empty.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+FANOUT_FOLLOWER_LIMIT = getattr(settings, 'COMMUNITY_FEED_FANOUT_LIMIT', 5000)
+FANOUT_BATCH_SIZE = 1000
+FOLLOW_BACKFILL_POSTS = 20
+CELEBRITY_CACHE_KEY = 'community_feed_celebrity_ids'
+CELEBRITY_CACHE_TIMEOUT = 300  # seconds
+CELEBRITY_PULL_TIMEOUT = 24 * 60 * 60  # seconds a reader's last-pull time is kept
+CELEBRITY_PULL_OVERLAP = 60  # seconds re-read per pull, for posts committed late
+
+
+def celebrity_ids():
+    """Ids of users whose followers exceed FANOUT_FOLLOWER_LIMIT (cached)."""
+    from .models import Follow
+
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            Follow.objects.values('following_id')
+            .annotate(n=Count('id'))
+            .filter(n__gt=FANOUT_FOLLOWER_LIMIT)
+            .values_list('following_id', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, ids, timeout=CELEBRITY_CACHE_TIMEOUT)
+    return ids
+
+
+def _bulk_insert(post, user_ids):
+    from .models import FeedEntry
+
+    batch = []
+    for user_id in user_ids:
+        batch.append(FeedEntry(user_id=user_id, post_id=post.pk, created_at=post.created_at))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Insert `post` into its author's timeline and, unless the author is a celebrity, every follower's."""
+    from .models import Follow
+
+    if post.user_id in celebrity_ids():
+        _bulk_insert(post, [post.user_id])
+        return
+    follower_ids = (
+        Follow.objects.filter(following_id=post.user_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=FANOUT_BATCH_SIZE)
+    )
+    _bulk_insert(post, _with_author(post.user_id, follower_ids))
+
+
+def _with_author(author_id, follower_ids):
+    yield author_id
+    yield from follower_ids
+
+
+def backfill_follow(follower_id, following_id):
+    """Copy the followee's most recent posts into a new follower's timeline."""
+    from .models import FeedEntry, Post
+
+    if following_id in celebrity_ids():
+        return  # pulled in at read time
+    recent = Post.objects.filter(
+        user_id=following_id, is_removed=False
+    ).order_by('-created_at').values_list('pk', 'created_at')[:FOLLOW_BACKFILL_POSTS]
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=follower_id, post_id=pk, created_at=created_at) for pk, created_at in recent],
+        ignore_conflicts=True,
+    )
+
+
+def remove_follow(follower_id, following_id):
+    """Drop an unfollowed account's posts from the follower's timeline."""
+    from .models import FeedEntry
+
+    FeedEntry.objects.filter(user_id=follower_id, post__user_id=following_id).delete()
+
+
+def _pull_key(user_id):
+    return f'community_feed_celebrity_pull_{user_id}'
+
+
+def pull_celebrity_posts(user_id):
+    """Copy followed celebrities' posts since the reader's last pull into their timeline."""
+    from .models import FeedEntry, Follow, Post
+
+    celebrities = celebrity_ids()
+    if not celebrities:
+        return
+    followed = list(
+        Follow.objects.filter(follower_id=user_id, following_id__in=celebrities)
+        .values_list('following_id', flat=True)
+    )
+    if not followed:
+        return
+    now = timezone.now()
+    since = cache.get(_pull_key(user_id))
+    posts = Post.objects.filter(user_id__in=followed, is_removed=False).order_by('-created_at')
+    if since is None:
+        posts = posts[:FOLLOW_BACKFILL_POSTS * len(followed)]
+    else:
+        posts = posts.filter(
+            created_at__gte=since - timezone.timedelta(seconds=CELEBRITY_PULL_OVERLAP)
+        )[:FANOUT_BATCH_SIZE]
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, post_id=pk, created_at=created_at)
+            for pk, created_at in posts.values_list('pk', 'created_at')
+        ],
+        ignore_conflicts=True,
+    )
+    cache.set(_pull_key(user_id), now, timeout=CELEBRITY_PULL_TIMEOUT)
+
+
+def home_timeline(user_id, pull=True):
+    """
+    FeedEntry queryset for the user's home feed (own and followed accounts'
+    posts, with .post loaded), or None if they follow nobody and should get
+    the global feed. Ordering is left to the caller's cursor paginator, on
+    created_at. `pull` first pulls in followed celebrities' new posts; the
+    view does that for the first page only.
+    """
+    from .models import FeedEntry, Follow
+
+    if not Follow.objects.filter(follower_id=user_id).exists():
+        return None
+    if pull:
+        pull_celebrity_posts(user_id)
+    return FeedEntry.objects.filter(
+        user_id=user_id, post__is_removed=False
+    ).select_related('post__user')
+
+
+def global_feed():
+    """Every visible post, for users who follow nobody."""
+    from .models import Post
+    return Post.objects.filter(is_removed=False).select_related('user')
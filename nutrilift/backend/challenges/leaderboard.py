@@ -0,0 +1,160 @@
+"""
+Cached per-challenge leaderboard.
+
+Each challenge's standings are kept in the shared cache (see backend.cache;
+the per-process default cache without one) as a list of (-progress, user_id)
+keys sorted ascending, plus a user_id -> progress map. Reads (top-N, a
+user's rank, the neighbours around a user) are a cache get and a bisect
+instead of an ORDER BY over every participant.
+
+A progress change moves the participant's key in place (update()), so a
+busy challenge is not re-sorted on every log save; only joins and leaves
+discard the snapshot, and the next read rebuilds it with one query. The
+read-modify-write can lose a concurrent update to the same challenge; the
+participant's next change corrects it, and every snapshot is rebuilt
+SNAPSHOT_TIMEOUT after it was built however often it is updated.
+
+Ranks use competition ranking: participants with equal progress share a rank
+and the next rank skips accordingly (1, 2, 2, 4), matching
+COUNT(progress > x) + 1.
+
+Snapshots also expire after SNAPSHOT_TIMEOUT, so reads can trail the
+database briefly; anything that needs an exact rank (prize awarding) should
+use ranked_participants() instead.
+"""
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache as default_cache
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from backend.cache import shared_cache
+
+SNAPSHOT_TIMEOUT = 300  # seconds
+
+
+def ranked_participants(challenge_id):
+    """
+    ChallengeParticipant queryset annotated with leaderboard_rank via
+    RANK() OVER (ORDER BY progress DESC), ordered by rank. Filtering on
+    leaderboard_rank selects a rank range without loading the whole table;
+    the (challenge, -progress) index serves the ordering.
+    """
+    from .models import ChallengeParticipant
+
+    return (
+        ChallengeParticipant.objects
+        .filter(challenge_id=challenge_id)
+        .annotate(leaderboard_rank=Window(expression=Rank(), order_by=F('progress').desc()))
+        .order_by('-progress', 'joined_at')
+    )
+
+
+def _cache():
+    return shared_cache() or default_cache
+
+
+def _cache_key(challenge_id):
+    return f'challenge_leaderboard_{challenge_id}'
+
+
+def _build(challenge_id):
+    from .models import ChallengeParticipant
+
+    rows = ChallengeParticipant.objects.filter(
+        challenge_id=challenge_id
+    ).values_list('user_id', 'progress')
+    scores = {str(user_id): float(progress) for user_id, progress in rows}
+    snapshot = {
+        'keys': sorted((-progress, user_id) for user_id, progress in scores.items()),
+        'scores': scores,
+        'built_at': time.time(),
+    }
+    _cache().set(_cache_key(challenge_id), snapshot, timeout=SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def _snapshot(challenge_id):
+    snapshot = _cache().get(_cache_key(challenge_id))
+    if snapshot is None:
+        snapshot = _build(challenge_id)
+    return snapshot
+
+
+def _rank_for(keys, progress):
+    """1-based competition rank for a progress value."""
+    return bisect_left(keys, (-progress,)) + 1
+
+
+def _entries(keys, start, stop):
+    return [
+        {'rank': _rank_for(keys, -neg_progress), 'user_id': user_id, 'progress': -neg_progress}
+        for neg_progress, user_id in keys[start:stop]
+    ]
+
+
+def invalidate(*challenge_ids):
+    """Discard the challenges' snapshots after participants joined or left."""
+    _cache().delete_many([_cache_key(challenge_id) for challenge_id in challenge_ids])
+
+
+def update(challenge_id, user_id, progress):
+    """Move a participant to their new progress in a cached snapshot, if there is one."""
+    cache = _cache()
+    key = _cache_key(challenge_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        return
+    user_id = str(user_id)
+    progress = float(progress)
+    scores, keys = snapshot['scores'], snapshot['keys']
+    old = scores.get(user_id)
+    if old == progress:
+        return
+    if old is not None:
+        position = bisect_left(keys, (-old, user_id))
+        if position < len(keys) and keys[position] == (-old, user_id):
+            del keys[position]
+    insort(keys, (-progress, user_id))
+    scores[user_id] = progress
+    remaining = SNAPSHOT_TIMEOUT - (time.time() - snapshot.get('built_at', 0))
+    if remaining > 0:
+        cache.set(key, snapshot, timeout=remaining)
+    else:
+        cache.delete(key)
+
+
+def top(challenge_id, limit=10):
+    """Top `limit` entries as dicts with rank, user_id and progress."""
+    keys = _snapshot(challenge_id)['keys']
+    return _entries(keys, 0, limit)
+
+
+def rank_of(challenge_id, user_id):
+    """1-based rank of a user in the challenge, or None if not a participant."""
+    snapshot = _snapshot(challenge_id)
+    progress = snapshot['scores'].get(str(user_id))
+    if progress is None:
+        return None
+    return _rank_for(snapshot['keys'], progress)
+
+
+def around(challenge_id, user_id, window=5):
+    """
+    The user's entry with up to `window` neighbours on each side, or an empty
+    list if the user is not a participant.
+    """
+    snapshot = _snapshot(challenge_id)
+    user_id = str(user_id)
+    progress = snapshot['scores'].get(user_id)
+    if progress is None:
+        return []
+    keys = snapshot['keys']
+    position = bisect_left(keys, (-progress, user_id))
+    return _entries(keys, max(0, position - window), position + window + 1)
+
+
+def total(challenge_id):
+    """Number of participants in the snapshot."""
+    return len(_snapshot(challenge_id)['keys'])
@@ -0,0 +1,47 @@
+"""
+Management command: backfill_task_specs
+Parse and resolve default_tasks of existing challenges into structured
+specs (exercise_id / food_item_id, target reps / grams) — see
+challenges.task_specs. Safe to re-run, e.g. after the exercise or food
+catalogue changes.
+
+Usage:
+    python manage.py backfill_task_specs
+    python manage.py backfill_task_specs --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Store structured, catalogue-resolved specs in Challenge.default_tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report changes without saving',
+        )
+
+    def handle(self, *args, **options):
+        from challenges.models import Challenge
+        from challenges.task_specs import structure_tasks
+
+        challenges = Challenge.objects.exclude(default_tasks=[]).only('pk', 'name', 'default_tasks')
+
+        updated = 0
+        for challenge in challenges.iterator(chunk_size=200):
+            tasks = structure_tasks([
+                t if isinstance(t, dict) else {'label': t, 'type': 'manual'}
+                for t in (challenge.default_tasks or [])
+                if (isinstance(t, dict) and t.get('label')) or (isinstance(t, str) and t.strip())
+            ])
+            if tasks == challenge.default_tasks:
+                continue
+            updated += 1
+            if not options['dry_run']:
+                # update() rather than save(): no post_save, so no
+                # challenge-updated handling or notifications
+                Challenge.objects.filter(pk=challenge.pk).update(default_tasks=tasks)
+
+        verb = 'Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {updated} challenge(s).'))
@@ -0,0 +1,31 @@
+"""
+Management command: compact_post_counters
+Fold sharded like/comment counters (PostCounterShard rows written while a
+post was hot) back into Post.like_count / comment_count. Run periodically,
+e.g. every few minutes from cron.
+
+Usage:
+    python manage.py compact_post_counters
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Fold PostCounterShard rows into Post like/comment counts.'
+
+    def handle(self, *args, **options):
+        from challenges.counters import compact
+        from challenges.models import PostCounterShard
+
+        post_ids = PostCounterShard.objects.values_list('post_id', flat=True).distinct()
+
+        posts = shards = 0
+        for post_id in list(post_ids):
+            folded = compact(post_id)
+            if folded:
+                posts += 1
+                shards += folded
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {shards} shard(s) across {posts} post(s).'
+        ))
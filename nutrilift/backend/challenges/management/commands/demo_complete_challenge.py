@@ -161,8 +161,8 @@ class Command(BaseCommand):
 
         # Update streak
         try:
-            from challenges.signals import _update_streak
-            _update_streak(user)
+            from challenges import streaks
+            streaks.record(user.pk)
             self.stdout.write('Streak updated')
         except Exception as e:
             self.stdout.write(f'Streak update skipped: {e}')
@@ -0,0 +1,39 @@
+"""
+Management command: rebuild_feeds
+Materialize home-feed timelines (FeedEntry rows) for existing posts, e.g.
+after first deploying fan-out-on-write or after a data repair.
+
+Usage:
+    python manage.py rebuild_feeds               # posts from the last 30 days
+    python manage.py rebuild_feeds --days 90
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Fan out recent posts into FeedEntry timelines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Only fan out posts created in the last N days (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        from challenges.feed import fan_out_post
+        from challenges.models import Post
+
+        since = timezone.now() - timezone.timedelta(days=options['days'])
+        posts = Post.objects.filter(is_removed=False, created_at__gte=since).only(
+            'pk', 'user_id', 'created_at'
+        )
+
+        count = 0
+        for post in posts.iterator(chunk_size=500):
+            fan_out_post(post)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Fanned out {count} post(s).'))
@@ -1,37 +1,92 @@
+"""
+Management command: recalculate_challenge_progress
+Recompute progress for every participation in an active challenge from the
+source workout, nutrition and daily logs (see challenges.progress.recalculate).
+Run after any data repair.
+
+Users are processed in chunks; with --workers > 1 the chunks run in a
+process pool, each worker using its own database connection. The changed
+challenges' leaderboard snapshots are invalidated from this process once
+every chunk is done. That reaches the web workers only through the shared
+cache (REDIS_URL); without one they serve their own snapshots until these
+expire (challenges.leaderboard.SNAPSHOT_TIMEOUT).
+
+Usage:
+    python manage.py recalculate_challenge_progress
+    python manage.py recalculate_challenge_progress --dry-run
+    python manage.py recalculate_challenge_progress --chunk-size 1000 --workers 8
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from django.core.management.base import BaseCommand
+from django.db import connections
 from django.utils import timezone
 
 
+def _recalculate_chunk(user_ids, dry_run):
+    """Process-pool entry point."""
+    from challenges.progress import recalculate
+    try:
+        return recalculate(user_ids, dry_run=dry_run)
+    finally:
+        connections.close_all()
+
+
 class Command(BaseCommand):
     help = 'Recalculate all active challenge progress from actual workout/nutrition logs'
 
-    def handle(self, *args, **options):
-        from challenges.signals import (
-            _update_challenge_progress_from_nutrition,
-            _update_challenge_progress_from_workout,
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Users per recalculation query (default: 500)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Worker processes; 1 runs in-process (default: min(4, CPUs))',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print progress changes without saving them',
         )
+
+    def handle(self, *args, **options):
+        from challenges import leaderboard
         from challenges.models import ChallengeParticipant
-        from django.contrib.auth import get_user_model
-
-        User = get_user_model()
-        now = timezone.now()
-
-        # Get all users with active challenge participation
-        user_ids = ChallengeParticipant.objects.filter(
-            challenge__is_active=True,
-            challenge__end_date__gt=now,
-            completed=False,
-        ).values_list('user_id', flat=True).distinct()
-
-        users = User.objects.filter(id__in=user_ids)
-        self.stdout.write(f'Recalculating progress for {users.count()} users...')
-
-        for user in users:
-            try:
-                _update_challenge_progress_from_nutrition(user)
-                _update_challenge_progress_from_workout(user)
-                self.stdout.write(f'  ✅ {user.email}')
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'  ❌ {user.email}: {e}'))
-
-        self.stdout.write(self.style.SUCCESS('Done.'))
+        from challenges.progress import recalculate
+
+        dry_run = options['dry_run']
+        chunk_size = options['chunk_size']
+
+        user_ids = list(
+            ChallengeParticipant.objects.filter(
+                challenge__is_active=True,
+                challenge__end_date__gt=timezone.now(),
+            ).order_by().values_list('user_id', flat=True).distinct()
+        )
+        chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+        self.stdout.write(f'Recalculating progress for {len(user_ids)} users in {len(chunks)} chunk(s)...')
+
+        if options['workers'] > 1 and len(chunks) > 1:
+            # Forked workers must not share the parent's open connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                results = pool.map(_recalculate_chunk, chunks, [dry_run] * len(chunks))
+                diffs = [diff for chunk in results for diff in chunk]
+        else:
+            diffs = [diff for chunk in chunks for diff in recalculate(chunk, dry_run=dry_run)]
+        if not dry_run:
+            leaderboard.invalidate(*{challenge_id for _, challenge_id, _, _, _ in diffs})
+
+        for participant_id, challenge_id, user_id, old, new in diffs:
+            self.stdout.write(
+                f'  {"~" if dry_run else "✅"} user {user_id} challenge {challenge_id}: {old:g} -> {new:g}'
+            )
+
+        verb = 'Would update' if dry_run else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(diffs)} participation(s).'))
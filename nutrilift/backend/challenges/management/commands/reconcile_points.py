@@ -0,0 +1,33 @@
+"""
+Management command: reconcile_points
+Recompute every UserPoints balance (total, lifetime, spent, level) from the
+PointTransaction ledger with one grouped query, and rewrite the balances
+that disagree (creating missing ones).
+
+Usage:
+    python manage.py reconcile_points
+    python manage.py reconcile_points --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recompute UserPoints balances from the PointTransaction ledger.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report balances that disagree with the ledger without writing.',
+        )
+
+    def handle(self, *args, **options):
+        from challenges.points import reconcile
+
+        dry_run = options['dry_run']
+        fixed = reconcile(dry_run=dry_run)
+        for user_id, stored, expected in fixed:
+            self.stdout.write(f'  user={user_id} stored={stored} ledger={expected}')
+
+        verb = 'would be corrected' if dry_run else 'corrected'
+        self.stdout.write(self.style.SUCCESS(f'{len(fixed)} balance(s) {verb}.'))
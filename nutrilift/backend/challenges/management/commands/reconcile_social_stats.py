@@ -0,0 +1,61 @@
+"""
+Management command: reconcile_social_stats
+Recompute stored UserSocialStats rows from Follow, Post, ChallengeParticipant
+and ChallengeDailyLog and fix any that drifted (e.g. after bulk admin edits
+that bypass signals). Users without a row are skipped — their row is
+computed from source on first read. Run nightly.
+
+Usage:
+    python manage.py reconcile_social_stats
+    python manage.py reconcile_social_stats --chunk-size 1000
+    python manage.py reconcile_social_stats --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized UserSocialStats counters and fix drifted rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Users reconciled per batch (default: 500).',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted rows without writing them.',
+        )
+
+    def handle(self, *args, **options):
+        from challenges import social_stats
+        from challenges.models import UserSocialStats
+
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        user_ids = list(UserSocialStats.objects.order_by('pk').values_list('pk', flat=True))
+
+        corrected = 0
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            if dry_run:
+                expected = social_stats.compute(chunk)
+                for row in UserSocialStats.objects.filter(pk__in=chunk):
+                    values = expected[row.user_id]
+                    drift = {
+                        field: (getattr(row, field), values[field])
+                        for field in social_stats.FIELDS
+                        if getattr(row, field) != values[field]
+                    }
+                    if drift:
+                        corrected += 1
+                        self.stdout.write(f'  user={row.user_id} {drift}')
+            else:
+                corrected += social_stats.reconcile(chunk)
+
+        verb = 'would be corrected' if dry_run else 'corrected'
+        self.stdout.write(self.style.SUCCESS(
+            f'{corrected} of {len(user_ids)} social stats row(s) {verb}.'
+        ))
@@ -0,0 +1,33 @@
+"""
+Management command: refresh_points_leaderboard
+Rebuild the cached top entries of the all-time, weekly and monthly points
+leaderboards in the shared cache (one query each). Awards don't update the
+cached boards, which otherwise catch up when they expire; run this every
+few minutes to keep them fresher. Without a shared cache (REDIS_URL) boards
+are read from the database and there is nothing to refresh.
+
+Usage:
+    python manage.py refresh_points_leaderboard
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cached points leaderboards.'
+
+    def handle(self, *args, **options):
+        from backend.cache import shared_cache
+        from challenges import points_leaderboard
+
+        if shared_cache() is None:
+            self.stdout.write(self.style.WARNING(
+                'No shared cache configured (REDIS_URL); leaderboards are read from the database.'
+            ))
+            return
+        sizes = {
+            board: len(points_leaderboard.build(board))
+            for board in points_leaderboard.BOARDS
+        }
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt points leaderboards: ' + ', '.join(f'{b}={n}' for b, n in sizes.items())
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0009_add_prize_paid_to_participant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challengeparticipant',
+            index=models.Index(fields=['challenge', '-progress'], name='challenges__challen_b308c8_idx'),
+        ),
+    ]
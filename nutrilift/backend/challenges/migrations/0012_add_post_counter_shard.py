@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0011_add_feed_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('like_delta', models.IntegerField(default=0)),
+                ('comment_delta', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='challenges.post')),
+            ],
+            options={
+                'unique_together': {('post', 'shard')},
+            },
+        ),
+    ]
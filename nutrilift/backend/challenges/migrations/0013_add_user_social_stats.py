@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentications', '0005_add_password_reset_otp'),
+        ('challenges', '0012_add_post_counter_shard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSocialStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='social_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('follower_count', models.IntegerField(default=0)),
+                ('following_count', models.IntegerField(default=0)),
+                ('post_count', models.IntegerField(default=0)),
+                ('challenges_joined', models.IntegerField(default=0)),
+                ('challenges_completed', models.IntegerField(default=0)),
+                ('completed_days', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
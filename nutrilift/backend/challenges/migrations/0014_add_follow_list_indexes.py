@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0013_add_user_social_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at'], name='challenges__followi_d6a6f6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at'], name='challenges__followe_43b32f_idx'),
+        ),
+    ]
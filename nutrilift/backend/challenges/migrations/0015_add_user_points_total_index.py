@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0014_add_follow_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userpoints',
+            index=models.Index(fields=['-total_points'], name='user_points_total_p_cf4c6c_idx'),
+        ),
+    ]
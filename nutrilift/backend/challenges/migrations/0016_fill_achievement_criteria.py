@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# The achievements unlocked by name before rules came from Achievement.criteria
+NAMED_RULES = {
+    ('WORKOUT', 'First 10 Workouts'): {'type': 'workout_count', 'value': 10},
+    ('WORKOUT', '50 Workouts Strong'): {'type': 'workout_count', 'value': 50},
+    ('WORKOUT', 'Century Club'): {'type': 'workout_count', 'value': 100},
+    ('WORKOUT', 'Workout Warrior'): {'type': 'workout_count', 'value': 500},
+    ('STREAK', '7 Day Streak'): {'type': 'streak', 'value': 7},
+    ('STREAK', '30 Day Streak'): {'type': 'streak', 'value': 30},
+    ('STREAK', '100 Day Streak'): {'type': 'streak', 'value': 100},
+}
+
+
+def fill_criteria(apps, schema_editor):
+    """Give the named achievements a rule, unless they already have a usable one."""
+    Achievement = apps.get_model('challenges', 'Achievement')
+    for (category, name), rule in NAMED_RULES.items():
+        for achievement in Achievement.objects.filter(category=category, name=name):
+            criteria = achievement.criteria
+            if isinstance(criteria, dict) and criteria.get('type') and criteria.get('value') is not None:
+                continue
+            achievement.criteria = rule
+            achievement.save(update_fields=['criteria'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0015_add_user_points_total_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_criteria, migrations.RunPython.noop),
+    ]
@@ -51,6 +51,9 @@ class ChallengeParticipant(models.Model):
 
     class Meta:
         unique_together = [('challenge', 'user')]
+        indexes = [
+            models.Index(fields=['challenge', '-progress']),  # leaderboard ranking
+        ]
 
     def __str__(self):
         return f"{self.user} in {self.challenge}"
@@ -109,10 +112,35 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_removed', '-created_at']),  # global feed
+            models.Index(fields=['user', '-created_at']),        # profile posts, fan-out-on-read
+        ]
+
     def __str__(self):
         return f"Post by {self.user} at {self.created_at}"
 
 
+class PostCounterShard(models.Model):
+    """
+    One of N sub-counters for a hot post's like/comment counts. Writers bump a
+    random shard instead of the Post row so concurrent likes don't queue on a
+    single row lock; readers add the shard sums to Post.like_count /
+    comment_count, and compact_post_counters folds them back in.
+    """
+    post = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField()
+    like_delta = models.IntegerField(default=0)
+    comment_delta = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [('post', 'shard')]
+
+    def __str__(self):
+        return f"Shard {self.shard} of {self.post}"
+
+
 class Comment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -185,11 +213,60 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = [('follower', 'following')]
+        indexes = [
+            models.Index(fields=['following', '-created_at']),  # followers list
+            models.Index(fields=['follower', '-created_at']),   # following list
+        ]
 
     def __str__(self):
         return f"{self.follower} follows {self.following}"
 
 
+class FeedEntry(models.Model):
+    """
+    Materialized home-feed row: `post` appears in `user`'s timeline.
+    Written when a post is created (fan-out-on-write, see challenges.feed);
+    created_at mirrors the post's created_at so a timeline page is a single
+    index range scan on (user, -created_at).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries'
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='feed_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = [('user', 'post')]
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.post} in feed of {self.user}"
+
+
+class UserSocialStats(models.Model):
+    """
+    Denormalized profile counters for a user, adjusted with F() updates by
+    challenges.social_stats once the Follow / Post / participation /
+    daily-log write that changes them commits. A missing row is
+    computed from source on first read; reconcile_social_stats repairs drift.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+        related_name='social_stats'
+    )
+    follower_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+    post_count = models.IntegerField(default=0)  # non-removed posts
+    challenges_joined = models.IntegerField(default=0)
+    challenges_completed = models.IntegerField(default=0)
+    completed_days = models.IntegerField(default=0)  # completed ChallengeDailyLogs
+
+    def __str__(self):
+        return f"Stats for {self.user}"
+
+
 # Import reward and payment models to register with Django
 from .reward_models import UserPoints, PointTransaction, Achievement, UserAchievement
 from .payment_models import PaymentPlan, ChallengePayment, Subscription
@@ -0,0 +1,227 @@
+"""
+Points ledger: PointTransaction rows are the source of truth and UserPoints
+is the running balance derived from them.
+
+award_many() appends the ledger rows with one bulk INSERT and moves every
+affected balance with one UPDATE ... SET total_points = total_points + CASE
+user_id ... END (and likewise lifetime_points / points_spent), in the same
+transaction, so concurrent awards never lose points. Balances that do not
+exist yet are inserted (ON CONFLICT DO NOTHING) and updated the same way.
+The level is computed in that UPDATE too: GREATEST(level, lifetime / 1000 + 1).
+The cached points leaderboards are not touched; they are rebuilt on expiry
+(see challenges.points_leaderboard).
+
+How each transaction type moves the balance:
+    EARN, BONUS  total +p, lifetime +p
+    SPEND        total -p, spent +p
+    REFUND       total +p, spent -p
+
+summary() totals a user's ledger per period and source (cached until their
+next transaction). reconcile() recomputes balances from the ledger with one
+grouped query (see the reconcile_points command).
+"""
+from collections import defaultdict, namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncMonth, TruncWeek
+
+from . import points_leaderboard
+
+POINTS_PER_LEVEL = 1000
+SUMMARY_CACHE_TIMEOUT = 60 * 60  # seconds
+
+# transaction_type -> (total, lifetime, spent) multipliers
+EFFECTS = {
+    'EARN': (1, 1, 0),
+    'BONUS': (1, 1, 0),
+    'SPEND': (-1, 0, 1),
+    'REFUND': (1, 0, -1),
+}
+
+Award = namedtuple('Award', 'user_id points source description reference_id transaction_type')
+Award.__new__.__defaults__ = (None, 'EARN')
+
+
+def award(user_id, points, source, description, reference_id=None, transaction_type='EARN'):
+    """Record one transaction and move the user's balance."""
+    award_many([Award(user_id, points, source, description, reference_id, transaction_type)])
+
+
+def _case(deltas):
+    """CASE user_id WHEN ... THEN delta ... END for the users with a non-zero delta."""
+    whens = [When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items() if delta]
+    if not whens:
+        return Value(0)
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def _apply(user_ids, total, lifetime, spent):
+    from .reward_models import UserPoints
+
+    new_lifetime = F('lifetime_points') + _case(lifetime)
+    return UserPoints.objects.filter(user_id__in=user_ids).update(
+        total_points=F('total_points') + _case(total),
+        lifetime_points=new_lifetime,
+        points_spent=F('points_spent') + _case(spent),
+        level=Greatest(F('level'), new_lifetime / POINTS_PER_LEVEL + 1),
+    )
+
+
+def award_many(awards):
+    """
+    Record many transactions (any mix of users and events) with one INSERT
+    into the ledger and one UPDATE of the balances.
+    """
+    from .reward_models import PointTransaction, UserPoints
+
+    awards = [award for award in awards if award.points]
+    if not awards:
+        return
+    total, lifetime, spent = defaultdict(int), defaultdict(int), defaultdict(int)
+    for award in awards:
+        t, l, s = EFFECTS[award.transaction_type]
+        total[award.user_id] += t * award.points
+        lifetime[award.user_id] += l * award.points
+        spent[award.user_id] += s * award.points
+    user_ids = list(total)
+
+    with transaction.atomic():
+        PointTransaction.objects.bulk_create([
+            PointTransaction(
+                user_id=award.user_id,
+                transaction_type=award.transaction_type,
+                source=award.source,
+                points=award.points,
+                description=award.description,
+                reference_id=award.reference_id,
+            )
+            for award in awards
+        ])
+        if _apply(user_ids, total, lifetime, spent) < len(user_ids):
+            existing = set(
+                UserPoints.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+            )
+            missing = [user_id for user_id in user_ids if user_id not in existing]
+            UserPoints.objects.bulk_create(
+                [UserPoints(user_id=user_id) for user_id in missing], ignore_conflicts=True,
+            )
+            _apply(missing, total, lifetime, spent)
+        transaction.on_commit(lambda: invalidate_summaries(user_ids))
+
+
+SUMMARY_GRANULARITIES = {'month': TruncMonth, 'week': TruncWeek}
+CREDIT_TYPES = tuple(t for t, (total, _, _) in EFFECTS.items() if total > 0)
+DEBIT_TYPES = tuple(t for t, (total, _, _) in EFFECTS.items() if total < 0)
+
+
+def _summary_key(user_id, granularity):
+    return f'point_summary_{granularity}_{user_id}'
+
+
+def invalidate_summaries(user_ids):
+    cache.delete_many([
+        _summary_key(user_id, granularity)
+        for user_id in user_ids for granularity in SUMMARY_GRANULARITIES
+    ])
+
+
+def summary(user_id, granularity='month'):
+    """
+    The user's ledger totalled per period (newest first), with earned and
+    spent points per source, from one grouped query cached until the user's
+    next transaction:
+        [{'period': date, 'earned': n, 'spent': n,
+          'sources': {source: {'earned': n, 'spent': n}}}]
+    """
+    from .reward_models import PointTransaction
+
+    key = _summary_key(user_id, granularity)
+    periods = cache.get(key)
+    if periods is not None:
+        return periods
+
+    rows = (
+        PointTransaction.objects.filter(user_id=user_id)
+        .annotate(period=SUMMARY_GRANULARITIES[granularity]('created_at'))
+        .order_by()
+        .values('period', 'source')
+        .annotate(earned=_ledger_sum(*CREDIT_TYPES), spent=_ledger_sum(*DEBIT_TYPES))
+        .order_by('-period', 'source')
+    )
+    periods = []
+    for row in rows:
+        period = row['period'].date()
+        if not periods or periods[-1]['period'] != period:
+            periods.append({'period': period, 'earned': 0, 'spent': 0, 'sources': {}})
+        current = periods[-1]
+        current['earned'] += row['earned']
+        current['spent'] += row['spent']
+        current['sources'][row['source']] = {'earned': row['earned'], 'spent': row['spent']}
+    cache.set(key, periods, timeout=SUMMARY_CACHE_TIMEOUT)
+    return periods
+
+
+def _ledger_sum(*types):
+    return Coalesce(
+        Sum('points', filter=Q(transaction_type__in=types)), Value(0), output_field=IntegerField(),
+    )
+
+
+def ledger_balances(user_ids=None):
+    """
+    {user_id: (total, lifetime, spent, level)} recomputed from the ledger,
+    one grouped query.
+    """
+    from .reward_models import PointTransaction
+
+    rows = PointTransaction.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    rows = rows.order_by().values('user_id').annotate(
+        earned=_ledger_sum('EARN', 'BONUS'),
+        spent=_ledger_sum('SPEND'),
+        refunded=_ledger_sum('REFUND'),
+    ).annotate(
+        total=F('earned') - F('spent') + F('refunded'),
+        net_spent=F('spent') - F('refunded'),
+        level=F('earned') / POINTS_PER_LEVEL + 1,
+    ).values_list('user_id', 'total', 'earned', 'net_spent', 'level')
+    return {user_id: values for user_id, *values in rows}
+
+
+def reconcile(user_ids=None, dry_run=False):
+    """
+    Rewrite UserPoints balances that disagree with the ledger (creating
+    missing ones). Returns [(user_id, stored, expected)] for the rows fixed,
+    each as (total, lifetime, spent, level).
+    """
+    from .reward_models import UserPoints
+
+    expected = ledger_balances(user_ids)
+    stored = UserPoints.objects.all()
+    if user_ids is not None:
+        stored = stored.filter(user_id__in=user_ids)
+    fields = ('total_points', 'lifetime_points', 'points_spent', 'level')
+
+    fixed, changed, created = [], [], []
+    for row in stored:
+        values = tuple(expected.pop(row.user_id, (0, 0, 0, 1)))
+        current = tuple(getattr(row, field) for field in fields)
+        if current != values:
+            fixed.append((row.user_id, current, values))
+            for field, value in zip(fields, values):
+                setattr(row, field, value)
+            changed.append(row)
+    for user_id, values in expected.items():
+        fixed.append((user_id, None, tuple(values)))
+        created.append(UserPoints(user_id=user_id, **dict(zip(fields, values))))
+
+    if not dry_run:
+        with transaction.atomic():
+            UserPoints.objects.bulk_update(changed, fields, batch_size=500)
+            UserPoints.objects.bulk_create(created, batch_size=500, ignore_conflicts=True)
+        if fixed:
+            points_leaderboard.invalidate()
+    return fixed
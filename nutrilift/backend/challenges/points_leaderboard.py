@@ -0,0 +1,158 @@
+"""
+Global points leaderboards (LeaderboardPointsView).
+
+Three boards rank users by a score:
+
+    all     UserPoints.total_points
+    week    points earned (EARN/BONUS) since this week's Monday
+    month   points earned since the 1st of this month
+
+The top TOP_SIZE entries of each board are built with one LIMITed query and
+kept in the shared cache (see backend.cache) for SNAPSHOT_TIMEOUT seconds.
+Awards do not touch the snapshots, so they can trail the ledger until they
+expire; refresh_points_leaderboard rebuilds them ahead of that, and weekly
+and monthly ones are rebuilt once their window has rolled over. Without a
+shared cache the top entries are queried on every read.
+
+"Around me" reads are never served from the snapshot: they look up the
+user's score and rank and the neighbours on either side with a few queries
+ordered by the score (the -total_points index for 'all'), rather than
+loading the whole board.
+
+Ranks use competition ranking (1, 2, 2, 4), as in challenges.leaderboard;
+equal scores are ordered by user id.
+"""
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from backend.cache import shared_cache
+
+SNAPSHOT_TIMEOUT = 600  # seconds
+TOP_SIZE = 100  # entries kept in a snapshot
+
+BOARDS = ('all', 'week', 'month')
+EARNING_TYPES = ('EARN', 'BONUS')
+
+PROFILE_FIELDS = ('user__name', 'user__email', 'user__avatar_url')
+
+
+def _cache_key(board):
+    return f'points_leaderboard_{board}'
+
+
+def window_start(board):
+    """First local date counted by a windowed board (None for 'all')."""
+    today = timezone.localtime(timezone.now()).date()
+    if board == 'week':
+        return today - timezone.timedelta(days=today.weekday())
+    if board == 'month':
+        return today.replace(day=1)
+    return None
+
+
+def _entry(rank, user_id, score, level, name, email, avatar_url):
+    return {
+        'rank': rank,
+        'user_id': str(user_id),
+        'points': int(score),
+        'level': level or 1,
+        'username': name or email,
+        'avatar_url': avatar_url,
+    }
+
+
+def _standings(board, since):
+    """One row per ranked user with its `score` annotated, unordered."""
+    from .reward_models import PointTransaction, UserPoints
+
+    if board == 'all':
+        return UserPoints.objects.annotate(score=F('total_points')).order_by()
+    start = timezone.make_aware(timezone.datetime.combine(since, timezone.datetime.min.time()))
+    return (
+        PointTransaction.objects
+        .filter(created_at__gte=start, transaction_type__in=EARNING_TYPES)
+        .order_by()
+        .values('user_id')
+        .annotate(score=Sum('points'))
+    )
+
+
+def _level_field(board):
+    return 'level' if board == 'all' else 'user__points__level'
+
+
+def _rows(board, queryset):
+    return queryset.values_list('user_id', 'score', _level_field(board), *PROFILE_FIELDS)
+
+
+def _ranked(rows, first_rank=1, position=0):
+    """
+    Entries for consecutive rows in board order. `first_rank` is the rank
+    of the first row and `position` its 0-based place on the board.
+    """
+    entries = []
+    for offset, (user_id, score, *rest) in enumerate(rows):
+        if not entries:
+            rank = first_rank
+        elif score == entries[-1]['points']:
+            rank = entries[-1]['rank']
+        else:
+            rank = position + offset + 1
+        entries.append(_entry(rank, user_id, score, *rest))
+    return entries
+
+
+def _query_top(board, since, limit):
+    standings = _standings(board, since).order_by('-score', 'user_id')
+    return _ranked(_rows(board, standings)[:limit])
+
+
+def build(board):
+    """Rebuild a board's top entries (one query) and store them in the shared cache."""
+    since = window_start(board)
+    entries = _query_top(board, since, TOP_SIZE)
+    cache = shared_cache()
+    if cache is not None:
+        cache.set(
+            _cache_key(board), {'since': since, 'entries': entries}, timeout=SNAPSHOT_TIMEOUT,
+        )
+    return entries
+
+
+def invalidate():
+    """Discard every board, e.g. after balances were rewritten in bulk."""
+    cache = shared_cache()
+    if cache is not None:
+        cache.delete_many([_cache_key(board) for board in BOARDS])
+
+
+def top(board='all', limit=TOP_SIZE):
+    """Top `limit` entries as dicts with rank, user_id, points, level, username and avatar_url."""
+    cache = shared_cache()
+    if cache is None or limit > TOP_SIZE:
+        return _query_top(board, window_start(board), limit)
+    snapshot = cache.get(_cache_key(board))
+    if snapshot is None or snapshot['since'] != window_start(board):
+        return build(board)[:limit]
+    return snapshot['entries'][:limit]
+
+
+def around(board, user_id, window=5):
+    """The user's entry with up to `window` neighbours on each side ([] if unranked)."""
+    standings = _standings(board, window_start(board))
+    me = list(_rows(board, standings.filter(user_id=user_id)))
+    if not me:
+        return []
+    score = me[0][1]
+    before = Q(score__gt=score) | Q(score=score, user_id__lt=user_id)
+    after = Q(score__lt=score) | Q(score=score, user_id__gt=user_id)
+    above = list(_rows(board, standings.filter(before).order_by('score', '-user_id'))[:window])
+    below = list(_rows(board, standings.filter(after).order_by('-score', 'user_id'))[:window])
+    rows = above[::-1] + me + below
+
+    # Place of the first row on the board, and the rank it shares with
+    # everyone on its score
+    position = standings.filter(before).count() - len(above)
+    first_score = rows[0][1]
+    first_rank = standings.filter(score__gt=first_score).count() + 1
+    return _ranked(rows, first_rank, position)
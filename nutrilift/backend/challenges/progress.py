@@ -0,0 +1,241 @@
+"""
+Event-driven challenge progress from workout and nutrition logs.
+
+Each log save reads the user's active, incomplete participations with one
+indexed query (participant id, challenge id, type, unit). They are not
+cached: a per-worker copy would miss joins and leaves made on other
+workers and drop their progress.
+
+Progress is unit-aware:
+    kcal  — calories burned (workouts) or eaten (nutrition)
+    reps  — sets x reps of the workout's exercises
+    days  — not counted here; DailyLogCompleteView adds a day per completed log
+
+The increments for all matching participations are applied with one
+UPDATE ... SET progress = progress + CASE ... WHERE id IN (...), and a
+single read-back moves them on the cached leaderboards and finds participants
+who just reached their goal. Completions are written with update() and
+bulk_update(), which send no post_save, so their points are awarded here
+via reward_signals.award_challenge_completions().
+"""
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.utils import timezone
+
+from . import achievements, leaderboard, reward_signals, social_stats
+
+WORKOUT_TYPES = ('workout', 'mixed')
+NUTRITION_TYPES = ('nutrition', 'mixed')
+
+
+def active_participations(user_id):
+    """
+    [(participant_id, challenge_id, challenge_type, unit)] for the user's
+    incomplete participations in active, unexpired challenges.
+    """
+    from .models import ChallengeParticipant
+
+    return list(
+        ChallengeParticipant.objects.filter(
+            user_id=user_id,
+            completed=False,
+            challenge__is_active=True,
+            challenge__end_date__gt=timezone.now(),
+        ).values_list('pk', 'challenge_id', 'challenge__challenge_type', 'challenge__unit')
+    )
+
+
+def _workout_reps(workout_log):
+    from workouts.models import WorkoutExercise
+
+    total = WorkoutExercise.objects.filter(workout_log=workout_log).aggregate(
+        reps=Sum(F('sets') * F('reps'))
+    )['reps']
+    return total or 0
+
+
+def apply(user_id, challenge_types, amounts):
+    """
+    Add activity to the user's matching participations. `amounts` maps a
+    unit to a zero-argument callable returning the increment, evaluated
+    only if the user is in a challenge with that unit.
+    Returns the number of participations that just reached their goal.
+    """
+    from .models import ChallengeParticipant
+
+    matching = [row for row in active_participations(user_id) if row[2] in challenge_types]
+    if not matching:
+        return 0
+
+    whens = []
+    touched = []
+    for unit in {row[3] for row in matching}:
+        amount = amounts.get(unit)
+        value = float(amount() or 0) if amount else 0.0
+        if value:
+            ids = [row[0] for row in matching if row[3] == unit]
+            whens.append(When(pk__in=ids, then=Value(value)))
+            touched.extend(ids)
+    if not touched:
+        return 0
+
+    ChallengeParticipant.objects.filter(pk__in=touched, completed=False).update(
+        progress=F('progress') + Case(*whens, default=Value(0.0), output_field=FloatField())
+    )
+
+    newly_completed = []
+    rows = ChallengeParticipant.objects.filter(pk__in=touched).values_list(
+        'pk', 'challenge_id', 'progress', 'challenge__goal_value', 'completed'
+    )
+    for pk, challenge_id, progress, goal_value, completed in rows:
+        leaderboard.update(challenge_id, user_id, progress)
+        if not completed and progress >= goal_value:
+            newly_completed.append(pk)
+
+    if not newly_completed:
+        return 0
+    completed = ChallengeParticipant.objects.filter(
+        pk__in=newly_completed, completed=False
+    ).update(completed=True, completed_at=timezone.now())
+    reward_signals.award_challenge_completions(newly_completed)
+    social_stats.adjust(user_id, challenges_completed=completed)
+    achievements.record(user_id, 'challenge_complete', completed)
+    return completed
+
+
+def apply_workout(workout_log):
+    """Count a saved WorkoutLog towards workout and mixed challenges."""
+    return apply(workout_log.user_id, WORKOUT_TYPES, {
+        'kcal': lambda: workout_log.calories_burned,
+        'reps': lambda: _workout_reps(workout_log),
+    })
+
+
+def apply_intake(intake_log):
+    """Count a saved IntakeLog towards nutrition and mixed challenges."""
+    return apply(intake_log.user_id, NUTRITION_TYPES, {
+        'kcal': lambda: intake_log.calories,
+    })
+
+
+def _sum_subquery(queryset, expression):
+    """Correlated scalar subquery: SUM(expression) over `queryset` (0 when empty)."""
+    from django.db.models import OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+
+    return Coalesce(
+        Subquery(
+            queryset.filter(user=OuterRef('user'))
+            .order_by()
+            .values('user')
+            .annotate(total=Sum(expression))
+            .values('total')[:1],
+            output_field=FloatField(),
+        ),
+        Value(0.0),
+    )
+
+
+def recalculate(user_ids, dry_run=False):
+    """
+    Recompute progress from source logs for the given users' participations
+    in active challenges, with one query for all of them: correlated SUM
+    subqueries over each participation's [joined_at, end_date) window.
+
+    Progress = activity in the challenge's unit (as apply() counts it) plus
+    completed daily logs (as DailyLogCompleteView counts them). Changed rows
+    are written with bulk_update and newly reached goals are marked
+    completed (and awarded their points); completion is never revoked.
+    Cached leaderboards are left to the caller, which may be a worker
+    process whose caches nobody reads: invalidate the returned challenges.
+    Returns [(participant_id, challenge_id, user_id, old, new)] for changed rows.
+    """
+    from collections import Counter
+
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+    from nutrition.models import IntakeLog
+    from workouts.models import WorkoutExercise, WorkoutLog
+
+    from .models import ChallengeDailyLog, ChallengeParticipant
+
+    in_window = dict(
+        logged_at__gte=OuterRef('joined_at'), logged_at__lt=OuterRef('challenge__end_date'),
+    )
+    workouts = WorkoutLog.objects.filter(is_deleted=False, **in_window)
+    intakes = IntakeLog.objects.filter(**in_window)
+    exercises = WorkoutExercise.objects.filter(
+        workout_log__is_deleted=False,
+        workout_log__logged_at__gte=OuterRef('joined_at'),
+        workout_log__logged_at__lt=OuterRef('challenge__end_date'),
+    )
+    completed_days = Coalesce(
+        Subquery(
+            ChallengeDailyLog.objects.filter(participant=OuterRef('pk'), is_complete=True)
+            .order_by()
+            .values('participant')
+            .annotate(days=Count('pk'))
+            .values('days')[:1]
+        ),
+        0,
+    )
+
+    participants = (
+        ChallengeParticipant.objects
+        .filter(user_id__in=user_ids, challenge__is_active=True, challenge__end_date__gt=timezone.now())
+        .select_related('challenge')
+        .annotate(
+            workout_kcal=_sum_subquery(workouts, 'calories_burned'),
+            intake_kcal=_sum_subquery(intakes, 'calories'),
+            workout_reps=Coalesce(
+                Subquery(
+                    exercises.filter(workout_log__user=OuterRef('user'))
+                    .order_by()
+                    .values('workout_log__user')
+                    .annotate(total=Sum(F('sets') * F('reps')))
+                    .values('total')[:1]
+                ),
+                0,
+            ),
+            completed_days=completed_days,
+        )
+    )
+
+    now = timezone.now()
+    changed = []
+    diffs = []
+    newly_completed = Counter()
+    completed_ids = []
+    for participant in participants:
+        challenge = participant.challenge
+        counts_workouts = challenge.challenge_type in WORKOUT_TYPES
+        counts_intakes = challenge.challenge_type in NUTRITION_TYPES
+        activity = 0.0
+        if challenge.unit == 'kcal':
+            activity = (
+                (participant.workout_kcal if counts_workouts else 0.0)
+                + (participant.intake_kcal if counts_intakes else 0.0)
+            )
+        elif challenge.unit == 'reps' and counts_workouts:
+            activity = float(participant.workout_reps)
+        new = round(activity + participant.completed_days, 2)
+        old = participant.progress
+        if abs(new - old) < 0.005:
+            continue
+        diffs.append((participant.pk, challenge.pk, participant.user_id, old, new))
+        participant.progress = new
+        if not participant.completed and new >= challenge.goal_value:
+            participant.completed = True
+            participant.completed_at = now
+            newly_completed[participant.user_id] += 1
+            completed_ids.append(participant.pk)
+        changed.append(participant)
+
+    if changed and not dry_run:
+        ChallengeParticipant.objects.bulk_update(
+            changed, ['progress', 'completed', 'completed_at'], batch_size=500
+        )
+        reward_signals.award_challenge_completions(completed_ids)
+        for user_id, count in newly_completed.items():
+            social_stats.adjust(user_id, challenges_completed=count)
+            achievements.record(user_id, 'challenge_complete', count)
+    return diffs
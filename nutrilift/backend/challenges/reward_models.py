@@ -22,6 +22,9 @@ class UserPoints(models.Model):
     class Meta:
         db_table = 'user_points'
         ordering = ['-total_points']
+        indexes = [
+            models.Index(fields=['-total_points']),  # leaderboard rebuild
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.total_points} points (Level {self.level})"
@@ -3,123 +3,12 @@ Signal handlers for automatic point and achievement rewards.
 Phase 3 - Reward System
 """
 import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-logger = logging.getLogger(__name__)
-
+from . import achievements, points
 
-def _award_points(user, points, source, description, reference_id=None):
-    """Award points to a user and create transaction record"""
-    from .reward_models import UserPoints, PointTransaction
-    
-    user_points, created = UserPoints.objects.get_or_create(
-        user=user,
-        defaults={'total_points': 0, 'lifetime_points': 0, 'points_spent': 0, 'level': 1}
-    )
-    
-    user_points.total_points += points
-    user_points.lifetime_points += points
-    
-    # Level up every 1000 points
-    new_level = (user_points.lifetime_points // 1000) + 1
-    if new_level > user_points.level:
-        user_points.level = new_level
-    
-    user_points.save()
-    
-    # Create transaction record
-    PointTransaction.objects.create(
-        user=user,
-        transaction_type='EARN',
-        source=source,
-        points=points,
-        description=description,
-        reference_id=reference_id
-    )
-    
-    logger.info(f"Awarded {points} points to {user.email} for {source}")
-
-
-def _check_achievements(user):
-    """Check and unlock achievements for user"""
-    from .reward_models import Achievement, UserAchievement
-    from .models import ChallengeParticipant, Streak
-    from workouts.models import WorkoutLog
-    from nutrition.models import IntakeLog
-    
-    # Get user stats
-    total_workouts = WorkoutLog.objects.filter(user=user, is_deleted=False).count()
-    total_nutrition_logs = IntakeLog.objects.filter(user=user).count()
-    completed_challenges = ChallengeParticipant.objects.filter(user=user, completed=True).count()
-    
-    try:
-        current_streak = Streak.objects.get(user=user).current_streak
-    except Streak.DoesNotExist:
-        current_streak = 0
-    
-    # Check workout achievements
-    workout_milestones = [
-        (10, 'First 10 Workouts'),
-        (50, '50 Workouts Strong'),
-        (100, 'Century Club'),
-        (500, 'Workout Warrior'),
-    ]
-    
-    for milestone, name in workout_milestones:
-        if total_workouts >= milestone:
-            achievement = Achievement.objects.filter(
-                name=name,
-                category='WORKOUT',
-                is_active=True
-            ).first()
-            
-            if achievement:
-                user_achievement, created = UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement,
-                    defaults={'is_completed': True, 'progress': milestone}
-                )
-                
-                if created:
-                    _award_points(
-                        user,
-                        achievement.points_reward,
-                        'CHALLENGE',
-                        f'Achievement unlocked: {name}',
-                        str(achievement.id)
-                    )
-    
-    # Check streak achievements
-    streak_milestones = [
-        (7, '7 Day Streak'),
-        (30, '30 Day Streak'),
-        (100, '100 Day Streak'),
-    ]
-    
-    for milestone, name in streak_milestones:
-        if current_streak >= milestone:
-            achievement = Achievement.objects.filter(
-                name=name,
-                category='STREAK',
-                is_active=True
-            ).first()
-            
-            if achievement:
-                user_achievement, created = UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement,
-                    defaults={'is_completed': True, 'progress': milestone}
-                )
-                
-                if created:
-                    _award_points(
-                        user,
-                        achievement.points_reward,
-                        'STREAK',
-                        f'Achievement unlocked: {name}',
-                        str(achievement.id)
-                    )
+logger = logging.getLogger(__name__)
 
 
 def handle_workout_completed(sender, instance, created, **kwargs):
@@ -136,15 +25,15 @@ def handle_workout_completed(sender, instance, created, **kwargs):
         
         total_points = base_points + duration_bonus
         
-        _award_points(
-            user=instance.user,
+        points.award(
+            instance.user_id,
             points=total_points,
             source='WORKOUT',
             description=f'Completed workout: {instance.workout_name}',
             reference_id=str(instance.id)
         )
         
-        _check_achievements(instance.user)
+        achievements.record(instance.user_id, 'workout_count')
     except Exception:
         logger.error(
             "Error in handle_workout_completed for WorkoutLog pk=%s",
@@ -160,15 +49,15 @@ def handle_nutrition_logged(sender, instance, created, **kwargs):
     
     try:
         # Award 5 points for logging nutrition
-        _award_points(
-            user=instance.user,
+        points.award(
+            instance.user_id,
             points=5,
             source='NUTRITION',
             description='Logged nutrition entry',
             reference_id=str(instance.id)
         )
         
-        _check_achievements(instance.user)
+        achievements.record(instance.user_id, 'nutrition_count')
     except Exception:
         logger.error(
             "Error in handle_nutrition_logged for IntakeLog pk=%s",
@@ -177,29 +66,37 @@ def handle_nutrition_logged(sender, instance, created, **kwargs):
         )
 
 
+CHALLENGE_COMPLETION_POINTS = 100
+OFFICIAL_CHALLENGE_BONUS = 50
+
+
+def _completion_award(user_id, challenge_id, name, is_official):
+    return points.Award(
+        user_id,
+        CHALLENGE_COMPLETION_POINTS + (OFFICIAL_CHALLENGE_BONUS if is_official else 0),
+        'CHALLENGE',
+        f'Completed challenge: {name}',
+        str(challenge_id),
+    )
+
+
 def handle_challenge_completed(sender, instance, **kwargs):
     """Award points when challenge is completed"""
     if not instance.completed:
         return
     
     try:
-        # Award points based on challenge difficulty
+        from .reward_models import PointTransaction
+
         challenge = instance.challenge
-        base_points = 100
-        
-        # Bonus for official challenges
-        if challenge.is_official:
-            base_points += 50
-        
-        _award_points(
-            user=instance.user,
-            points=base_points,
-            source='CHALLENGE',
-            description=f'Completed challenge: {challenge.name}',
-            reference_id=str(challenge.id)
-        )
-        
-        _check_achievements(instance.user)
+        # The participant is saved again after completing; award only once
+        if PointTransaction.objects.filter(
+            user_id=instance.user_id, source='CHALLENGE', reference_id=str(challenge.id),
+        ).exists():
+            return
+        points.award_many([_completion_award(
+            instance.user_id, challenge.id, challenge.name, challenge.is_official,
+        )])
     except Exception:
         logger.error(
             "Error in handle_challenge_completed for ChallengeParticipant pk=%s",
@@ -208,6 +105,33 @@ def handle_challenge_completed(sender, instance, **kwargs):
         )
 
 
+def award_challenge_completions(participant_ids):
+    """
+    Award completion points to participants marked completed by a queryset
+    update() or bulk_update(), which send no post_save. Participants already
+    paid for their challenge are skipped. Two queries plus one award_many().
+    """
+    from .models import ChallengeParticipant
+    from .reward_models import PointTransaction
+
+    rows = list(
+        ChallengeParticipant.objects.filter(pk__in=participant_ids, completed=True)
+        .values_list('user_id', 'challenge_id', 'challenge__name', 'challenge__is_official')
+    )
+    if not rows:
+        return
+    paid = set(
+        PointTransaction.objects.filter(
+            source='CHALLENGE',
+            user_id__in={row[0] for row in rows},
+            reference_id__in={str(row[1]) for row in rows},
+        ).values_list('user_id', 'reference_id')
+    )
+    points.award_many([
+        _completion_award(*row) for row in rows if (row[0], str(row[1])) not in paid
+    ])
+
+
 def connect_reward_signals():
     """Connect reward signal handlers"""
     from django.apps import apps
@@ -215,7 +139,10 @@ def connect_reward_signals():
     WorkoutLog = apps.get_model('workouts', 'WorkoutLog')
     IntakeLog = apps.get_model('nutrition', 'IntakeLog')
     ChallengeParticipant = apps.get_model('challenges', 'ChallengeParticipant')
+    Achievement = apps.get_model('challenges', 'Achievement')
     
     post_save.connect(handle_workout_completed, sender=WorkoutLog)
     post_save.connect(handle_nutrition_logged, sender=IntakeLog)
     post_save.connect(handle_challenge_completed, sender=ChallengeParticipant)
+    post_save.connect(achievements.invalidate_rules, sender=Achievement)
+    post_delete.connect(achievements.invalidate_rules, sender=Achievement)
@@ -6,6 +6,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import CursorPagination
 from .reward_models import UserPoints, PointTransaction, Achievement, UserAchievement
 from rest_framework import serializers
 
@@ -57,20 +58,52 @@ class UserPointsView(APIView):
             })
 
 
+class TransactionPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-created_at'
+
+
 class PointTransactionHistoryView(APIView):
     """
     GET /api/rewards/transactions/
-    Returns user's point transaction history
+    Returns user's point transaction history, newest first.
+    Cursor-paginated (page_size=50) over the (user, -created_at) index;
+    follow the `next` link to page.
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        transactions = PointTransaction.objects.filter(
-            user=request.user
-        ).order_by('-created_at')[:50]
-        
-        serializer = PointTransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        paginator = TransactionPagination()
+        page = paginator.paginate_queryset(
+            PointTransaction.objects.filter(user=request.user), request
+        )
+        serializer = PointTransactionSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class PointTransactionSummaryView(APIView):
+    """
+    GET /api/rewards/transactions/summary/?granularity=month
+    Returns the user's earned/spent points per period (month or week, newest
+    first), each broken down by source. Cached until the next transaction.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        from . import points
+
+        granularity = request.query_params.get('granularity', 'month')
+        if granularity not in points.SUMMARY_GRANULARITIES:
+            return Response(
+                {'detail': 'granularity must be "month" or "week".'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            'granularity': granularity,
+            'periods': points.summary(request.user.pk, granularity),
+        })
 
 
 class AchievementListView(APIView):
@@ -105,22 +138,41 @@ class UserAchievementsView(APIView):
 class LeaderboardPointsView(APIView):
     """
     GET /api/rewards/leaderboard/
-    Returns top 100 users by points
+    Returns the top 100 users by points, cached in the shared cache when
+    there is one (see challenges.points_leaderboard).
+
+    Query params:
+        period  all (default), week or month — points earned this week/month
+        around  "me": the requesting user's entry and 5 neighbours each side
+                instead of the top 100 (empty if the user has no points)
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        top_users = UserPoints.objects.select_related('user').order_by('-total_points')[:100]
-        
-        data = []
-        for rank, user_points in enumerate(top_users, start=1):
-            data.append({
-                'rank': rank,
-                'user_id': user_points.user.id,
-                'username': getattr(user_points.user, 'name', None) or user_points.user.email,
-                'avatar_url': getattr(user_points.user, 'avatar_url', None),
-                'total_points': user_points.total_points,
-                'level': user_points.level,
-            })
-        
-        return Response(data)
+        from . import points_leaderboard
+
+        period = request.query_params.get('period', 'all')
+        if period not in points_leaderboard.BOARDS:
+            return Response(
+                {'detail': f'period must be one of: {", ".join(points_leaderboard.BOARDS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        around = request.query_params.get('around')
+        if around is not None and around != 'me':
+            return Response({'detail': 'around only supports "me".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if around:
+            entries = points_leaderboard.around(period, request.user.pk)
+        else:
+            entries = points_leaderboard.top(period, limit=100)
+        return Response([
+            {
+                'rank': entry['rank'],
+                'user_id': entry['user_id'],
+                'username': entry['username'],
+                'avatar_url': entry['avatar_url'],
+                'total_points': entry['points'],
+                'level': entry['level'],
+            }
+            for entry in entries
+        ])
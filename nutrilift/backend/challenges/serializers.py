@@ -1,10 +1,40 @@
+from django.db.models import Count, Exists, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 from .models import (
     Challenge, ChallengeParticipant, Badge, UserBadge, Streak,
-    Post, Comment, Like, Report, Follow, ChallengeDailyLog,
+    Post, Comment, Like, Report, Follow, ChallengeDailyLog, EsewaPayment,
 )
 
 
+def annotate_challenges(queryset, user):
+    """
+    Attach everything ChallengeSerializer needs to a Challenge queryset so a
+    list renders in a single query instead of ~5 per row.
+    participant_count is always annotated; is_joined, participant_progress
+    and has_paid only for an authenticated user (anonymous users get the
+    serializer's constant fallbacks).
+    """
+    queryset = queryset.select_related('created_by').annotate(
+        participant_count=Count('participants', distinct=True),
+    )
+    if user is None or not user.is_authenticated:
+        return queryset
+    membership = ChallengeParticipant.objects.filter(challenge=OuterRef('pk'), user=user)
+    payments = EsewaPayment.objects.filter(
+        challenge=OuterRef('pk'), user=user, status='COMPLETED'
+    )
+    return queryset.annotate(
+        is_joined=Exists(membership),
+        participant_progress=Coalesce(
+            Subquery(membership.values('progress')[:1]),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+        has_paid=Exists(payments),
+    )
+
+
 class ChallengeSerializer(serializers.ModelSerializer):
     participant_progress = serializers.SerializerMethodField()
     created_by_username = serializers.SerializerMethodField()
@@ -24,14 +54,20 @@ class ChallengeSerializer(serializers.ModelSerializer):
             'participant_count',
         ]
 
+    # Each getter prefers the value annotated by annotate_challenges() and only
+    # falls back to a per-object query for single challenges (create/update).
+
     def get_participant_count(self, obj):
+        if hasattr(obj, 'participant_count'):
+            return obj.participant_count
         return obj.participants.count()
 
     def get_has_paid(self, obj):
         request = self.context.get('request')
         if not obj.is_paid or request is None or not request.user.is_authenticated:
             return True  # free challenge, no payment needed
-        from .models import EsewaPayment
+        if hasattr(obj, 'has_paid'):
+            return obj.has_paid
         return EsewaPayment.objects.filter(
             user=request.user, challenge=obj, status='COMPLETED'
         ).exists()
@@ -40,6 +76,8 @@ class ChallengeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request is None or not request.user.is_authenticated:
             return 0
+        if hasattr(obj, 'participant_progress'):
+            return obj.participant_progress
         try:
             participant = ChallengeParticipant.objects.get(
                 challenge=obj, user=request.user
@@ -52,6 +90,8 @@ class ChallengeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request is None or not request.user.is_authenticated:
             return False
+        if hasattr(obj, 'is_joined'):
+            return obj.is_joined
         return ChallengeParticipant.objects.filter(
             challenge=obj, user=request.user
         ).exists()
@@ -63,9 +103,9 @@ class ChallengeSerializer(serializers.ModelSerializer):
         return getattr(user, 'name', None) or user.email
 
     def get_created_by_id(self, obj):
-        if obj.created_by is None:
+        if obj.created_by_id is None:
             return None
-        return str(obj.created_by.pk)
+        return str(obj.created_by_id)
 
 
 class ChallengeParticipantSerializer(serializers.ModelSerializer):
@@ -107,6 +147,10 @@ class LeaderboardSerializer(serializers.ModelSerializer):
         return getattr(obj.user, 'avatar_url', None)
 
     def get_current_streak(self, obj):
+        # Views pass {'streaks': {user_id: current_streak}} loaded in one query
+        streaks = self.context.get('streaks')
+        if streaks is not None:
+            return streaks.get(obj.user_id, 0)
         try:
             streak = Streak.objects.get(user=obj.user)
             return streak.current_streak
@@ -158,6 +202,8 @@ class PostSerializer(serializers.ModelSerializer):
     username = serializers.SerializerMethodField()
     avatar_url = serializers.SerializerMethodField()
     is_liked_by_me = serializers.SerializerMethodField()
+    like_count = serializers.SerializerMethodField()
+    comment_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -178,10 +224,25 @@ class PostSerializer(serializers.ModelSerializer):
     def get_avatar_url(self, obj):
         return getattr(obj.user, 'avatar_url', None)
 
+    def _counter(self, obj, field):
+        # List views pass un-compacted shard sums for hot posts (see challenges.counters)
+        pending = self.context.get('counter_deltas', {}).get(obj.pk, {})
+        return max(0, getattr(obj, field) + (pending.get(field) or 0))
+
+    def get_like_count(self, obj):
+        return self._counter(obj, 'like_count')
+
+    def get_comment_count(self, obj):
+        return self._counter(obj, 'comment_count')
+
     def get_is_liked_by_me(self, obj):
         request = self.context.get('request')
         if request is None or not request.user.is_authenticated:
             return False
+        # List views pass the page's liked post ids, fetched with one IN query
+        liked_post_ids = self.context.get('liked_post_ids')
+        if liked_post_ids is not None:
+            return obj.pk in liked_post_ids
         return Like.objects.filter(post=obj, user=request.user).exists()
 
 
@@ -1,75 +1,11 @@
 import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 
-def _update_streak(user):
-    """Update or create the user's unified Streak record based on today's activity.
-    Uses local server date via timezone.localtime() to avoid UTC boundary bugs.
-    """
-    from challenges.models import Streak
-
-    today = timezone.localtime(timezone.now()).date()
-    yesterday = today - timezone.timedelta(days=1)
-
-    streak, created = Streak.objects.get_or_create(
-        user=user,
-        defaults={
-            'current_streak': 1,
-            'longest_streak': 1,
-            'last_active_date': today,
-        }
-    )
-
-    if not created:
-        if streak.last_active_date == today:
-            return
-        elif streak.last_active_date == yesterday:
-            streak.current_streak += 1
-        else:
-            streak.current_streak = 1
-
-        if streak.current_streak > streak.longest_streak:
-            streak.longest_streak = streak.current_streak
-
-        streak.last_active_date = today
-        streak.save(update_fields=['current_streak', 'longest_streak', 'last_active_date'])
-
-
-def _update_feature_streak(model_class, user):
-    """Generic helper to update a feature-specific streak (workout or nutrition).
-    Uses local server date via timezone.localtime() to avoid UTC boundary bugs.
-    """
-    today = timezone.localtime(timezone.now()).date()
-    yesterday = today - timezone.timedelta(days=1)
-
-    streak, created = model_class.objects.get_or_create(
-        user=user,
-        defaults={
-            'current_streak': 1,
-            'longest_streak': 1,
-            'last_active_date': today,
-        }
-    )
-
-    if not created:
-        if streak.last_active_date == today:
-            return
-        elif streak.last_active_date == yesterday:
-            streak.current_streak += 1
-        else:
-            streak.current_streak = 1
-
-        if streak.current_streak > streak.longest_streak:
-            streak.longest_streak = streak.current_streak
-
-        streak.last_active_date = today
-        streak.save(update_fields=['current_streak', 'longest_streak', 'last_active_date'])
-
-
 def _award_badges(user):
     """Award any active challenge_complete badges not yet earned by the user.
     Sends an in-app notification for each newly awarded badge.
@@ -97,49 +33,18 @@ def _award_badges(user):
                 )
 
 
-def _update_challenge_progress(user, calories, challenge_types):
-    """
-    Increment progress for all active ChallengeParticipant records matching
-    the given challenge_types, check completion, and award badges.
-    """
-    from challenges.models import ChallengeParticipant
-
-    now = timezone.now()
-
-    participants = ChallengeParticipant.objects.select_related('challenge').filter(
-        user=user,
-        challenge__challenge_type__in=challenge_types,
-        challenge__is_active=True,
-        challenge__end_date__gt=now,
-        completed=False,
-    )
-
-    for participant in participants:
-        participant.progress = float(participant.progress) + float(calories)
-
-        if participant.progress >= participant.challenge.goal_value:
-            participant.completed = True
-            participant.completed_at = now
-            participant.save(update_fields=['progress', 'completed', 'completed_at'])
-            _award_badges(user)
-        else:
-            participant.save(update_fields=['progress'])
-
-
 def handle_workout_log_saved(sender, instance, **kwargs):
     """
     post_save handler for workouts.WorkoutLog.
     Updates workout streak, unified streak, challenge progress, and awards badges.
     """
     try:
-        from challenges.models import WorkoutStreak
-        _update_challenge_progress(
-            user=instance.user,
-            calories=instance.calories_burned,
-            challenge_types=['workout', 'mixed'],
-        )
-        _update_streak(instance.user)
-        _update_feature_streak(WorkoutStreak, instance.user)
+        from challenges import achievements, progress, streaks
+        if progress.apply_workout(instance):
+            _award_badges(instance.user)
+        moved = streaks.record(instance.user_id, (streaks.OVERALL, streaks.WORKOUT))
+        if moved:
+            achievements.record_streaks(instance.user_id, moved)
     except Exception:
         logger.error(
             "Error in handle_workout_log_saved for WorkoutLog pk=%s",
@@ -154,14 +59,12 @@ def handle_intake_log_saved(sender, instance, **kwargs):
     Updates nutrition streak, unified streak, challenge progress, and awards badges.
     """
     try:
-        from challenges.models import NutritionStreak
-        _update_challenge_progress(
-            user=instance.user,
-            calories=instance.calories,
-            challenge_types=['nutrition', 'mixed'],
-        )
-        _update_streak(instance.user)
-        _update_feature_streak(NutritionStreak, instance.user)
+        from challenges import achievements, progress, streaks
+        if progress.apply_intake(instance):
+            _award_badges(instance.user)
+        moved = streaks.record(instance.user_id, (streaks.OVERALL, streaks.NUTRITION))
+        if moved:
+            achievements.record_streaks(instance.user_id, moved)
     except Exception:
         logger.error(
             "Error in handle_intake_log_saved for IntakeLog pk=%s",
@@ -170,6 +73,81 @@ def handle_intake_log_saved(sender, instance, **kwargs):
         )
 
 
+def handle_participant_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    """Keep the cached leaderboard in step with a participant."""
+    from challenges import leaderboard, social_stats
+    if created:
+        social_stats.adjust(
+            instance.user_id, challenges_joined=1, challenges_completed=int(bool(instance.completed))
+        )
+        leaderboard.invalidate(instance.challenge_id)
+    elif update_fields is None or 'progress' in update_fields:
+        leaderboard.update(instance.challenge_id, instance.user_id, instance.progress)
+
+
+def handle_participant_deleting(sender, instance, **kwargs):
+    """Take a leaving participant's completed days off their social stats (before the logs cascade)."""
+    from challenges import social_stats
+    from challenges.models import ChallengeDailyLog
+    days = ChallengeDailyLog.objects.filter(participant=instance, is_complete=True).count()
+    social_stats.adjust(instance.user_id, completed_days=-days)
+
+
+def handle_participant_deleted(sender, instance, **kwargs):
+    """Drop the cached leaderboard of a challenge a participant left or was removed from."""
+    from challenges import leaderboard, social_stats
+    leaderboard.invalidate(instance.challenge_id)
+    social_stats.adjust(
+        instance.user_id, challenges_joined=-1, challenges_completed=-int(bool(instance.completed))
+    )
+
+
+def handle_post_created(sender, instance, created, **kwargs):
+    """Fan a new post out to its author's and followers' home feeds (in the background)."""
+    if not created:
+        return
+    if not instance.is_removed:
+        from challenges import social_stats
+        social_stats.adjust(instance.user_id, post_count=1)
+    # Up to FANOUT_FOLLOWER_LIMIT inserts: run after commit, off the request thread
+    from challenges.feed import fan_out_post
+    from notifications.dispatch import dispatch
+    dispatch(fan_out_post, instance)
+
+
+def handle_post_deleted(sender, instance, **kwargs):
+    """A deleted (not already removed) post leaves its author's post count."""
+    if not instance.is_removed:
+        from challenges import social_stats
+        social_stats.adjust(instance.user_id, post_count=-1)
+
+
+def handle_follow_created(sender, instance, created, **kwargs):
+    """Backfill the followee's recent posts into the new follower's feed."""
+    if not created:
+        return
+    from challenges import social_stats
+    social_stats.adjust(instance.follower_id, following_count=1)
+    social_stats.adjust(instance.following_id, follower_count=1)
+    try:
+        from challenges.feed import backfill_follow
+        backfill_follow(instance.follower_id, instance.following_id)
+    except Exception:
+        logger.error("Error backfilling feed for Follow pk=%s", instance.pk, exc_info=True)
+
+
+def handle_follow_deleted(sender, instance, **kwargs):
+    """Remove an unfollowed account's posts from the follower's feed."""
+    from challenges import social_stats
+    social_stats.adjust(instance.follower_id, following_count=-1)
+    social_stats.adjust(instance.following_id, follower_count=-1)
+    try:
+        from challenges.feed import remove_follow
+        remove_follow(instance.follower_id, instance.following_id)
+    except Exception:
+        logger.error("Error pruning feed for Follow pk=%s", instance.pk, exc_info=True)
+
+
 def connect_signals():
     """Connect signal handlers to their respective senders."""
     from django.apps import apps
@@ -177,23 +155,30 @@ def connect_signals():
     WorkoutLog = apps.get_model('workouts', 'WorkoutLog')
     IntakeLog = apps.get_model('nutrition', 'IntakeLog')
     Challenge = apps.get_model('challenges', 'Challenge')
+    ChallengeParticipant = apps.get_model('challenges', 'ChallengeParticipant')
+    Post = apps.get_model('challenges', 'Post')
+    Follow = apps.get_model('challenges', 'Follow')
 
     post_save.connect(handle_workout_log_saved, sender=WorkoutLog)
     post_save.connect(handle_intake_log_saved, sender=IntakeLog)
     post_save.connect(handle_challenge_created, sender=Challenge)
     post_save.connect(handle_challenge_updated, sender=Challenge)
+    post_save.connect(handle_participant_saved, sender=ChallengeParticipant)
+    pre_delete.connect(handle_participant_deleting, sender=ChallengeParticipant)
+    post_delete.connect(handle_participant_deleted, sender=ChallengeParticipant)
+    post_save.connect(handle_post_created, sender=Post)
+    post_delete.connect(handle_post_deleted, sender=Post)
+    post_save.connect(handle_follow_created, sender=Follow)
+    post_delete.connect(handle_follow_deleted, sender=Follow)
 
 
 def handle_challenge_created(sender, instance, created, **kwargs):
-    """Notify all users when a new official challenge is created."""
+    """Notify all users when a new official challenge is created (bulk, in the background)."""
     if not created or not instance.is_official:
         return
     try:
-        from django.contrib.auth import get_user_model
-        from notifications.utils import notify_new_challenge
-        User = get_user_model()
-        for user in User.objects.filter(is_active=True):
-            notify_new_challenge(user, instance.name, str(instance.id))
+        from notifications.utils import notify_all_new_challenge
+        notify_all_new_challenge(instance.name, str(instance.id))
     except Exception:
         logger.error("Error in handle_challenge_created", exc_info=True)
 
@@ -0,0 +1,97 @@
+"""
+Denormalized per-user social and challenge counters (UserSocialStats).
+
+Writers call adjust() with the change they just made; the F() update runs
+once the writer's transaction commits (at once in autocommit), so a
+rolled-back write never moves the counters and they never need a COUNT.
+adjust() never creates rows: a user without a row is computed from source on
+the next get() (and the row stored), so a missed hook can only leave a row
+stale, never wrong from the start. reconcile() recomputes rows from source in
+bulk with grouped queries (see the reconcile_social_stats command).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+FIELDS = (
+    'follower_count', 'following_count', 'post_count',
+    'challenges_joined', 'challenges_completed', 'completed_days',
+)
+
+
+def adjust(user_id, **deltas):
+    """
+    Add `deltas` (field -> int) to the user's counters, if the row exists,
+    when the current transaction commits.
+    """
+    from .models import UserSocialStats
+
+    deltas = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(
+            lambda: UserSocialStats.objects.filter(user_id=user_id).update(**deltas)
+        )
+
+
+def compute(user_ids):
+    """{user_id: {field: value}} computed from source tables, 6 grouped queries."""
+    from .models import ChallengeDailyLog, ChallengeParticipant, Follow, Post
+
+    user_ids = list(user_ids)
+    result = {user_id: dict.fromkeys(FIELDS, 0) for user_id in user_ids}
+
+    def fill(field, queryset, key):
+        for user_id, total in queryset.order_by().values_list(key).annotate(n=Count('pk')):
+            result[user_id][field] = total
+
+    fill('follower_count', Follow.objects.filter(following_id__in=user_ids), 'following_id')
+    fill('following_count', Follow.objects.filter(follower_id__in=user_ids), 'follower_id')
+    fill('post_count', Post.objects.filter(user_id__in=user_ids, is_removed=False), 'user_id')
+    fill('challenges_joined', ChallengeParticipant.objects.filter(user_id__in=user_ids), 'user_id')
+    fill(
+        'challenges_completed',
+        ChallengeParticipant.objects.filter(user_id__in=user_ids, completed=True),
+        'user_id',
+    )
+    fill(
+        'completed_days',
+        ChallengeDailyLog.objects.filter(participant__user_id__in=user_ids, is_complete=True),
+        'participant__user_id',
+    )
+    return result
+
+
+def get(user_id):
+    """The user's UserSocialStats, computed and stored on first use."""
+    from .models import UserSocialStats
+
+    stats = UserSocialStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats = UserSocialStats(user_id=user_id, **compute([user_id])[user_id])
+        try:
+            with transaction.atomic():
+                stats.save(force_insert=True)
+        except IntegrityError:
+            stats = UserSocialStats.objects.get(user_id=user_id)
+    return stats
+
+
+def reconcile(user_ids):
+    """
+    Recompute the existing rows for `user_ids` from source and fix any that
+    drifted. Returns the number of rows corrected.
+    """
+    from .models import UserSocialStats
+
+    rows = list(UserSocialStats.objects.filter(user_id__in=user_ids))
+    if not rows:
+        return 0
+    expected = compute([row.user_id for row in rows])
+    drifted = []
+    for row in rows:
+        values = expected[row.user_id]
+        if any(getattr(row, field) != values[field] for field in FIELDS):
+            for field in FIELDS:
+                setattr(row, field, values[field])
+            drifted.append(row)
+    UserSocialStats.objects.bulk_update(drifted, FIELDS, batch_size=500)
+    return len(drifted)
@@ -0,0 +1,112 @@
+"""
+Daily activity streaks (Streak, WorkoutStreak, NutritionStreak).
+
+record() applies the "same day / yesterday / gap" transition for each
+requested kind with one conditional UPDATE:
+
+    current_streak = CASE WHEN last_active_date = yesterday
+                          THEN current_streak + 1 ELSE 1 END
+    longest_streak = GREATEST(longest_streak, <new current_streak>)
+    WHERE user_id = ... AND (last_active_date IS NULL OR last_active_date < today)
+
+so two concurrent logs cannot both increment the streak — the second UPDATE
+matches no row. A user without a row gets one from INSERT ... ON CONFLICT DO
+NOTHING. Once a kind has been counted for today the fact is cached, and
+further logs that day cost no query at all.
+
+expire() and at_risk() are the nightly batch side (send_streak_reminders):
+streaks whose last active day is before yesterday are zeroed in one UPDATE
+per kind, so readers can return the stored current_streak as is.
+
+Dates are local server dates (timezone.localtime) to avoid UTC boundary bugs.
+"""
+from django.core.cache import cache
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+TOUCHED_CACHE_TIMEOUT = 60 * 60 * 24  # seconds; the stored date is compared anyway
+
+OVERALL = 'overall'
+WORKOUT = 'workout'
+NUTRITION = 'nutrition'
+
+
+def streak_models():
+    """{kind: streak model}."""
+    from .models import NutritionStreak, Streak, WorkoutStreak
+    return {OVERALL: Streak, WORKOUT: WorkoutStreak, NUTRITION: NutritionStreak}
+
+
+def _cache_key(kind, user_id):
+    return f'streak_touched_{kind}_{user_id}'
+
+
+def today():
+    return timezone.localtime(timezone.now()).date()
+
+
+def record(user_id, kinds=(OVERALL,), on=None):
+    """
+    Count activity on `on` (default: today) towards the user's streaks of the
+    given kinds: at most one UPDATE (plus one INSERT for a missing row) per
+    kind not yet counted today. Returns the kinds written (streaks that may have moved).
+    """
+    on = on or today()
+    models = streak_models()
+    keys = {kind: _cache_key(kind, user_id) for kind in kinds}
+    cached = cache.get_many(keys.values())
+    pending = [kind for kind in kinds if cached.get(keys[kind]) != on]
+
+    yesterday = on - timezone.timedelta(days=1)
+    next_streak = Case(
+        When(last_active_date=yesterday, then=F('current_streak') + 1),
+        default=Value(1),
+    )
+    for kind in pending:
+        model = models[kind]
+        updated = model.objects.filter(
+            Q(last_active_date__isnull=True) | Q(last_active_date__lt=on),
+            user_id=user_id,
+        ).update(
+            current_streak=next_streak,
+            longest_streak=Greatest(F('longest_streak'), next_streak),
+            last_active_date=on,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            # No row yet, or already counted today (then the insert is a no-op)
+            model.objects.bulk_create(
+                [model(user_id=user_id, current_streak=1, longest_streak=1, last_active_date=on)],
+                ignore_conflicts=True,
+            )
+
+    if pending:
+        cache.set_many({keys[kind]: on for kind in pending}, timeout=TOUCHED_CACHE_TIMEOUT)
+    return pending
+
+
+
+def expire(on=None):
+    """
+    Zero current_streak for every streak of every kind last active before
+    yesterday (relative to `on`, default today). Returns {kind: rows zeroed}.
+    """
+    yesterday = (on or today()) - timezone.timedelta(days=1)
+    return {
+        kind: model.objects.filter(
+            current_streak__gt=0, last_active_date__lt=yesterday,
+        ).update(current_streak=0, updated_at=timezone.now())
+        for kind, model in streak_models().items()
+    }
+
+
+def at_risk(on=None):
+    """
+    Unified streaks that break unless the user is active on `on` (default
+    today): last active yesterday with a streak of at least one day.
+    """
+    from .models import Streak
+
+    yesterday = (on or today()) - timezone.timedelta(days=1)
+    return Streak.objects.filter(last_active_date=yesterday, current_streak__gte=1)
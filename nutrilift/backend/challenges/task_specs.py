@@ -0,0 +1,105 @@
+"""
+Parsing of challenge task labels into structured specifications.
+
+Labels such as "10 Push-ups" or "20g chicken" are parsed with precompiled
+patterns (memoised per label). When a challenge is created or edited,
+structure_tasks() also resolves each exercise/food task against the
+catalogue once and stores the result alongside the label in
+Challenge.default_tasks:
+
+    {'label': '10 Push-ups', 'type': 'exercise', 'exercise_id': 12, 'target_reps': 10}
+    {'label': '20g chicken', 'type': 'food', 'food_item_id': 7, 'target_grams': 20.0}
+
+so daily verification can also match logged rows by id, not only by name.
+A task whose name matches no catalogue row stays unresolved.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db.models.functions import Length
+
+_NUMBER_RE = re.compile(r'(\d+)')
+_EXERCISE_STRIP_RE = re.compile(r'\d+\s*(x|reps?|sets?)?', re.IGNORECASE)
+_GRAMS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(?:g|grams?|gm)')
+_FOOD_STRIP_RE = re.compile(
+    r'\d+(?:\.\d+)?\s*(?:g|grams?|gm|ml|of|serving|servings?)?', re.IGNORECASE
+)
+
+GENERIC_FOOD_KEYWORDS = frozenset(
+    ['log', 'meal', 'food', 'eat', 'intake', 'nutrition', 'diet', 'track']
+)
+
+# Keys structure_tasks() adds to a task; copied into each day's task_items
+SPEC_FIELDS = ('exercise_id', 'target_reps', 'food_item_id', 'target_grams')
+
+ExerciseSpec = namedtuple('ExerciseSpec', 'name target_reps words')
+FoodSpec = namedtuple('FoodSpec', 'name target_grams words is_generic')
+
+
+def _fallback_words(name):
+    return tuple(w for w in name.split() if len(w) > 2)
+
+
+@lru_cache(maxsize=2048)
+def parse_exercise(label):
+    """Spec for an exercise label: "10 Push-ups", "Push-ups 10 reps", "10x Push-up"."""
+    rep_match = _NUMBER_RE.search(label)
+    name = _EXERCISE_STRIP_RE.sub('', label).strip(' -,.').strip()
+    return ExerciseSpec(
+        name=name,
+        target_reps=int(rep_match.group(1)) if rep_match else None,
+        words=_fallback_words(name),
+    )
+
+
+@lru_cache(maxsize=2048)
+def parse_food(label):
+    """Spec for a food label: "20g chicken", "chicken 20g", "20 grams of chicken"."""
+    gram_match = _GRAMS_RE.search(label.lower())
+    name = _FOOD_STRIP_RE.sub('', label).strip(' -,.').strip()
+    words_in_label = name.lower().split()
+    return FoodSpec(
+        name=name,
+        target_grams=float(gram_match.group(1)) if gram_match else None,
+        words=_fallback_words(name),
+        # Instruction labels like "Log your meals today" accept any food
+        is_generic=len(words_in_label) >= 2 and any(w in GENERIC_FOOD_KEYWORDS for w in words_in_label),
+    )
+
+
+def _resolve(queryset, name):
+    """
+    Id of the catalogue row best matching `name`: an exact (case-insensitive)
+    name, else the shortest name containing it, else None.
+    """
+    if not name:
+        return None
+    exact = queryset.filter(name__iexact=name).values_list('pk', flat=True).first()
+    if exact is not None:
+        return exact
+    return (
+        queryset.filter(name__icontains=name)
+        .order_by(Length('name'), 'pk').values_list('pk', flat=True).first()
+    )
+
+
+def structure_task(task):
+    """Return `task` ({'label', 'type'}) with its structured spec fields set."""
+    task = {k: v for k, v in task.items() if k not in SPEC_FIELDS}
+    if task.get('type') == 'exercise':
+        from workouts.models import Exercise
+        spec = parse_exercise(task['label'])
+        task['target_reps'] = spec.target_reps
+        task['exercise_id'] = _resolve(Exercise.objects.all(), spec.name)
+    elif task.get('type') == 'food':
+        spec = parse_food(task['label'])
+        task['target_grams'] = spec.target_grams
+        if not spec.is_generic:
+            from nutrition.models import FoodItem
+            task['food_item_id'] = _resolve(FoodItem.objects.filter(is_custom=False), spec.name)
+    return task
+
+
+def structure_tasks(tasks):
+    return [structure_task(task) for task in tasks]
@@ -0,0 +1,194 @@
+"""
+Verification of a day's structured challenge tasks against the user's
+workout and nutrition logs (DailyLogVerifyView).
+
+Today's WorkoutExercise rows (with exercise names) and IntakeLog rows (with
+food names) are each loaded with one query, only if some task needs them,
+and every task is then matched in memory by name, as before, plus any rows
+with the exercise_id / food_item_id resolved when the challenge was created
+(see challenges.task_specs).
+"""
+from .task_specs import SPEC_FIELDS, parse_exercise, parse_food
+
+
+class _NameMatcher:
+    """
+    Case-insensitive substring matching (the in-memory equivalent of
+    name__icontains) over already-loaded rows, memoised per needle and
+    preserving row order.
+    """
+
+    def __init__(self, rows, name_of, id_of):
+        self.rows = rows
+        self._names = [(name_of(row) or '').lower() for row in rows]
+        self._ids = [id_of(row) for row in rows]
+        self._cache = {}
+
+    def matching(self, needle):
+        needle = needle.lower()
+        if needle not in self._cache:
+            self._cache[needle] = [
+                row for row, name in zip(self.rows, self._names) if needle in name
+            ]
+        return self._cache[needle]
+
+    def match(self, name, fallback_words):
+        """Rows matching the full name, else those matching the first word that matches any."""
+        rows = self.matching(name)
+        if rows:
+            return rows
+        for word in fallback_words:
+            rows = self.matching(word)
+            if rows:
+                return rows
+        return []
+
+    def match_spec(self, item_id, name, fallback_words):
+        """Rows matching by name (see match) or with the resolved `item_id`, in row order."""
+        named = self.match(name, fallback_words)
+        if item_id is None:
+            return named
+        named = {id(row) for row in named}
+        return [
+            row for row, row_id in zip(self.rows, self._ids)
+            if row_id == item_id or id(row) in named
+        ]
+
+
+class _TodayWorkouts:
+    def __init__(self, user, today):
+        from workouts.models import WorkoutExercise, WorkoutLog
+        self._logs = WorkoutLog.objects.filter(user=user, logged_at__date=today, is_deleted=False)
+        rows = list(
+            WorkoutExercise.objects.filter(workout_log__in=self._logs)
+            .select_related('exercise').order_by('order')
+        )
+        self.exercises = _NameMatcher(rows, lambda e: e.exercise.name, lambda e: e.exercise_id)
+        self._any_logged = True if rows else None
+
+    @property
+    def any_logged(self):
+        # A workout with no exercises still counts as "logged"; only ask the
+        # database when no exercise rows came back
+        if self._any_logged is None:
+            self._any_logged = self._logs.exists()
+        return self._any_logged
+
+
+class _TodayIntakes:
+    def __init__(self, user, today):
+        from nutrition.models import IntakeLog
+        rows = list(
+            IntakeLog.objects.filter(user=user, logged_at__date=today).select_related('food_item')
+        )
+        self.foods = _NameMatcher(
+            rows, lambda i: i.food_item.name if i.food_item_id else None, lambda i: i.food_item_id
+        )
+
+
+def _verify_exercise(task, label, workouts):
+    """(verified, message, unmet) for an exercise task."""
+    spec = parse_exercise(label)
+    target_reps = task.get('target_reps', spec.target_reps)
+    if not workouts.any_logged:
+        return False, f'No workout logged today. Task: {label}', f'No workout logged today for: {label}'
+    matches = workouts.exercises.match_spec(task.get('exercise_id'), spec.name, spec.words)
+    if not matches:
+        return False, f'"{spec.name}" not found in today\'s workout log', f'Exercise not logged: {label}'
+    if target_reps is None:
+        # No specific rep target — just presence is enough
+        return True, f'✓ {matches[0].exercise.name} logged today', None
+    total_reps = sum(e.sets * e.reps for e in matches)
+    if total_reps >= target_reps:
+        return True, f'✓ {spec.name}: {total_reps} reps logged (target: {target_reps})', None
+    return (
+        False,
+        f'{spec.name}: only {total_reps} reps logged, need {target_reps}',
+        f'{label}: {total_reps}/{target_reps} reps done',
+    )
+
+
+def _verify_food(task, label, intakes):
+    """(verified, message, unmet) for a food task."""
+    spec = parse_food(label)
+    target_grams = task.get('target_grams', spec.target_grams)
+    rows = intakes.foods.rows
+    if not rows:
+        return False, f'No nutrition logged today. Task: {label}', f'No nutrition logged today for: {label}'
+    if spec.is_generic:
+        count = len(rows)
+        return True, f'✓ {count} food item{"s" if count != 1 else ""} logged today', None
+    matches = intakes.foods.match_spec(task.get('food_item_id'), spec.name, spec.words)
+    if not matches:
+        return False, f'"{spec.name}" not found in today\'s nutrition log', f'Food not logged: {label}'
+    if target_grams is None:
+        return True, f'✓ {matches[0].food_item.name} logged today', None
+    total_qty = sum(float(i.quantity) for i in matches)
+    if total_qty >= target_grams:
+        return True, f'✓ {spec.name}: {total_qty:.0f}g logged (target: {target_grams:.0f}g)', None
+    return (
+        False,
+        f'{spec.name}: only {total_qty:.0f}g logged, need {target_grams:.0f}g',
+        f'{label}: {total_qty:.0f}g/{target_grams:.0f}g logged',
+    )
+
+
+def verify_tasks(user, task_items, today, default_tasks=()):
+    """
+    Verify a daily log's task_items for `user` on `today`.
+    Spec fields missing from a task (logs created before the challenge's
+    tasks were structured) are taken from the matching `default_tasks` entry.
+    Returns (updated task_items with verified/verification_message, unmet list).
+    """
+    specs = {
+        (t.get('label'), t.get('type')): {k: t[k] for k in SPEC_FIELDS if k in t}
+        for t in default_tasks
+    }
+    types = {task.get('type', '') for task in task_items}
+    workouts = intakes = None
+    workouts_error = intakes_error = False
+    if 'exercise' in types:
+        try:
+            workouts = _TodayWorkouts(user, today)
+        except Exception:
+            workouts_error = True
+    if 'food' in types:
+        try:
+            intakes = _TodayIntakes(user, today)
+        except Exception:
+            intakes_error = True
+
+    unmet = []
+    updated_tasks = []
+    for task in task_items:
+        label = task.get('label', '')
+        task_type = task.get('type', '')  # 'exercise', 'food', or 'manual'
+        verified = task.get('verified', False)
+        verification_message = task.get('verification_message', None)
+        spec = {**specs.get((label, task_type), {}), **task}
+
+        if task_type == 'exercise':
+            if workouts_error:
+                # workouts app unavailable — don't block
+                verified, verification_message = True, 'Could not verify (workout data unavailable)'
+            else:
+                verified, verification_message, missing = _verify_exercise(spec, label, workouts)
+                if missing:
+                    unmet.append(missing)
+        elif task_type == 'food':
+            if intakes_error:
+                verified, verification_message = True, 'Could not verify (nutrition data unavailable)'
+            else:
+                verified, verification_message, missing = _verify_food(spec, label, intakes)
+                if missing:
+                    unmet.append(missing)
+        elif not task.get('completed', False):
+            # Manual task — just check the completed flag
+            unmet.append(f'Task not checked off: {label}')
+
+        updated_tasks.append({
+            **task,
+            'verified': verified,
+            'verification_message': verification_message,
+        })
+    return updated_tasks, unmet
@@ -5,7 +5,8 @@ Feature: challenge-community-system
 """
 import uuid
 from decimal import Decimal
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 from django.utils import timezone
@@ -62,6 +63,12 @@ def make_workout_log(user, calories_burned):
         calories_burned=Decimal(str(calories_burned)),
     )
 
+# A LocMemCache standing in for the Redis cache shared by all workers
+SHARED_CACHES = {
+    **settings.CACHES,
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared-test'},
+}
+
 
 # ---------------------------------------------------------------------------
 # 5.1  TC-CG01: WorkoutLog signal increments ChallengeParticipant.progress
@@ -432,3 +439,979 @@ class UniquenessConstraintsPropertyTest(TestCase):
 
         with self.assertRaises(IntegrityError):
             Like.objects.create(post=post, user=user)
+
+
+# ---------------------------------------------------------------------------
+# Active challenge list query budget
+# ---------------------------------------------------------------------------
+
+class ActiveChallengeListQueryCountTest(TestCase):
+    """
+    /api/challenges/active/ issues a constant number of queries regardless of
+    how many challenges are listed, and still reports per-user state.
+    """
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _query_count(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/challenges/active/')
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries), resp.data
+
+    def test_query_count_does_not_grow_with_challenges(self):
+        make_challenge(self.user)
+        baseline, _ = self._query_count()
+
+        for _ in range(5):
+            c = make_challenge(self.user)
+            ChallengeParticipant.objects.create(challenge=c, user=make_user())
+        count, data = self._query_count()
+
+        self.assertEqual(len(data), 6)
+        self.assertEqual(count, baseline)
+
+    def test_annotated_fields_match_user_state(self):
+        joined = make_challenge(self.user)
+        other = make_challenge(self.user)
+        ChallengeParticipant.objects.create(challenge=joined, user=self.user, progress=42.0)
+        ChallengeParticipant.objects.create(challenge=joined, user=make_user())
+
+        _, data = self._query_count()
+        by_id = {str(item['id']): item for item in data}
+
+        self.assertTrue(by_id[str(joined.id)]['is_joined'])
+        self.assertEqual(by_id[str(joined.id)]['participant_progress'], 42.0)
+        self.assertEqual(by_id[str(joined.id)]['participant_count'], 2)
+        self.assertTrue(by_id[str(joined.id)]['has_paid'])
+        self.assertFalse(by_id[str(other.id)]['is_joined'])
+        self.assertEqual(by_id[str(other.id)]['participant_progress'], 0)
+        self.assertEqual(by_id[str(other.id)]['participant_count'], 0)
+
+    def test_auth_admin_list_query_count_does_not_grow(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.user.is_staff = True
+        self.user.save()
+
+        def count():
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get('/api/auth/admin/challenges/')
+            self.assertEqual(resp.status_code, 200)
+            return len(ctx.captured_queries)
+
+        make_challenge(self.user)
+        baseline = count()
+        for _ in range(5):
+            c = make_challenge(self.user)
+            ChallengeParticipant.objects.create(challenge=c, user=make_user())
+        self.assertEqual(count(), baseline)
+
+
+# ---------------------------------------------------------------------------
+# Cached leaderboard snapshot
+# ---------------------------------------------------------------------------
+
+class CachedLeaderboardTest(TestCase):
+    """
+    challenges.leaderboard keeps ranks in step with participant progress
+    changes and removals once a snapshot has been built.
+    """
+
+    def setUp(self):
+        self.challenge = make_challenge(make_user())
+        self.participants = [
+            ChallengeParticipant.objects.create(
+                challenge=self.challenge, user=make_user(), progress=progress,
+            )
+            for progress in (10.0, 30.0, 20.0)
+        ]
+
+    def test_ranks_follow_progress_updates(self):
+        from challenges import leaderboard
+        low, high, mid = self.participants
+
+        self.assertEqual([e['progress'] for e in leaderboard.top(self.challenge.id)], [30.0, 20.0, 10.0])
+        self.assertEqual(leaderboard.rank_of(self.challenge.id, low.user_id), 3)
+
+        low.progress = 25.0
+        low.save(update_fields=['progress'])
+        self.assertEqual(leaderboard.rank_of(self.challenge.id, low.user_id), 2)
+        self.assertEqual(leaderboard.rank_of(self.challenge.id, mid.user_id), 3)
+
+        mid.progress = 30.0
+        mid.save(update_fields=['progress'])
+        # Ties share a rank
+        self.assertEqual(leaderboard.rank_of(self.challenge.id, high.user_id), 1)
+        self.assertEqual(leaderboard.rank_of(self.challenge.id, mid.user_id), 1)
+        self.assertEqual(leaderboard.rank_of(self.challenge.id, low.user_id), 3)
+
+        high.delete()
+        self.assertIsNone(leaderboard.rank_of(self.challenge.id, high.user_id))
+        self.assertEqual(leaderboard.total(self.challenge.id), 2)
+
+    def test_log_saves_move_the_participant_without_a_rebuild(self):
+        from challenges import leaderboard
+        low, high, mid = self.participants
+        leaderboard.top(self.challenge.id)  # cache a snapshot
+
+        make_workout_log(low.user, 35)
+        with self.assertNumQueries(0):
+            entries = leaderboard.top(self.challenge.id)
+        self.assertEqual(
+            [(e['user_id'], e['progress']) for e in entries],
+            [(str(low.user_id), 45.0), (str(high.user_id), 30.0), (str(mid.user_id), 20.0)],
+        )
+        self.assertEqual(leaderboard.total(self.challenge.id), 3)
+
+    def test_around_returns_neighbours(self):
+        from challenges import leaderboard
+        low, high, mid = self.participants
+
+        window = leaderboard.around(self.challenge.id, mid.user_id, window=1)
+        self.assertEqual([e['user_id'] for e in window], [str(high.user_id), str(mid.user_id), str(low.user_id)])
+        self.assertEqual([e['rank'] for e in window], [1, 2, 3])
+        self.assertEqual(leaderboard.around(self.challenge.id, uuid.uuid4()), [])
+
+    def test_prize_rank_is_exact_when_snapshot_is_stale(self):
+        from challenges import leaderboard
+        low, high, mid = self.participants
+        leaderboard.top(self.challenge.id)  # cache a snapshot
+        # A bulk update bypasses signals, so the snapshot now trails the table
+        ChallengeParticipant.objects.filter(pk=low.pk).update(progress=50.0)
+
+        admin = make_user()
+        admin.is_staff = True
+        admin.save()
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        resp = client.post(
+            f'/api/admin/challenges/{self.challenge.id}/award-prize/',
+            {'participant_id': str(low.pk)}, format='json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['rank'], 1)
+
+
+# ---------------------------------------------------------------------------
+# Leaderboard rank windows
+# ---------------------------------------------------------------------------
+
+class LeaderboardRankWindowTest(TestCase):
+    """
+    ?around=me and ?from_rank/&to_rank return the requested slice of the
+    leaderboard with RANK() semantics; the admin leaderboard is paginated.
+    """
+
+    def setUp(self):
+        self.challenge = make_challenge(make_user())
+        self.users = []
+        for progress in range(20, 0, -1):  # ranks 1..20
+            user = make_user()
+            ChallengeParticipant.objects.create(challenge=self.challenge, user=user, progress=progress)
+            self.users.append(user)
+        self.client = APIClient()
+        self.url = f'/api/challenges/{self.challenge.id}/leaderboard/'
+
+    def test_around_me(self):
+        self.client.force_authenticate(user=self.users[14])  # rank 15
+        resp = self.client.get(self.url, {'around': 'me', 'window': 2})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e['rank'] for e in resp.data], [13, 14, 15, 16, 17])
+        self.assertEqual(resp.data[2]['user_id'], str(self.users[14].id))
+
+    def test_around_me_requires_participation(self):
+        self.client.force_authenticate(user=make_user())
+        resp = self.client.get(self.url, {'around': 'me'})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_rank_range(self):
+        self.client.force_authenticate(user=self.users[0])
+        resp = self.client.get(self.url, {'from_rank': 11, 'to_rank': 13})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e['rank'] for e in resp.data], [11, 12, 13])
+        self.assertEqual([e['progress'] for e in resp.data], [10.0, 9.0, 8.0])
+
+        resp = self.client.get(self.url, {'from_rank': 5, 'to_rank': 1})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_admin_leaderboard_is_paginated(self):
+        admin = make_user()
+        admin.is_staff = True
+        admin.save()
+        self.client.force_authenticate(user=admin)
+        resp = self.client.get(
+            f'/api/admin/challenges/{self.challenge.id}/leaderboard/', {'page': 2, 'page_size': 5},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['count'], 20)
+        self.assertEqual([e['rank'] for e in resp.data['leaderboard']], [6, 7, 8, 9, 10])
+
+
+# ---------------------------------------------------------------------------
+# Personalized home feed
+# ---------------------------------------------------------------------------
+
+@override_settings(NOTIFICATION_DISPATCH_ASYNC=False)
+class HomeFeedTest(TestCase):
+    """
+    Followers see followed accounts' posts via fan-out-on-write timelines,
+    celebrity posts are pulled in at read time, and the feed is cursor-paginated
+    over the reader's FeedEntry rows.
+    """
+
+    def setUp(self):
+        from challenges.models import Follow
+        self.reader = make_user()
+        self.friend = make_user()
+        self.stranger = make_user()
+        self.other = make_user()  # makes reader's feed personalized
+        Follow.objects.create(follower=self.reader, following=self.friend)
+        Follow.objects.create(follower=self.reader, following=self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reader)
+
+    def _feed_ids(self, **params):
+        resp = self.client.get('/api/community/feed/', params)
+        self.assertEqual(resp.status_code, 200)
+        return [str(p['id']) for p in resp.data['results']], resp
+
+    def test_feed_contains_followed_and_own_posts_only(self):
+        own = Post.objects.create(user=self.reader, content='mine')
+        friend_post = Post.objects.create(user=self.friend, content='friend')
+        stranger_post = Post.objects.create(user=self.stranger, content='stranger')
+
+        ids, _ = self._feed_ids()
+        self.assertIn(str(own.id), ids)
+        self.assertIn(str(friend_post.id), ids)
+        self.assertNotIn(str(stranger_post.id), ids)
+
+    def test_unfollow_removes_posts(self):
+        friend_post = Post.objects.create(user=self.friend, content='friend')
+        self.client.post(f'/api/community/users/{self.friend.id}/follow/')  # toggle off
+
+        ids, _ = self._feed_ids()
+        self.assertNotIn(str(friend_post.id), ids)
+
+    def test_celebrity_posts_are_merged_on_read(self):
+        from challenges import feed
+        from challenges.models import FeedEntry, Follow
+        from django.core.cache import cache
+
+        Follow.objects.create(follower=self.reader, following=self.stranger)
+        cache.set(feed.CELEBRITY_CACHE_KEY, {self.stranger.id}, timeout=60)
+        try:
+            post = Post.objects.create(user=self.stranger, content='famous')
+            # Only the author's own timeline row is written
+            self.assertEqual(FeedEntry.objects.filter(post=post).count(), 1)
+            ids, _ = self._feed_ids()
+            self.assertIn(str(post.id), ids)
+            # ...and reading the feed pulled it into the reader's timeline
+            self.assertTrue(FeedEntry.objects.filter(post=post, user=self.reader).exists())
+        finally:
+            cache.delete(feed.CELEBRITY_CACHE_KEY)
+
+    def test_cursor_pagination_and_liked_flags(self):
+        posts = [Post.objects.create(user=self.friend, content=f'p{i}') for i in range(5)]
+        Like.objects.create(post=posts[-1], user=self.reader)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            first_ids, resp = self._feed_ids(page_size=3)
+        self.assertEqual(len(first_ids), 3)
+        # The page is read from the timeline itself, not a semi-join over it
+        page_sql = next(q['sql'] for q in ctx.captured_queries if 'ORDER BY' in q['sql'] and 'feedentry' in q['sql'])
+        self.assertTrue(page_sql.startswith('SELECT "challenges_feedentry"'))
+        self.assertNotIn(' IN (SELECT', page_sql)
+        self.assertTrue(resp.data['results'][0]['is_liked_by_me'])
+        self.assertFalse(resp.data['results'][1]['is_liked_by_me'])
+
+        resp = self.client.get(resp.data['next'])
+        second_ids = [str(p['id']) for p in resp.data['results']]
+        self.assertEqual(len(second_ids), 2)
+        self.assertFalse(set(first_ids) & set(second_ids))
+
+
+# ---------------------------------------------------------------------------
+# Sharded like/comment counters
+# ---------------------------------------------------------------------------
+
+class PostCounterTest(TestCase):
+    """
+    Counters change with F() updates; hot posts write to PostCounterShard rows
+    that are added on read and folded back by compact_post_counters.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.owner = make_user()
+        self.post = Post.objects.create(user=self.owner, content='hot take', like_count=5)
+
+    def _like_as_new_user(self):
+        client = APIClient()
+        client.force_authenticate(user=make_user())
+        return client.post(f'/api/community/posts/{self.post.id}/like/')
+
+    def test_cold_post_updates_row_in_place(self):
+        from challenges.models import PostCounterShard
+        resp = self._like_as_new_user()
+        self.assertEqual(resp.data['like_count'], 6)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 6)
+        self.assertFalse(PostCounterShard.objects.exists())
+
+    def test_hot_post_shards_are_summed_and_compacted(self):
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from challenges.models import PostCounterShard
+
+        with mock.patch('challenges.counters.HOT_WRITES_PER_MINUTE', 0):
+            for _ in range(3):
+                resp = self._like_as_new_user()
+            client = APIClient()
+            client.force_authenticate(user=self.owner)
+            client.post(f'/api/community/posts/{self.post.id}/comment/', {'content': 'hi'}, format='json')
+
+        self.assertEqual(resp.data['like_count'], 8)
+        self.assertTrue(PostCounterShard.objects.filter(post=self.post).exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 5)
+
+        feed_resp = client.get(f'/api/community/users/{self.owner.id}/posts/')
+        self.assertEqual(feed_resp.data[0]['like_count'], 8)
+        self.assertEqual(feed_resp.data[0]['comment_count'], 1)
+
+        call_command('compact_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (8, 1))
+        self.assertFalse(PostCounterShard.objects.exists())
+
+
+# ---------------------------------------------------------------------------
+# Daily log task verification
+# ---------------------------------------------------------------------------
+
+class DailyLogVerifyTest(TestCase):
+    """
+    Exercise and food tasks are matched in memory against today's workout
+    and intake rows, loaded with one query each.
+    """
+
+    def setUp(self):
+        from challenges.models import ChallengeDailyLog
+        from nutrition.models import FoodItem, IntakeLog
+        from workouts.models import Exercise, WorkoutExercise, WorkoutLog
+
+        self.user = make_user()
+        self.challenge = make_challenge(self.user)
+        participant = ChallengeParticipant.objects.create(challenge=self.challenge, user=self.user)
+        ChallengeDailyLog.objects.create(participant=participant, day_number=1, task_items=[
+            {'label': '10 Push-ups', 'type': 'exercise'},
+            {'label': 'Squats', 'type': 'exercise'},
+            {'label': '100g chicken', 'type': 'food'},
+            {'label': 'Log your meals today', 'type': 'food'},
+            {'label': 'Stretch', 'type': 'manual', 'completed': False},
+        ])
+
+        workout = WorkoutLog.objects.create(
+            user=self.user, workout_name='Morning', duration_minutes=20, calories_burned=Decimal('50'),
+        )
+        pushups = Exercise.objects.create(name='Push-ups', category='BODYWEIGHT')
+        WorkoutExercise.objects.create(
+            workout_log=workout, exercise=pushups, sets=2, reps=6, weight=Decimal('1'),
+        )
+        chicken = FoodItem.objects.create(
+            name='Chicken Breast', calories_per_100g=165, protein_per_100g=31,
+            carbs_per_100g=0, fats_per_100g=3.6,
+        )
+        IntakeLog.objects.create(
+            user=self.user, food_item=chicken, entry_type='meal', quantity=Decimal('150'),
+            unit='g', calories=Decimal('247'), protein=Decimal('46'), carbs=Decimal('0'), fats=Decimal('5'),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_verifies_tasks_in_constant_queries(self):
+        # participant, log, workout exercises, intakes, save
+        with self.assertNumQueries(5):
+            resp = self.client.get(f'/api/challenges/{self.challenge.id}/daily-log/verify/')
+        self.assertEqual(resp.status_code, 200)
+
+        verified = {t['label']: t['verified'] for t in resp.data['task_items']}
+        self.assertEqual(verified, {
+            '10 Push-ups': True,
+            'Squats': False,
+            '100g chicken': True,
+            'Log your meals today': True,
+            'Stretch': False,
+        })
+        self.assertEqual(resp.data['unmet'], [
+            'Exercise not logged: Squats',
+            'Task not checked off: Stretch',
+        ])
+
+    def test_structured_specs_match_by_id(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from workouts.models import Exercise
+
+        Exercise.objects.create(name='Diamond Push-ups', category='BODYWEIGHT')
+        self.challenge.default_tasks = [{'label': '10 Push-ups', 'type': 'exercise'}]
+        self.challenge.save()
+        call_command('backfill_task_specs', stdout=StringIO())
+
+        self.challenge.refresh_from_db()
+        task = self.challenge.default_tasks[0]
+        self.assertEqual(task['target_reps'], 10)
+        self.assertEqual(task['exercise_id'], Exercise.objects.get(name='Push-ups').pk)
+
+        # The existing log has no spec fields; they come from default_tasks
+        resp = self.client.get(f'/api/challenges/{self.challenge.id}/daily-log/verify/')
+        self.assertTrue(resp.data['task_items'][0]['verified'])
+
+    def test_resolved_tasks_still_count_name_matches(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from workouts.models import Exercise, WorkoutExercise, WorkoutLog
+        from .task_verification import verify_tasks
+
+        diamond = Exercise.objects.create(name='Diamond Push-ups', category='BODYWEIGHT')
+        WorkoutExercise.objects.create(
+            workout_log=WorkoutLog.objects.get(user=self.user), exercise=diamond,
+            sets=3, reps=6, weight=Decimal('1'), order=1,
+        )
+        self.challenge.default_tasks = [
+            {'label': '30 Push-ups', 'type': 'exercise'},
+            {'label': '5 Pike Push-ups', 'type': 'exercise'},
+        ]
+        self.challenge.save()
+        call_command('backfill_task_specs', stdout=StringIO())
+
+        self.challenge.refresh_from_db()
+        pushups, pike = self.challenge.default_tasks
+        self.assertEqual(pushups['exercise_id'], Exercise.objects.get(name='Push-ups').pk)
+        # No catalogue name matches, so it is not bound to some other push-up
+        self.assertIsNone(pike['exercise_id'])
+
+        items, _ = verify_tasks(
+            self.user, self.challenge.default_tasks, timezone.now().date(),
+        )
+        # 12 Push-ups + 18 Diamond Push-ups reps
+        self.assertEqual([t['verified'] for t in items], [True, True])
+
+    def test_backfill_does_not_fire_challenge_updates(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from notifications.models import Notification
+        User.objects.filter(pk=make_user().pk).update(is_staff=True)
+        Challenge.objects.filter(pk=self.challenge.pk).update(
+            is_paid=True, is_official=True, end_date=timezone.now() - timezone.timedelta(days=1),
+            default_tasks=[{'label': '10 Push-ups', 'type': 'exercise'}],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_task_specs', stdout=StringIO())
+        self.assertFalse(Notification.objects.exists())
+
+
+# ---------------------------------------------------------------------------
+# Event-driven challenge progress
+# ---------------------------------------------------------------------------
+
+class ChallengeProgressEngineTest(TestCase):
+    """
+    Log saves apply unit-aware increments to the active participations
+    in one UPDATE and detect completions from a single read-back.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = make_user()
+
+    def _join(self, unit, goal=1000.0):
+        challenge = make_challenge(self.user)
+        Challenge.objects.filter(pk=challenge.pk).update(unit=unit, goal_value=goal)
+        return ChallengeParticipant.objects.create(challenge=challenge, user=self.user)
+
+    def test_increments_by_unit(self):
+        from workouts.models import Exercise, WorkoutExercise
+        kcal = self._join('kcal')
+        reps = self._join('reps')
+        days = self._join('days')
+
+        log = make_workout_log(self.user, 120)
+        WorkoutExercise.objects.create(
+            workout_log=log, sets=3, reps=10, weight=Decimal('5'),
+            exercise=Exercise.objects.create(name='Squat', category='STRENGTH'),
+        )
+        log.calories_burned = Decimal('0')
+        log.save()  # e.g. the serializer's second save once exercises exist
+
+        for participant in (kcal, reps, days):
+            participant.refresh_from_db()
+        self.assertAlmostEqual(kcal.progress, 120.0)
+        self.assertAlmostEqual(reps.progress, 30.0)
+        self.assertAlmostEqual(days.progress, 0.0)
+
+    def test_completion_detected(self):
+        participant = self._join('kcal', goal=100.0)
+        make_workout_log(self.user, 150)
+        participant.refresh_from_db()
+        self.assertTrue(participant.completed)
+        self.assertIsNotNone(participant.completed_at)
+        self._assert_completion_points(participant)
+
+    def _assert_completion_points(self, participant):
+        from challenges.reward_models import PointTransaction
+        awarded = PointTransaction.objects.filter(
+            user=self.user, source='CHALLENGE', reference_id=str(participant.challenge_id),
+        ).values_list('points', flat=True)
+        self.assertEqual(list(awarded), [100])
+
+    def test_daily_log_completion_updates_progress_in_place(self):
+        from challenges.models import ChallengeDailyLog
+        participant = self._join('days', goal=1.0)
+        ChallengeDailyLog.objects.create(participant=participant, day_number=1, task_items=[])
+        # A concurrent writer moved progress after this request loaded the row
+        ChallengeParticipant.objects.filter(pk=participant.pk).update(progress=0.5)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        resp = client.post(f'/api/challenges/{participant.challenge_id}/daily-log/complete/')
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        participant.refresh_from_db()
+        self.assertAlmostEqual(participant.progress, 1.5)
+        self.assertTrue(participant.completed)
+        self._assert_completion_points(participant)
+
+    def test_one_query_for_user_without_challenges(self):
+        from challenges import progress
+        log = make_workout_log(self.user, 50)
+        with self.assertNumQueries(1):
+            self.assertEqual(progress.apply_workout(log), 0)
+
+    def test_join_counts_from_the_next_log(self):
+        make_workout_log(self.user, 10)
+        participant = self._join('kcal')
+        make_workout_log(self.user, 25)
+        participant.refresh_from_db()
+        self.assertAlmostEqual(participant.progress, 25.0)
+
+    def test_recalculate_command_rebuilds_progress(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from challenges import leaderboard
+        participant = self._join('kcal')
+        make_workout_log(self.user, 80)
+        make_workout_log(self.user, 40)
+        ChallengeParticipant.objects.filter(pk=participant.pk).update(progress=5.0)
+        leaderboard.top(participant.challenge_id)  # cache a snapshot
+
+        out = StringIO()
+        call_command('recalculate_challenge_progress', '--dry-run', '--workers', '1', stdout=out)
+        self.assertIn('5 -> 120', out.getvalue())
+        participant.refresh_from_db()
+        self.assertAlmostEqual(participant.progress, 5.0)
+
+        call_command('recalculate_challenge_progress', '--workers', '1', stdout=StringIO())
+        participant.refresh_from_db()
+        self.assertAlmostEqual(participant.progress, 120.0)
+        # Invalidated by the command itself, not by the process that recalculated
+        self.assertEqual(leaderboard.top(participant.challenge_id)[0]['progress'], 120.0)
+
+    def test_recalculate_awards_completion_points(self):
+        from challenges import progress
+        from workouts.models import WorkoutLog
+        participant = self._join('kcal', goal=100.0)
+        make_workout_log(self.user, 10)
+        # Edited in bulk, so the progress engine never saw the new total
+        WorkoutLog.objects.filter(user=self.user).update(calories_burned=Decimal('150'))
+
+        progress.recalculate([self.user.pk])
+        participant.refresh_from_db()
+        self.assertTrue(participant.completed)
+        self._assert_completion_points(participant)
+
+
+# ---------------------------------------------------------------------------
+# Denormalized social stats
+# ---------------------------------------------------------------------------
+
+class UserSocialStatsTest(TestCase):
+    """
+    UserSocialStats rows follow Follow/Post hooks, are computed on first read,
+    and reconcile_social_stats repairs drift from updates that bypass signals.
+    """
+
+    def setUp(self):
+        from challenges import social_stats
+        self.me = make_user()
+        self.target = make_user()
+        social_stats.get(self.target.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.me)
+
+    def _profile(self):
+        return self.client.get(f'/api/community/users/{self.target.id}/profile/')
+
+    def test_counters_follow_hooks_and_profile_is_two_queries(self):
+        from challenges.models import Follow
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.me, following=self.target)
+            Post.objects.create(user=self.target, content='one')
+            Post.objects.create(user=self.target, content='two').delete()
+
+        with self.assertNumQueries(2):
+            resp = self._profile()
+        self.assertEqual(resp.data['follower_count'], 1)
+        self.assertEqual(resp.data['post_count'], 1)
+        self.assertTrue(resp.data['is_following_me'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.me).delete()
+        self.assertEqual(self._profile().data['follower_count'], 0)
+
+    def test_rolled_back_write_leaves_counters_alone(self):
+        from django.db import transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Post.objects.create(user=self.target, content='lost')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self._profile().data['post_count'], 0)
+
+    def test_challenge_stats_totals_match_the_challenge_list(self):
+        challenge = make_challenge(self.me)
+        ChallengeParticipant.objects.create(challenge=challenge, user=self.target, completed=True)
+        resp = self.client.get(f'/api/community/users/{self.target.id}/challenge-stats/')
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.data['total_joined'], len(resp.data['challenges']))
+        self.assertEqual(resp.data['total_completed'], 1)
+
+    def test_reconcile_fixes_bulk_updates(self):
+        from io import StringIO
+        from django.core.management import call_command
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(user=self.target, content='hidden')
+        Post.objects.filter(user=self.target).update(is_removed=True)
+        self.assertEqual(self._profile().data['post_count'], 1)
+
+        out = StringIO()
+        call_command('reconcile_social_stats', stdout=out)
+        self.assertIn('1 of 1', out.getvalue())
+        self.assertEqual(self._profile().data['post_count'], 0)
+
+
+class FollowListTest(TestCase):
+    """Follower/following/mutual lists are cursor-paginated, newest follow first."""
+
+    def setUp(self):
+        from challenges.models import Follow
+        self.me = make_user()
+        self.target = make_user()
+        self.fans = [make_user() for _ in range(3)]
+        for fan in self.fans:
+            Follow.objects.create(follower=fan, following=self.target)
+        Follow.objects.create(follower=self.target, following=self.fans[0])
+        Follow.objects.create(follower=self.me, following=self.fans[2])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.me)
+
+    def test_followers_paginated_with_is_followed_by_me(self):
+        url = f'/api/community/users/{self.target.id}/followers/'
+        with self.assertNumQueries(2):
+            resp = self.client.get(url, {'page_size': 2})
+        ids = [row['id'] for row in resp.data['results']]
+        self.assertEqual(ids, [self.fans[2].id, self.fans[1].id])
+        self.assertEqual([row['is_followed_by_me'] for row in resp.data['results']], [True, False])
+        rest = self.client.get(resp.data['next'])
+        self.assertEqual([row['id'] for row in rest.data['results']], [self.fans[0].id])
+
+    def test_mutuals(self):
+        resp = self.client.get(f'/api/community/users/{self.target.id}/mutuals/')
+        self.assertEqual([row['id'] for row in resp.data['results']], [self.fans[0].id])
+
+
+# ---------------------------------------------------------------------------
+# Streaks
+# ---------------------------------------------------------------------------
+
+class StreakEngineTest(TestCase):
+    """Streak transitions are single conditional UPDATEs, counted once per day."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = make_user()
+
+    def test_same_day_yesterday_and_gap(self):
+        from datetime import date
+        from challenges import streaks
+        from challenges.models import Streak, WorkoutStreak
+
+        streaks.record(self.user.pk, (streaks.OVERALL, streaks.WORKOUT), on=date(2026, 3, 1))
+        streaks.record(self.user.pk, (streaks.WORKOUT,), on=date(2026, 3, 2))
+        with self.assertNumQueries(0):
+            streaks.record(self.user.pk, (streaks.WORKOUT,), on=date(2026, 3, 2))
+        row = WorkoutStreak.objects.get(user=self.user)
+        self.assertEqual((row.current_streak, row.longest_streak), (2, 2))
+
+        streaks.record(self.user.pk, (streaks.WORKOUT,), on=date(2026, 3, 5))
+        row.refresh_from_db()
+        self.assertEqual((row.current_streak, row.longest_streak, row.last_active_date),
+                         (1, 2, date(2026, 3, 5)))
+        self.assertEqual(Streak.objects.get(user=self.user).current_streak, 1)
+
+    def test_uncached_same_day_does_not_double_count(self):
+        from django.core.cache import cache
+        from challenges import streaks
+        from challenges.models import NutritionStreak
+
+        streaks.record(self.user.pk, (streaks.NUTRITION,))
+        cache.clear()  # another worker, cold cache
+        streaks.record(self.user.pk, (streaks.NUTRITION,))
+        self.assertEqual(NutritionStreak.objects.get(user=self.user).current_streak, 1)
+
+
+# ---------------------------------------------------------------------------
+# Achievements
+# ---------------------------------------------------------------------------
+
+@override_settings(CACHES=SHARED_CACHES)
+class AchievementEngineTest(TestCase):
+    """Rules unlock when a shared counter crosses them; other saves cost no query."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from backend.cache import shared_cache
+        from challenges.reward_models import Achievement
+        cache.clear()
+        shared_cache().clear()
+        self.user = make_user()
+        self.two = Achievement.objects.create(
+            name='Two Workouts', description='d', category='WORKOUT',
+            criteria={'type': 'workout_count', 'value': 2}, points_reward=50,
+        )
+
+    def test_unlocks_once_when_threshold_crossed(self):
+        from challenges import achievements
+        from challenges.reward_models import UserAchievement, UserPoints
+
+        make_workout_log(self.user, 100)
+        self.assertFalse(UserAchievement.objects.exists())
+        with self.assertNumQueries(0):
+            achievements.record(self.user.pk, 'nutrition_count')
+
+        make_workout_log(self.user, 100)
+        unlocked = UserAchievement.objects.get(user=self.user)
+        self.assertEqual((unlocked.achievement_id, unlocked.progress), (self.two.pk, 2))
+        points = UserPoints.objects.get(user=self.user).total_points
+
+        with self.assertNumQueries(0):
+            achievements.record(self.user.pk, 'workout_count')
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, points)
+
+    def test_counts_each_event_without_a_shared_cache(self):
+        from challenges.reward_models import UserAchievement
+        caches = {k: v for k, v in SHARED_CACHES.items() if k != 'shared'}
+        with override_settings(CACHES=caches):
+            make_workout_log(self.user, 100)
+            make_workout_log(self.user, 100)
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement=self.two).exists())
+
+    def test_existing_unlock_is_not_paid_again(self):
+        from challenges import achievements
+        from challenges.reward_models import PointTransaction
+        rule = achievements.rules('workout_count')[0]
+        # As if a concurrent request unlocked it between the two calls
+        self.assertEqual(achievements._unlock(self.user.pk, [rule]), [rule])
+        self.assertEqual(achievements._unlock(self.user.pk, [rule]), [])
+        self.assertEqual(PointTransaction.objects.filter(user=self.user).count(), 1)
+
+    def test_streak_rules_unlock_when_passed(self):
+        from challenges import achievements, streaks
+        from challenges.models import Streak
+        from challenges.reward_models import Achievement, UserAchievement
+        three = Achievement.objects.create(
+            name='Three Days', description='d', category='STREAK',
+            criteria={'type': 'streak', 'value': 3}, points_reward=10,
+        )
+        # The rule was added after the streak had already passed it
+        Streak.objects.create(user=self.user, current_streak=5, longest_streak=5)
+
+        unlocked = achievements.record_streaks(self.user.pk, [streaks.OVERALL])
+        self.assertEqual([rule.achievement_id for rule in unlocked], [three.pk])
+        self.assertEqual(achievements.record_streaks(self.user.pk, [streaks.OVERALL]), [])
+        self.assertEqual(UserAchievement.objects.filter(user=self.user).count(), 1)
+
+    def test_rule_changes_reload(self):
+        from challenges import achievements
+        self.assertEqual([r.value for r in achievements.rules('workout_count')], [2])
+        self.two.criteria = {'type': 'workout_count', 'value': 3}
+        self.two.save()
+        self.assertEqual([r.value for r in achievements.rules('workout_count')], [3])
+
+
+# ---------------------------------------------------------------------------
+# Points ledger
+# ---------------------------------------------------------------------------
+
+class PointsLedgerTest(TestCase):
+    """Balances move with F() updates alongside the ledger and reconcile from it."""
+
+    def test_award_many_and_level_in_sql(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from challenges import points
+        from challenges.reward_models import PointTransaction, UserPoints
+        a, b = make_user(), make_user()
+        points.award(a.pk, 900, 'WORKOUT', 'w')
+
+        points.award_many([
+            points.Award(b.pk, 5, 'NUTRITION', 'n'),
+            points.Award(a.pk, 150, 'BONUS', 'bonus'),
+        ])
+        with CaptureQueriesContext(connection) as ctx:
+            points.award_many([
+                points.Award(a.pk, 40, 'REDEMPTION', 'r', transaction_type='SPEND'),
+                points.Award(b.pk, 5, 'NUTRITION', 'n'),
+            ])
+        writes = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(writes), 2)  # ledger INSERT + balance UPDATE
+
+        row = UserPoints.objects.get(user=a)
+        self.assertEqual(
+            (row.total_points, row.lifetime_points, row.points_spent, row.level),
+            (1010, 1050, 40, 2),
+        )
+        self.assertEqual(UserPoints.objects.get(user=b).total_points, 10)
+        self.assertEqual(PointTransaction.objects.filter(user=a).count(), 3)
+
+    def test_reconcile_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from challenges import points
+        from challenges.reward_models import UserPoints
+        user = make_user()
+        points.award(user.pk, 30, 'WORKOUT', 'w')
+        UserPoints.objects.filter(user=user).update(total_points=999)
+
+        out = StringIO()
+        call_command('reconcile_points', stdout=out)
+        self.assertIn('1 balance(s) corrected', out.getvalue())
+        self.assertEqual(UserPoints.objects.get(user=user).total_points, 30)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PointsLeaderboardTest(TestCase):
+    """The points leaderboard's top entries are a shared snapshot rebuilt on expiry or by command."""
+
+    def setUp(self):
+        from backend.cache import shared_cache
+        from challenges import points
+        shared_cache().clear()
+        self.users = [make_user() for _ in range(3)]
+        for user, amount in zip(self.users, (300, 200, 100)):
+            points.award(user.pk, amount, 'WORKOUT', 'w')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.users[2])
+
+    def test_top_is_cached_until_rebuilt(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from challenges import points
+        resp = self.client.get('/api/challenges/rewards/leaderboard/')
+        self.assertEqual([row['total_points'] for row in resp.data], [300, 200, 100])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            points.award(self.users[2].pk, 250, 'BONUS', 'b', transaction_type='BONUS')
+        with self.assertNumQueries(0):
+            resp = self.client.get('/api/challenges/rewards/leaderboard/')
+        self.assertEqual(resp.data[0]['total_points'], 300)
+
+        call_command('refresh_points_leaderboard', stdout=StringIO())
+        resp = self.client.get('/api/challenges/rewards/leaderboard/')
+        self.assertEqual(resp.data[0]['user_id'], str(self.users[2].pk))
+        self.assertEqual(resp.data[0]['total_points'], 350)
+
+    def test_around_me_and_weekly(self):
+        resp = self.client.get('/api/challenges/rewards/leaderboard/', {'around': 'me'})
+        self.assertEqual([row['rank'] for row in resp.data], [1, 2, 3])
+        resp = self.client.get('/api/challenges/rewards/leaderboard/', {'period': 'week'})
+        self.assertEqual([row['total_points'] for row in resp.data], [300, 200, 100])
+        resp = self.client.get('/api/challenges/rewards/leaderboard/', {'period': 'year'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_around_me_ranks_ties_with_neighbours(self):
+        from challenges import points, points_leaderboard
+        more = [make_user() for _ in range(4)]
+        for user, amount in zip(more, (200, 200, 50, 10)):
+            points.award(user.pk, amount, 'WORKOUT', 'w')
+        # 300, 200 x3, 100, 50, 10: ranks 1, 2, 2, 2, 5, 6, 7
+        me = self.users[2]  # 100 points
+        entries = points_leaderboard.around('all', me.pk, window=2)
+        self.assertEqual([e['points'] for e in entries], [200, 200, 100, 50, 10])
+        self.assertEqual([e['rank'] for e in entries], [2, 2, 5, 6, 7])
+        self.assertEqual(entries[2]['user_id'], str(me.pk))
+
+        entries = points_leaderboard.around('week', more[3].pk, window=3)
+        self.assertEqual([e['rank'] for e in entries], [2, 5, 6, 7])
+
+    def test_reads_the_database_without_a_shared_cache(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from challenges import points
+        caches = {k: v for k, v in SHARED_CACHES.items() if k != 'shared'}
+        with override_settings(CACHES=caches):
+            self.client.get('/api/challenges/rewards/leaderboard/')
+            points.award(self.users[2].pk, 250, 'BONUS', 'b', transaction_type='BONUS')
+            resp = self.client.get('/api/challenges/rewards/leaderboard/')
+            self.assertEqual(resp.data[0]['total_points'], 350)
+            out = StringIO()
+            call_command('refresh_points_leaderboard', stdout=out)
+            self.assertIn('No shared cache', out.getvalue())
+
+
+class PointTransactionHistoryTest(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from challenges import points
+        cache.clear()
+        self.user = make_user()
+        for amount in (10, 20, 30):
+            points.award(self.user.pk, amount, 'WORKOUT', 'w')
+        points.award(self.user.pk, 15, 'REDEMPTION', 'r', transaction_type='SPEND')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_pagination(self):
+        resp = self.client.get('/api/challenges/rewards/transactions/', {'page_size': 3})
+        self.assertEqual([row['points'] for row in resp.data['results']], [15, 30, 20])
+        rest = self.client.get(resp.data['next'])
+        self.assertEqual([row['points'] for row in rest.data['results']], [10])
+
+    def test_monthly_summary_cached_until_next_transaction(self):
+        from challenges import points
+        url = '/api/challenges/rewards/transactions/summary/'
+        period = self.client.get(url).data['periods'][0]
+        self.assertEqual((period['earned'], period['spent']), (60, 15))
+        self.assertEqual(period['sources']['WORKOUT'], {'earned': 60, 'spent': 0})
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            points.award(self.user.pk, 5, 'NUTRITION', 'n')
+        period = self.client.get(url).data['periods'][0]
+        self.assertEqual(period['earned'], 65)
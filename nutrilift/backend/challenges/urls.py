@@ -39,6 +39,7 @@ urlpatterns = [
     # --- Reward endpoints (api/rewards/...) ---
     path('rewards/points/', reward_views.UserPointsView.as_view(), name='rewards-points'),
     path('rewards/transactions/', reward_views.PointTransactionHistoryView.as_view(), name='rewards-transactions'),
+    path('rewards/transactions/summary/', reward_views.PointTransactionSummaryView.as_view(), name='rewards-transactions-summary'),
     path('rewards/achievements/', reward_views.AchievementListView.as_view(), name='rewards-achievements'),
     path('rewards/my-achievements/', reward_views.UserAchievementsView.as_view(), name='rewards-my-achievements'),
     path('rewards/leaderboard/', reward_views.LeaderboardPointsView.as_view(), name='rewards-leaderboard'),
@@ -56,5 +57,6 @@ urlpatterns = [
     path('users/<uuid:pk>/posts/', views.UserPostsView.as_view(), name='community-user-posts'),
     path('users/<uuid:pk>/followers/', views.UserFollowersView.as_view(), name='community-user-followers'),
     path('users/<uuid:pk>/following/', views.UserFollowingView.as_view(), name='community-user-following'),
+    path('users/<uuid:pk>/mutuals/', views.UserMutualsView.as_view(), name='community-user-mutuals'),
     path('users/<uuid:pk>/challenge-stats/', views.UserChallengeStatsView.as_view(), name='community-user-challenge-stats'),
 ]
@@ -1,10 +1,12 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 
 from .models import (
     Challenge, ChallengeParticipant, UserBadge, Streak,
@@ -15,14 +17,21 @@ from .serializers import (
     ChallengeSerializer, LeaderboardSerializer, UserBadgeSerializer,
     StreakSerializer, PostSerializer, CommentSerializer,
     UserProfileSerializer, ChallengeDailyLogSerializer,
+    annotate_challenges,
 )
+from . import (
+    achievements, counters, feed, leaderboard, reward_signals, social_stats, streaks,
+)
+from .task_specs import SPEC_FIELDS, structure_tasks
+from .task_verification import verify_tasks
 
 User = get_user_model()
 
 
 def _validated_default_tasks(raw):
     """Validate and normalise default_tasks list. Each item must have a non-empty 'label'.
-    Preserves 'type' field (exercise/food/manual) for auto-verification."""
+    Preserves 'type' field (exercise/food/manual) for auto-verification and adds
+    the parsed, catalogue-resolved spec fields (see challenges.task_specs)."""
     if not isinstance(raw, list):
         return []
     result = []
@@ -34,16 +43,34 @@ def _validated_default_tasks(raw):
             result.append({'label': item['label'].strip(), 'type': task_type})
         elif isinstance(item, str) and item.strip():
             result.append({'label': item.strip(), 'type': 'manual'})
-    return result
+    return structure_tasks(result)
 
 
 # ---------------------------------------------------------------------------
 # Pagination
 # ---------------------------------------------------------------------------
 
-class FeedPagination(PageNumberPagination):
+class FeedPagination(CursorPagination):
     page_size = 20
     page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+class FollowPagination(CursorPagination):
+    """Follower/following lists, newest follow first (Follow.created_at)."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-created_at'
+
+
+def _liked_post_ids(user, posts):
+    """Ids of the given posts that `user` has liked, in one IN query."""
+    return set(
+        Like.objects.filter(user=user, post_id__in=[p.pk for p in posts])
+        .values_list('post_id', flat=True)
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -63,6 +90,7 @@ class ActiveChallengeListView(APIView):
             is_active=True,
             end_date__gt=timezone.now(),
         ).order_by('-is_official', '-created_at')
+        challenges = annotate_challenges(challenges, request.user)
         serializer = ChallengeSerializer(challenges, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -174,29 +202,100 @@ class LeaveChallengeView(APIView):
 class LeaderboardView(APIView):
     """
     GET /api/challenges/{id}/leaderboard/
-    Top 10 participants ordered by -progress.
+    Top 10 participants ordered by -progress, served from the cached
+    leaderboard snapshot (see challenges.leaderboard).
+
+    Optional query params:
+      ?around=me&window=5        — the caller's rank +/- window ranks
+      ?from_rank=11&to_rank=20   — an explicit rank range (max 100 ranks)
     Requirements: 3.4
     """
     permission_classes = [IsAuthenticated]
+    max_window = 50
+    max_rank_range = 100
 
     def get(self, request, pk):
         if not Challenge.objects.filter(pk=pk).exists():
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-        participants = (
-            ChallengeParticipant.objects
-            .filter(challenge_id=pk)
+
+        params = request.query_params
+        if params.get('around') == 'me' or 'from_rank' in params or 'to_rank' in params:
+            return self._rank_range(request, pk)
+
+        entries = leaderboard.top(pk, limit=10)
+        serializer = LeaderboardSerializer(
+            _leaderboard_participants(pk, entries),
+            many=True,
+            context={'streaks': _current_streaks([e['user_id'] for e in entries])},
+        )
+        return Response(serializer.data)
+
+    def _rank_range(self, request, pk):
+        params = request.query_params
+        try:
+            if params.get('around') == 'me':
+                window = int(params.get('window', 5))
+                if not 0 <= window <= self.max_window:
+                    raise ValueError
+                my_rank = leaderboard.rank_of(pk, request.user.pk)
+                if my_rank is None:
+                    return Response({'detail': 'Not joined this challenge.'}, status=status.HTTP_404_NOT_FOUND)
+                from_rank, to_rank = max(1, my_rank - window), my_rank + window
+            else:
+                from_rank = int(params.get('from_rank', 1))
+                to_rank = int(params.get('to_rank', from_rank + 9))
+                if from_rank < 1 or to_rank < from_rank or to_rank - from_rank >= self.max_rank_range:
+                    raise ValueError
+        except ValueError:
+            return Response(
+                {'detail': 'Invalid rank range. window must be 0-50; from_rank/to_rank must span at most 100 ranks.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        participants = list(
+            leaderboard.ranked_participants(pk)
+            .filter(leaderboard_rank__gte=from_rank, leaderboard_rank__lte=to_rank)
             .select_related('user')
-            .order_by('-progress')[:10]
         )
-        # Annotate rank in Python (1-based)
-        entries = []
-        for i, p in enumerate(participants, start=1):
-            p.rank = i
-            entries.append(p)
-        serializer = LeaderboardSerializer(entries, many=True)
+        for p in participants:
+            p.rank = p.leaderboard_rank
+        serializer = LeaderboardSerializer(
+            participants,
+            many=True,
+            context={'streaks': _current_streaks([p.user_id for p in participants])},
+        )
         return Response(serializer.data)
 
 
+def _current_streaks(user_ids):
+    """Map user_id -> current_streak for a page of leaderboard entries in one query."""
+    return dict(
+        Streak.objects.filter(user_id__in=user_ids).values_list('user_id', 'current_streak')
+    )
+
+
+def _leaderboard_participants(challenge_id, entries):
+    """
+    Load the ChallengeParticipant rows for leaderboard entries in one query and
+    return them in leaderboard order with rank set.
+    """
+    participants = {
+        str(p.user_id): p
+        for p in ChallengeParticipant.objects.filter(
+            challenge_id=challenge_id,
+            user_id__in=[e['user_id'] for e in entries],
+        ).select_related('user')
+    }
+    result = []
+    for entry in entries:
+        p = participants.get(entry['user_id'])
+        if p is None:
+            continue  # left since the snapshot was taken
+        p.rank = entry['rank']
+        result.append(p)
+    return result
+
+
 # ---------------------------------------------------------------------------
 # Badge & Streak views
 # ---------------------------------------------------------------------------
@@ -224,27 +323,19 @@ class StreakView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        today = timezone.localtime(timezone.now()).date()
-        yesterday = today - timezone.timedelta(days=1)
-        
-        try:
-            streak = Streak.objects.get(user=request.user)
-            if streak.last_active_date in (today, yesterday):
-                current_streak = streak.current_streak
-            else:
-                current_streak = 0
-            
-            return Response({
-                'current_streak': current_streak,
-                'longest_streak': streak.longest_streak,
-                'last_active_date': streak.last_active_date,
-            })
-        except Streak.DoesNotExist:
+        # Stored values: broken streaks are zeroed nightly by send_streak_reminders
+        streak = Streak.objects.filter(user=request.user).first()
+        if streak is None:
             return Response({
                 'current_streak': 0,
                 'longest_streak': 0,
                 'last_active_date': None,
             })
+        return Response({
+            'current_streak': streak.current_streak,
+            'longest_streak': streak.longest_streak,
+            'last_active_date': streak.last_active_date,
+        })
 
 
 class AllStreaksView(APIView):
@@ -257,16 +348,12 @@ class AllStreaksView(APIView):
     def get(self, request):
         from challenges.models import WorkoutStreak, NutritionStreak
 
-        today = timezone.localtime(timezone.now()).date()
-        yesterday = today - timezone.timedelta(days=1)
-
+        # Stored values: broken streaks are zeroed nightly by send_streak_reminders
         def get_streak_data(model_class):
-            try:
-                s = model_class.objects.get(user=request.user)
-                current = s.current_streak if s.last_active_date in (today, yesterday) else 0
-                return {'current_streak': current, 'longest_streak': s.longest_streak, 'last_active_date': s.last_active_date}
-            except model_class.DoesNotExist:
+            s = model_class.objects.filter(user=request.user).first()
+            if s is None:
                 return {'current_streak': 0, 'longest_streak': 0, 'last_active_date': None}
+            return {'current_streak': s.current_streak, 'longest_streak': s.longest_streak, 'last_active_date': s.last_active_date}
 
         workout = get_streak_data(WorkoutStreak)
         nutrition = get_streak_data(NutritionStreak)
@@ -286,16 +373,28 @@ class AllStreaksView(APIView):
 class FeedView(APIView):
     """
     GET /api/community/feed/
-    Paginated (page_size=20) posts where is_removed=False, ordered by -created_at.
+    The requesting user's home feed (own posts, followed accounts' posts —
+    see challenges.feed), is_removed=False, ordered by -created_at.
+    Pages through the user's FeedEntry timeline, or all posts if they follow
+    nobody.
+    Cursor-paginated (page_size=20); follow the `next` link to page.
     Requirements: 6.1
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        posts = Post.objects.filter(is_removed=False).order_by('-created_at')
         paginator = FeedPagination()
-        page = paginator.paginate_queryset(posts, request)
-        serializer = PostSerializer(page, many=True, context={'request': request})
+        first_page = paginator.cursor_query_param not in request.query_params
+        timeline = feed.home_timeline(request.user.pk, pull=first_page)
+        if timeline is None:
+            page = paginator.paginate_queryset(feed.global_feed(), request)
+        else:
+            page = [entry.post for entry in paginator.paginate_queryset(timeline, request)]
+        serializer = PostSerializer(page, many=True, context={
+            'request': request,
+            'liked_post_ids': _liked_post_ids(request.user, page),
+            'counter_deltas': counters.pending_deltas([p.pk for p in page]),
+        })
         return paginator.get_paginated_response(serializer.data)
 
 
@@ -321,13 +420,11 @@ class CreatePostView(APIView):
             image_urls=image_urls if isinstance(image_urls, list) else [],
         )
 
-        # Notify all followers of the poster
+        # Notify all followers of the poster (bulk, in the background)
         try:
-            from notifications.utils import notify_new_post
+            from notifications.utils import notify_followers_new_post
             poster_name = getattr(request.user, 'name', None) or request.user.email
-            followers = Follow.objects.filter(following=request.user).select_related('follower')
-            for f in followers:
-                notify_new_post(f.follower, poster_name)
+            notify_followers_new_post(request.user, poster_name)
         except Exception:
             pass
 
@@ -377,7 +474,7 @@ class LikePostView(APIView):
     """
     POST /api/community/posts/{id}/like/
     Toggles Like: create if not exists (201), delete if exists (200 {"liked": false}).
-    Updates Post.like_count.
+    Updates Post.like_count atomically (see challenges.counters).
     Requirements: 6.5
     """
     permission_classes = [IsAuthenticated]
@@ -386,15 +483,25 @@ class LikePostView(APIView):
         post = Post.objects.filter(pk=pk).first()
         if post is None:
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-        like = Like.objects.filter(post=post, user=request.user).first()
-        if like:
-            like.delete()
-            Post.objects.filter(pk=pk).update(like_count=post.like_count - 1)
-            return Response({'liked': False, 'like_count': max(0, post.like_count - 1)}, status=status.HTTP_200_OK)
+        deleted, _ = Like.objects.filter(post=post, user=request.user).delete()
+        if deleted:
+            counters.increment(post.pk, 'like_count', -1)
+            return Response(
+                {'liked': False, 'like_count': counters.current_count(post.pk, 'like_count')},
+                status=status.HTTP_200_OK,
+            )
+        try:
+            with transaction.atomic():
+                Like.objects.create(post=post, user=request.user)
+        except IntegrityError:
+            # A concurrent request already liked it; don't count it twice
+            pass
         else:
-            Like.objects.create(post=post, user=request.user)
-            Post.objects.filter(pk=pk).update(like_count=post.like_count + 1)
-            return Response({'liked': True, 'like_count': post.like_count + 1}, status=status.HTTP_201_CREATED)
+            counters.increment(post.pk, 'like_count', 1)
+        return Response(
+            {'liked': True, 'like_count': counters.current_count(post.pk, 'like_count')},
+            status=status.HTTP_201_CREATED,
+        )
 
 
 class CommentPostView(APIView):
@@ -413,7 +520,7 @@ class CommentPostView(APIView):
         if not content:
             return Response({'detail': 'Content is required.'}, status=status.HTTP_400_BAD_REQUEST)
         comment = Comment.objects.create(post=post, user=request.user, content=content)
-        Post.objects.filter(pk=pk).update(comment_count=post.comment_count + 1)
+        counters.increment(post.pk, 'comment_count', 1)
         serializer = CommentSerializer(comment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -467,12 +574,11 @@ class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        target = User.objects.filter(pk=pk).first()
+        # One read for the user and their denormalized counters (UserSocialStats)
+        target = User.objects.select_related('social_stats').filter(pk=pk).first()
         if target is None:
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-        follower_count = Follow.objects.filter(following=target).count()
-        following_count = Follow.objects.filter(follower=target).count()
-        post_count = Post.objects.filter(user=target, is_removed=False).count()
+        stats = getattr(target, 'social_stats', None) or social_stats.get(target.pk)
         is_following_me = Follow.objects.filter(
             follower=request.user, following=target
         ).exists()
@@ -480,9 +586,9 @@ class UserProfileView(APIView):
             'id': target.pk,
             'username': getattr(target, 'name', None) or target.email,
             'avatar_url': getattr(target, 'avatar_url', None),
-            'follower_count': follower_count,
-            'following_count': following_count,
-            'post_count': post_count,
+            'follower_count': stats.follower_count,
+            'following_count': stats.following_count,
+            'post_count': stats.post_count,
             'is_following_me': is_following_me,
             # Physical & fitness info
             'gender': getattr(target, 'gender', None) or None,
@@ -532,33 +638,56 @@ class UserPostsView(APIView):
         target = User.objects.filter(pk=pk).first()
         if target is None:
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-        posts = Post.objects.filter(user=target, is_removed=False).order_by('-created_at')
-        serializer = PostSerializer(posts, many=True, context={'request': request})
+        posts = list(
+            Post.objects.filter(user=target, is_removed=False)
+            .select_related('user').order_by('-created_at')
+        )
+        serializer = PostSerializer(posts, many=True, context={
+            'request': request,
+            'liked_post_ids': _liked_post_ids(request.user, posts),
+            'counter_deltas': counters.pending_deltas([p.pk for p in posts]),
+        })
         return Response(serializer.data)
 
 
+def _follow_page(request, follows, user_field):
+    """
+    One cursor page of Follow rows rendered as the `user_field` side's users,
+    each annotated (in the same query) with whether the requester follows them.
+    """
+    follows = follows.select_related(user_field).annotate(
+        is_followed_by_me=Exists(
+            Follow.objects.filter(follower=request.user, following=OuterRef(user_field))
+        )
+    )
+    paginator = FollowPagination()
+    page = paginator.paginate_queryset(follows, request)
+    data = []
+    for f in page:
+        user = getattr(f, user_field)
+        data.append({
+            'id': user.pk,
+            'username': getattr(user, 'name', None) or user.email,
+            'avatar_url': getattr(user, 'avatar_url', None),
+            'followed_at': f.created_at,
+            'is_followed_by_me': f.is_followed_by_me,
+        })
+    return paginator.get_paginated_response(data)
+
+
 class UserFollowersView(APIView):
     """
     GET /api/community/users/{id}/followers/
-    Lists users who follow the target user.
+    Lists users who follow the target user, newest first.
+    Cursor-paginated (page_size=50); follow the `next` link to page.
     Requirements: 7.4
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        target = User.objects.filter(pk=pk).first()
-        if target is None:
+        if not User.objects.filter(pk=pk).exists():
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-        followers = Follow.objects.filter(following=target).select_related('follower')
-        data = []
-        for f in followers:
-            user = f.follower
-            data.append({
-                'id': user.pk,
-                'username': getattr(user, 'name', None) or user.email,
-                'avatar_url': getattr(user, 'avatar_url', None),
-            })
-        return Response(data)
+        return _follow_page(request, Follow.objects.filter(following_id=pk), 'follower')
 
 
 class UserChallengeStatsView(APIView):
@@ -573,23 +702,23 @@ class UserChallengeStatsView(APIView):
         if target is None:
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        participants = ChallengeParticipant.objects.filter(user=target).select_related('challenge')
-        total_joined = participants.count()
-        completed = participants.filter(completed=True).count()
-        total_days_logged = 0
-        challenge_list = []
-        for p in participants:
-            logs_done = ChallengeDailyLog.objects.filter(participant=p, is_complete=True).count()
-            total_days_logged += logs_done
-            challenge_list.append({
+        participants = (
+            ChallengeParticipant.objects.filter(user=target)
+            .select_related('challenge')
+            .annotate(days_logged=Count('daily_logs', filter=Q(daily_logs__is_complete=True)))
+        )
+        challenge_list = [
+            {
                 'name': p.challenge.name,
                 'challenge_type': p.challenge.challenge_type,
                 'progress': p.progress,
                 'goal_value': p.challenge.goal_value,
                 'unit': p.challenge.unit,
                 'completed': p.completed,
-                'days_logged': logs_done,
-            })
+                'days_logged': p.days_logged,
+            }
+            for p in participants
+        ]
 
         # Streak
         streak_val = 0
@@ -600,9 +729,10 @@ class UserChallengeStatsView(APIView):
             pass
 
         return Response({
-            'total_joined': total_joined,
-            'total_completed': completed,
-            'total_days_logged': total_days_logged,
+            # Totals come from the same rows as the list so the two always agree
+            'total_joined': len(challenge_list),
+            'total_completed': sum(c['completed'] for c in challenge_list),
+            'total_days_logged': sum(c['days_logged'] for c in challenge_list),
             'current_streak': streak_val,
             'challenges': challenge_list,
         })
@@ -611,24 +741,31 @@ class UserChallengeStatsView(APIView):
 class UserFollowingView(APIView):
     """
     GET /api/community/users/{id}/following/
-    Lists users that the target user follows.
+    Lists users that the target user follows, newest first.
+    Cursor-paginated (page_size=50); follow the `next` link to page.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        target = User.objects.filter(pk=pk).first()
-        if target is None:
+        if not User.objects.filter(pk=pk).exists():
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
-        following = Follow.objects.filter(follower=target).select_related('following')
-        data = []
-        for f in following:
-            user = f.following
-            data.append({
-                'id': user.pk,
-                'username': getattr(user, 'name', None) or user.email,
-                'avatar_url': getattr(user, 'avatar_url', None),
-            })
-        return Response(data)
+        return _follow_page(request, Follow.objects.filter(follower_id=pk), 'following')
+
+
+class UserMutualsView(APIView):
+    """
+    GET /api/community/users/{id}/mutuals/
+    Lists users who follow the target user and are followed back, by when
+    the target followed them. One self-join on Follow; cursor-paginated.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if not User.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        # target -> user, joined to the reverse user -> target edge
+        mutuals = Follow.objects.filter(follower_id=pk, following__following__following_id=pk)
+        return _follow_page(request, mutuals, 'following')
 
 
 # ---------------------------------------------------------------------------
@@ -667,7 +804,10 @@ class DailyLogView(APIView):
             day_number=day_number,
             defaults={
                 'task_items': [
-                    {'label': t.get('label', ''), 'type': t.get('type', 'manual'), 'completed': False}
+                    {
+                        'label': t.get('label', ''), 'type': t.get('type', 'manual'), 'completed': False,
+                        **{k: t[k] for k in SPEC_FIELDS if k in t},
+                    }
                     for t in (participant.challenge.default_tasks or [])
                 ],
                 'media_urls': [],
@@ -735,20 +875,37 @@ class DailyLogCompleteView(APIView):
             log.completed_at = timezone.now()
             log.save()
 
-            # Increment participant progress by 1 completed day
-            participant.progress = participant.progress + 1
-
-            # Check if challenge goal is now reached — mark participant as completed
+            # Increment participant progress by 1 completed day, in the database
+            # so concurrent completions (other challenges' days, workout logs)
+            # are not overwritten
             challenge = participant.challenge
-            if not participant.completed and participant.progress >= challenge.goal_value:
-                participant.completed = True
-                participant.completed_at = timezone.now()
+            ChallengeParticipant.objects.filter(pk=participant.pk).update(
+                progress=F('progress') + 1
+            )
+            # Mark the participant completed if the goal is now reached; only
+            # the request that flips the flag counts the completion
+            just_completed = bool(
+                ChallengeParticipant.objects.filter(
+                    pk=participant.pk, completed=False, progress__gte=challenge.goal_value,
+                ).update(completed=True, completed_at=timezone.now())
+            )
+            participant.refresh_from_db(fields=['progress', 'completed', 'completed_at'])
+            social_stats.adjust(
+                request.user.pk, completed_days=1, challenges_completed=int(just_completed)
+            )
 
-            participant.save(update_fields=['progress', 'completed', 'completed_at'])
+        # update() sends no post_save: refresh the cache the signal would have
+        leaderboard.update(challenge.pk, request.user.pk, participant.progress)
+        if just_completed:
+            reward_signals.award_challenge_completions([participant.pk])
 
         # Update streak for this user (outside transaction — non-critical)
-        from .signals import _update_streak, _award_badges
-        _update_streak(request.user)
+        from .signals import _award_badges
+        moved = streaks.record(request.user.pk)
+        if moved:
+            achievements.record_streaks(request.user.pk, moved)
+        if just_completed:
+            achievements.record(request.user.pk, 'challenge_complete')
         _award_badges(request.user)
 
         # Generate certificate if just completed
@@ -880,173 +1037,10 @@ class DailyLogVerifyView(APIView):
         if log is None:
             return Response({'detail': 'Log not found for today.'}, status=status.HTTP_404_NOT_FOUND)
 
-        task_items = log.task_items or []
-        unmet = []
-        updated_tasks = []
-
-        for task in task_items:
-            label = task.get('label', '')
-            task_type = task.get('type', '')  # 'exercise', 'food', or 'manual'
-            verified = task.get('verified', False)
-            verification_message = task.get('verification_message', None)
-
-            if task_type == 'exercise':
-                # Parse label for exercise name and target reps.
-                # Supported formats: "10 Push-ups", "Push-ups 10 reps", "10x Push-up"
-                import re as _re
-                label_lower = label.lower()
-
-                # Extract target reps from label (first number found)
-                rep_match = _re.search(r'(\d+)', label)
-                target_reps = int(rep_match.group(1)) if rep_match else None
-
-                # Extract exercise name: remove numbers, "reps", "x", "sets" from label
-                exercise_name_raw = _re.sub(r'\d+\s*(x|reps?|sets?)?', '', label, flags=_re.IGNORECASE).strip(' -,.')
-                exercise_name_clean = exercise_name_raw.strip()
-
-                try:
-                    from workouts.models import WorkoutLog, WorkoutExercise
-                    # Get all workout logs for today
-                    today_logs = WorkoutLog.objects.filter(
-                        user=request.user,
-                        logged_at__date=today,
-                        is_deleted=False,
-                    )
-
-                    if not today_logs.exists():
-                        verified = False
-                        verification_message = f'No workout logged today. Task: {label}'
-                        unmet.append(f'No workout logged today for: {label}')
-                    else:
-                        # Look for the specific exercise by name (case-insensitive partial match)
-                        matching_exercises = WorkoutExercise.objects.filter(
-                            workout_log__in=today_logs,
-                            exercise__name__icontains=exercise_name_clean,
-                        )
-
-                        if not matching_exercises.exists():
-                            # Try broader match — check if any word in the exercise name matches
-                            words = [w for w in exercise_name_clean.split() if len(w) > 2]
-                            for word in words:
-                                matching_exercises = WorkoutExercise.objects.filter(
-                                    workout_log__in=today_logs,
-                                    exercise__name__icontains=word,
-                                )
-                                if matching_exercises.exists():
-                                    break
-
-                        if not matching_exercises.exists():
-                            verified = False
-                            verification_message = f'"{exercise_name_clean}" not found in today\'s workout log'
-                            unmet.append(f'Exercise not logged: {label}')
-                        elif target_reps is not None:
-                            # Check if total reps across all sets meets the target
-                            total_reps = sum(e.sets * e.reps for e in matching_exercises)
-                            if total_reps >= target_reps:
-                                verified = True
-                                verification_message = f'✓ {exercise_name_clean}: {total_reps} reps logged (target: {target_reps})'
-                            else:
-                                verified = False
-                                verification_message = f'{exercise_name_clean}: only {total_reps} reps logged, need {target_reps}'
-                                unmet.append(f'{label}: {total_reps}/{target_reps} reps done')
-                        else:
-                            # No specific rep target — just presence is enough
-                            verified = True
-                            ex = matching_exercises.first()
-                            verification_message = f'✓ {ex.exercise.name} logged today'
-
-                except Exception:
-                    # workouts app unavailable — don't block
-                    verified = True
-                    verification_message = 'Could not verify (workout data unavailable)'
-
-            elif task_type == 'food':
-                # Parse label for food name and target amount.
-                # Supported formats: "20g chicken", "chicken 20g", "20 grams of chicken"
-                # Generic labels like "Log your meals today" → just check any food was logged
-                import re as _re
-                label_lower = label.lower()
-
-                # Extract target grams
-                gram_match = _re.search(r'(\d+(?:\.\d+)?)\s*(?:g|grams?|gm)', label_lower)
-                target_grams = float(gram_match.group(1)) if gram_match else None
-
-                # Extract food name: remove numbers and unit words
-                food_name_raw = _re.sub(
-                    r'\d+(?:\.\d+)?\s*(?:g|grams?|gm|ml|of|serving|servings?)?',
-                    '', label, flags=_re.IGNORECASE
-                ).strip(' -,.')
-                food_name_clean = food_name_raw.strip()
-
-                # Generic instruction labels — just check any food was logged
-                generic_keywords = ['log', 'meal', 'food', 'eat', 'intake', 'nutrition', 'diet', 'track']
-                words_in_label = food_name_clean.lower().split()
-                is_generic = len(words_in_label) >= 2 and sum(1 for w in words_in_label if w in generic_keywords) >= 1
-
-                try:
-                    from nutrition.models import IntakeLog
-                    today_intakes = IntakeLog.objects.filter(
-                        user=request.user,
-                        logged_at__date=today,
-                    ).select_related('food_item')
-
-                    if not today_intakes.exists():
-                        verified = False
-                        verification_message = f'No nutrition logged today. Task: {label}'
-                        unmet.append(f'No nutrition logged today for: {label}')
-                    elif is_generic:
-                        # Generic task — any food logged counts
-                        verified = True
-                        count = today_intakes.count()
-                        verification_message = f'✓ {count} food item{"s" if count != 1 else ""} logged today'
-                    else:
-                        # Specific food task — match by name
-                        matching_intakes = today_intakes.filter(
-                            food_item__name__icontains=food_name_clean
-                        )
-
-                        if not matching_intakes.exists():
-                            # Try word-by-word match
-                            words = [w for w in food_name_clean.split() if len(w) > 2]
-                            for word in words:
-                                matching_intakes = today_intakes.filter(
-                                    food_item__name__icontains=word
-                                )
-                                if matching_intakes.exists():
-                                    break
-
-                        if not matching_intakes.exists():
-                            verified = False
-                            verification_message = f'"{food_name_clean}" not found in today\'s nutrition log'
-                            unmet.append(f'Food not logged: {label}')
-                        elif target_grams is not None:
-                            total_qty = sum(float(i.quantity) for i in matching_intakes)
-                            if total_qty >= target_grams:
-                                verified = True
-                                verification_message = f'✓ {food_name_clean}: {total_qty:.0f}g logged (target: {target_grams:.0f}g)'
-                            else:
-                                verified = False
-                                verification_message = f'{food_name_clean}: only {total_qty:.0f}g logged, need {target_grams:.0f}g'
-                                unmet.append(f'{label}: {total_qty:.0f}g/{target_grams:.0f}g logged')
-                        else:
-                            verified = True
-                            item = matching_intakes.first()
-                            verification_message = f'✓ {item.food_item.name} logged today'
-
-                except Exception:
-                    verified = True
-                    verification_message = 'Could not verify (nutrition data unavailable)'
-
-            else:
-                # Manual task — just check the completed flag
-                if not task.get('completed', False):
-                    unmet.append(f'Task not checked off: {label}')
-
-            updated_tasks.append({
-                **task,
-                'verified': verified,
-                'verification_message': verification_message,
-            })
+        updated_tasks, unmet = verify_tasks(
+            request.user, log.task_items or [], today,
+            default_tasks=participant.challenge.default_tasks or [],
+        )
 
         # Persist the updated verification state back to the log
         log.task_items = updated_tasks
@@ -0,0 +1,73 @@
+"""
+Denormalized per-user unread notification counts.
+
+UnreadCounter rows are adjusted with F() updates by the same number of rows
+each write touched (created, or flipped to is_read=True), so concurrent
+writers never lose counts. Reads go to the counter row (a primary-key
+lookup) rather than a cache: the count backs the unread-count ETag, and a
+per-worker cached value would answer 304 with a stale count.
+
+A missing row is created by whichever write or read needs it first, with one
+INSERT ... SELECT COUNT(*) ... ON CONFLICT DO UPDATE statement: the count
+(on the (user, is_read) index) already reflects the caller's own committed
+write, and if another transaction inserted the row concurrently the insert
+waits for it and adds the delta instead. So a notification created while a
+row is being seeded is counted exactly once.
+"""
+from django.db import connection
+from django.db.models import F
+
+from .models import Notification, UnreadCounter
+
+def _seed(user_ids, delta=0):
+    """Create missing rows from COUNT(*), or add `delta` to rows created meanwhile."""
+    counter_table = UnreadCounter._meta.db_table
+    notification_table = Notification._meta.db_table
+    user_field = Notification._meta.get_field('user')
+    sql = (
+        f'INSERT INTO {counter_table} (user_id, unread_count) '
+        f'SELECT %s, COUNT(*) FROM {notification_table} WHERE user_id = %s AND NOT is_read '
+        f'ON CONFLICT (user_id) DO UPDATE SET unread_count = {counter_table}.unread_count + %s'
+    )
+    with connection.cursor() as cursor:
+        for user_id in user_ids:
+            value = user_field.get_db_prep_value(user_id, connection)
+            cursor.execute(sql, [value, value, delta])
+
+
+def _adjust(user_ids, delta):
+    if not user_ids or not delta:
+        return
+    updated = UnreadCounter.objects.filter(user_id__in=user_ids).update(
+        unread_count=F('unread_count') + delta
+    )
+    if updated < len(set(user_ids)):
+        existing = set(
+            UnreadCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        _seed([pk for pk in set(user_ids) if pk not in existing], delta)
+
+
+def created(user_ids):
+    """Record one new unread notification for each of `user_ids`."""
+    _adjust(list(user_ids), 1)
+
+
+def marked_read(user_id, count):
+    """Record that `count` of the user's notifications were just marked read."""
+    _adjust([user_id], -count)
+
+
+def removed_unread(user_id, count):
+    """Record that `count` of the user's unread notifications were deleted."""
+    _adjust([user_id], -count)
+
+
+def unread_count(user_id):
+    """The user's unread notification count."""
+    counter = UnreadCounter.objects.filter(user_id=user_id).values_list('unread_count', flat=True)
+    count = counter.first()
+    if count is None:
+        _seed([user_id])
+        count = counter.first()
+    return max(0, count)
@@ -0,0 +1,99 @@
+"""
+Background fan-out of one notification to many users.
+
+Fan-out jobs run on a small in-process thread pool after the surrounding
+transaction commits, so the request that triggered them (a new post, an
+official challenge created by an admin) returns immediately. Each job
+streams recipient ids with .iterator() and writes Notification rows with
+bulk_create in chunks of CHUNK_SIZE.
+
+Set NOTIFICATION_DISPATCH_ASYNC = False to run jobs inline (tests, shell).
+Usage:
+    from notifications.dispatch import fan_out
+    fan_out(User.objects.filter(is_active=True).values_list('pk', flat=True),
+            'challenge', 'New Challenge!', 'A new challenge has been added.')
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import counters
+from .models import Notification
+from .stream import deliver
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'NOTIFICATION_DISPATCH_WORKERS', 2),
+                thread_name_prefix='notify',
+            )
+        return _executor
+
+
+def bulk_notify(user_ids, ntype, title, message, action_url=''):
+    """
+    Create the same notification for every id in `user_ids` (an iterable or a
+    values_list queryset, which is streamed). Returns the number created.
+    """
+    if hasattr(user_ids, 'iterator'):
+        user_ids = user_ids.iterator(chunk_size=CHUNK_SIZE)
+    created = 0
+    batch = []
+    for user_id in user_ids:
+        batch.append(user_id)
+        if len(batch) >= CHUNK_SIZE:
+            created += _write_batch(batch, ntype, title, message, action_url)
+            batch = []
+    if batch:
+        created += _write_batch(batch, ntype, title, message, action_url)
+    return created
+
+
+def _write_batch(user_ids, ntype, title, message, action_url):
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id, type=ntype, title=title,
+            message=message, action_url=action_url,
+        )
+        for user_id in user_ids
+    ])
+    counters.created(user_ids)
+    deliver(notifications)
+    return len(user_ids)
+
+
+def _run(func, args, kwargs, in_worker=True):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.error("Notification job %s failed", func.__name__, exc_info=True)
+    finally:
+        if in_worker:
+            # Worker threads hold their own connections; don't leak them
+            connections.close_all()
+
+
+def dispatch(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the worker pool once the current transaction commits."""
+    if not getattr(settings, 'NOTIFICATION_DISPATCH_ASYNC', True):
+        _run(func, args, kwargs, in_worker=False)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
+
+
+def fan_out(user_ids, ntype, title, message, action_url=''):
+    """Queue a bulk notification for `user_ids` (evaluated by the worker)."""
+    dispatch(bulk_notify, user_ids, ntype, title, message, action_url)
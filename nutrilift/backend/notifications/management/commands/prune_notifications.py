@@ -0,0 +1,50 @@
+"""
+Management command: prune_notifications
+Run daily (e.g. via cron or scheduler) to delete old read notifications and
+collapse repeated unread ones (see notifications.retention).
+
+Usage:
+    python manage.py prune_notifications                  # read + older than NOTIFICATION_RETENTION_DAYS (90)
+    python manage.py prune_notifications --days 30 --batch-size 5000
+    python manage.py prune_notifications --dry-run
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.retention import collapse_repeated, prune_read
+
+
+class Command(BaseCommand):
+    help = 'Delete old read notifications and collapse repeated unread ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+            help='Delete read notifications older than N days (default: 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be reclaimed without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timezone.timedelta(days=options['days'])
+
+        pruned = prune_read(cutoff, batch_size=options['batch_size'], dry_run=dry_run)
+        collapsed = collapse_repeated(dry_run=dry_run)
+
+        verb = 'Would reclaim' if dry_run else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {pruned + collapsed} row(s): {pruned} old read, {collapsed} collapsed.'
+        ))
@@ -1,32 +1,38 @@
 """
 Management command: send_streak_reminders
-Run daily (e.g. via cron or scheduler) to notify users whose streak is at risk.
+Run nightly (e.g. via cron or scheduler, shortly after local midnight):
+
+1. zeroes expired streaks (last active before yesterday) across Streak,
+   WorkoutStreak and NutritionStreak — one UPDATE per kind;
+2. notifies users whose unified streak is at risk (last active yesterday),
+   bulk-inserting one batch of notifications per distinct streak length.
+
+Dates are local server dates, as the streaks are recorded.
 
 Usage:
     python manage.py send_streak_reminders
 """
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from challenges.models import Streak
-from notifications.utils import notify_streak_at_risk
+from challenges import streaks
+from notifications.utils import notify_streaks_at_risk
 
 
 class Command(BaseCommand):
-    help = 'Send streak-at-risk notifications to users who have not logged activity today.'
+    help = 'Expire broken streaks and notify users whose streak is at risk.'
 
     def handle(self, *args, **options):
-        today = timezone.now().date()
-        yesterday = today - timezone.timedelta(days=1)
+        today = streaks.today()
+        at_risk = streaks.at_risk(today)
 
-        # Users whose last active date was yesterday (streak will break if they don't log today)
-        at_risk = Streak.objects.filter(
-            last_active_date=yesterday,
-            current_streak__gte=1,
-        ).select_related('user')
+        expired = streaks.expire(today)
+        self.stdout.write(
+            'Expired streaks: ' + ', '.join(f'{kind}={count}' for kind, count in expired.items())
+        )
 
         count = 0
-        for streak in at_risk:
-            notify_streak_at_risk(streak.user, streak.current_streak)
-            count += 1
+        lengths = at_risk.order_by().values_list('current_streak', flat=True).distinct()
+        for length in list(lengths):
+            user_ids = at_risk.filter(current_streak=length).values_list('user_id', flat=True)
+            count += notify_streaks_at_risk(user_ids, length)
 
         self.stdout.write(self.style.SUCCESS(f'Sent {count} streak reminder(s).'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_add_unread_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='collapsed_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
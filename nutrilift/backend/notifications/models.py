@@ -22,10 +22,33 @@ class Notification(models.Model):
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     action_url = models.CharField(max_length=500, blank=True)  # e.g. '/challenges/uuid'
+    collapsed_count = models.PositiveIntegerField(default=1)  # >1 once retention merged repeats into this row
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'is_read']),
+        ]
 
     def __str__(self):
         return f'[{self.type}] {self.title} → {self.user}'
+
+
+class UnreadCounter(models.Model):
+    """
+    Denormalized unread-notification count per user, kept in step by
+    notifications.counters. A missing row means "not counted yet" and is
+    seeded from COUNT(*) by the first write or read that needs it.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_unread_counter'
+    )
+    unread_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user}: {self.unread_count} unread'
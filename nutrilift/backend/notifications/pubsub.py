@@ -0,0 +1,102 @@
+"""
+Publish/subscribe for live notification delivery.
+
+notifications.utils publishes each new notification to the recipient's
+channel; the SSE stream view (notifications.stream) subscribes to it.
+Publishers are ordinary sync code on any thread; subscribers are coroutines
+on the ASGI event loop.
+
+The backend is chosen with NOTIFICATION_PUBSUB_BACKEND (dotted path). The
+default LocalBackend only reaches subscribers in the same process, which is
+fine for a single ASGI worker; multi-worker deployments plug in a backend
+with the same subscribe()/subscribed()/publish() interface over a shared
+broker.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One subscriber's message queue, bound to the event loop that created it."""
+
+    def __init__(self, backend, user_id):
+        self._backend = backend
+        self.user_id = str(user_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout):
+        """Next message, or None if nothing arrives within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._backend.unsubscribe(self)
+
+
+class LocalBackend:
+    """In-process pub/sub; delivers to subscribers in this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """Start receiving the user's messages. Must be called from a coroutine."""
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscribers[subscription.user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscribed(self, user_ids):
+        """The subset of `user_ids` (as strings) with an open subscription."""
+        with self._lock:
+            return {str(user_id) for user_id in user_ids if str(user_id) in self._subscribers}
+
+    def publish(self, user_id, message):
+        """Deliver `message` to every open subscription for the user. Thread-safe."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(subscription)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'NOTIFICATION_PUBSUB_BACKEND', 'notifications.pubsub.LocalBackend')
+            _backend = import_string(path)()
+        return _backend
+
+
+def publish(user_id, message):
+    """Publish to a user's channel; delivery failures never break the caller."""
+    try:
+        get_backend().publish(user_id, message)
+    except Exception:
+        logger.error("Failed to publish notification", exc_info=True)
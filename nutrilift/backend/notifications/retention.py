@@ -0,0 +1,76 @@
+"""
+Notification retention: keeps the Notification table small so inbox list
+and count queries stay fast. Driven by the prune_notifications command.
+
+- prune_read() deletes read notifications older than a cutoff in bounded
+  batches, so no single DELETE holds locks for long.
+- collapse_repeated() merges a user's unread notifications of a COLLAPSIBLE
+  kind into the newest one ("5 new posts from people you follow"),
+  accumulating collapsed_count so repeated runs keep an exact total.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from . import counters
+from .models import Notification
+
+# (type, action_url) -> (collapsed title, collapsed message with {count})
+COLLAPSIBLE = {
+    ('social', '/community'): (
+        '📣 New Community Posts',
+        '{count} new posts from people you follow.',
+    ),
+}
+
+
+def prune_read(older_than, batch_size=1000, dry_run=False):
+    """Delete read notifications created before `older_than`. Returns rows deleted."""
+    expired = Notification.objects.filter(is_read=True, created_at__lt=older_than)
+    if dry_run:
+        return expired.count()
+    deleted = 0
+    while True:
+        batch = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += Notification.objects.filter(pk__in=batch).delete()[0]
+
+
+def collapse_repeated(dry_run=False):
+    """Collapse repeated unread notifications per user. Returns rows removed."""
+    removed = 0
+    for (ntype, action_url), (title, message) in COLLAPSIBLE.items():
+        groups = list(
+            Notification.objects.filter(type=ntype, action_url=action_url, is_read=False)
+            .values('user_id')
+            .annotate(rows=Count('id'))
+            .filter(rows__gt=1)
+        )
+        for group in groups:
+            if dry_run:
+                removed += group['rows'] - 1
+            else:
+                removed += _collapse(group['user_id'], ntype, action_url, title, message)
+    return removed
+
+
+def _collapse(user_id, ntype, action_url, title, message):
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.select_for_update()
+            .filter(user_id=user_id, type=ntype, action_url=action_url, is_read=False)
+            .order_by('-created_at')
+            .only('pk', 'collapsed_count')
+        )
+        if len(rows) < 2:
+            return 0
+        keep, extra = rows[0], rows[1:]
+        total = sum(row.collapsed_count for row in rows)
+        Notification.objects.filter(pk=keep.pk).update(
+            title=title,
+            message=message.format(count=total),
+            collapsed_count=total,
+        )
+        Notification.objects.filter(pk__in=[row.pk for row in extra]).delete()
+    counters.removed_unread(user_id, len(extra))
+    return len(extra)
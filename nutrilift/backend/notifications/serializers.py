@@ -5,5 +5,5 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'type', 'title', 'message', 'is_read', 'action_url', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'type', 'title', 'message', 'is_read', 'action_url', 'collapsed_count', 'created_at']
+        read_only_fields = ['id', 'collapsed_count', 'created_at']
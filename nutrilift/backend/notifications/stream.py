@@ -0,0 +1,101 @@
+"""
+Server-sent events stream of a user's new notifications.
+
+GET /api/notifications/stream/ holds the connection open and pushes each new
+Notification as an SSE `notification` event (published via
+notifications.pubsub when notify()/bulk_notify() create it), replacing the
+client's unread-count polling loop. The first event is the current
+`unread` count. A comment line is sent every KEEPALIVE_SECONDS so proxies
+keep the connection open, and the stream ends after MAX_STREAM_SECONDS;
+EventSource clients reconnect automatically.
+
+Needs an ASGI server running backend.asgi:application (e.g. uvicorn or
+daphne). Under WSGI (runserver, gunicorn sync workers) an async response is
+buffered until it closes, so the view answers 503 straight away and clients
+keep polling GET /api/notifications/.
+"""
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+
+from . import counters, pubsub
+from .serializers import NotificationSerializer
+
+KEEPALIVE_SECONDS = 15
+MAX_STREAM_SECONDS = 300
+
+
+def deliver(notifications):
+    """
+    Publish newly created notifications to their recipients once committed.
+    Only recipients with an open stream are serialized.
+    """
+    listening = pubsub.get_backend().subscribed({n.user_id for n in notifications})
+    if not listening:
+        return
+    messages = [
+        (n.user_id, NotificationSerializer(n).data)
+        for n in notifications if str(n.user_id) in listening
+    ]
+
+    def _publish():
+        for user_id, data in messages:
+            pubsub.publish(user_id, data)
+
+    transaction.on_commit(_publish)
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+def _authenticate(request):
+    from authentications.authentication import JWTAuthentication
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def _events(user):
+    # Subscribe here rather than in the view: the subscription is bound to
+    # the running loop, which must be the one iterating the response.
+    subscription = pubsub.get_backend().subscribe(user.pk)
+    try:
+        unread = await sync_to_async(counters.unread_count)(user.pk)
+        yield _event('unread', {'unread_count': unread})
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            message = await subscription.get(timeout=KEEPALIVE_SECONDS)
+            if message is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield _event('notification', message)
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def notification_stream(request):
+    """GET /api/notifications/stream/ — SSE stream of new notifications (Bearer auth)."""
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'}, status=401
+        )
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Live updates are not available; poll /api/notifications/.'},
+            status=503,
+        )
+    response = StreamingHttpResponse(_events(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # disable nginx response buffering
+    return response
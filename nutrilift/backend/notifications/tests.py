@@ -1,3 +1,308 @@
-from django.test import TestCase
+"""
+Tests for notification dispatch.
+"""
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .dispatch import bulk_notify
+from .models import Notification
+
+User = get_user_model()
+
+
+def make_user():
+    uid = uuid.uuid4().hex[:8]
+    return User.objects.create_user(
+        email=f'user_{uid}@test.com',
+        password='testpass123',
+        first_name='Test',
+        last_name='User',
+    )
+
+
+class BulkNotifyTest(TestCase):
+
+    def test_writes_in_chunks(self):
+        from .models import UnreadCounter
+        users = [make_user() for _ in range(5)]
+        UnreadCounter.objects.bulk_create([UnreadCounter(user=u) for u in users])
+        with mock.patch('notifications.dispatch.CHUNK_SIZE', 2):
+            # 1 id query + 3 x (bulk insert + unread counter update)
+            with self.assertNumQueries(7):
+                created = bulk_notify(
+                    User.objects.filter(pk__in=[u.pk for u in users]).values_list('pk', flat=True),
+                    'system', 'Hello', 'World',
+                )
+        self.assertEqual(created, 5)
+        self.assertEqual(Notification.objects.filter(title='Hello').count(), 5)
+
+
+@override_settings(NOTIFICATION_DISPATCH_ASYNC=False)
+class FanOutTest(TestCase):
+
+    def test_new_post_notifies_followers(self):
+        from challenges.models import Follow
+        poster, follower, bystander = make_user(), make_user(), make_user()
+        Follow.objects.create(follower=follower, following=poster)
+
+        client = APIClient()
+        client.force_authenticate(user=poster)
+        resp = client.post('/api/community/posts/', {'content': 'hello'}, format='json')
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(Notification.objects.filter(user=follower, type='social').count(), 1)
+        self.assertFalse(Notification.objects.filter(user=bystander).exists())
+
+    def test_official_challenge_notifies_active_users(self):
+        from challenges.models import Challenge
+        creator, active, inactive = make_user(), make_user(), make_user()
+        inactive.is_active = False
+        inactive.save()
+
+        Challenge.objects.create(
+            name='Official', challenge_type='workout', goal_value=10, unit='km',
+            start_date=timezone.now(), end_date=timezone.now() + timezone.timedelta(days=7),
+            created_by=creator, is_official=True, is_active=True,
+        )
+
+        self.assertTrue(Notification.objects.filter(user=active, type='challenge').exists())
+        self.assertFalse(Notification.objects.filter(user=inactive).exists())
+
+
+@override_settings(NOTIFICATION_DISPATCH_ASYNC=True)
+class DeferredDispatchTest(TestCase):
+
+    def test_job_waits_for_commit(self):
+        from notifications.dispatch import fan_out
+        user = make_user()
+        with mock.patch('notifications.dispatch._get_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                fan_out([user.pk], 'system', 'Later', 'msg')
+                executor.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        executor.return_value.submit.assert_called_once()
+
+
+class NotificationInboxTest(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from .utils import notify
+        cache.clear()
+        self.user = make_user()
+        for i in range(3):
+            notify(self.user, 'system', f'n{i}', 'msg')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_is_cursor_paginated(self):
+        resp = self.client.get('/api/notifications/', {'page_size': 2})
+        self.assertEqual(len(resp.data['notifications']), 2)
+        self.assertEqual(resp.data['unread_count'], 3)
+        resp = self.client.get(resp.data['next'])
+        self.assertEqual(len(resp.data['notifications']), 1)
+
+    def test_unread_counter_tracks_writes(self):
+        from .utils import notify
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread_count'], 3)
+
+        first = Notification.objects.filter(user=self.user).first()
+        self.client.patch(f'/api/notifications/{first.id}/read/')
+        self.client.patch(f'/api/notifications/{first.id}/read/')  # already read: no change
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread_count'], 2)
+
+        notify(self.user, 'system', 'n3', 'msg')
+        bulk_notify([self.user.pk], 'system', 'n4', 'msg')
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread_count'], 4)
+
+        self.client.patch('/api/notifications/read-all/')
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread_count'], 0)
+
+    def test_missing_counter_is_seeded_once_by_writes(self):
+        from .counters import _seed, unread_count
+        from .models import UnreadCounter
+        from .utils import notify
+        UnreadCounter.objects.filter(user=self.user).delete()
+
+        # The first write creates the row from COUNT(*), including itself
+        notify(self.user, 'system', 'n3', 'msg')
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).unread_count, 4)
+        # A row that appeared concurrently gets the delta instead of a recount
+        _seed([self.user.pk], 1)
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).unread_count, 5)
+        UnreadCounter.objects.filter(user=self.user).delete()
+        self.assertEqual(unread_count(self.user.pk), 4)
+
+    def test_unread_count_supports_etag(self):
+        from .utils import notify
+        resp = self.client.get('/api/notifications/unread-count/')
+        etag = resp['ETag']
+        with self.assertNumQueries(1):
+            resp = self.client.get('/api/notifications/unread-count/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        # A write from any worker changes the ETag straight away
+        notify(self.user, 'system', 'n3', 'msg')
+        resp = self.client.get('/api/notifications/unread-count/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['unread_count'], 4)
+
+
+class NotificationStreamTest(TestCase):
+
+    def test_local_backend_delivers_across_threads(self):
+        import asyncio
+        import threading
+        from .pubsub import LocalBackend
+
+        backend = LocalBackend()
+
+        async def scenario():
+            subscription = backend.subscribe('u1')
+            thread = threading.Thread(target=backend.publish, args=('u1', {'title': 'hi'}))
+            thread.start()
+            thread.join()
+            message = await subscription.get(timeout=1)
+            subscription.close()
+            return message
+
+        self.assertEqual(asyncio.run(scenario()), {'title': 'hi'})
+        self.assertFalse(backend._subscribers)
+
+    def test_stream_pushes_unread_count_then_new_notifications(self):
+        from asgiref.sync import async_to_sync, sync_to_async
+        from django.test import AsyncRequestFactory
+        from authentications.jwt_utils import generate_jwt_token
+        from . import pubsub
+        from .stream import notification_stream
+        from .utils import notify
+
+        user = make_user()
+        request = AsyncRequestFactory().get(
+            '/api/notifications/stream/',
+            headers={'Authorization': f'Bearer {generate_jwt_token(user)}'},
+        )
+
+        def create_notification():
+            with self.captureOnCommitCallbacks(execute=True):
+                notify(user, 'system', 'Live', 'msg')
+
+        async def scenario():
+            response = await notification_stream(request)
+            events = response.streaming_content
+            first = await events.__anext__()
+            await sync_to_async(create_notification)()
+            second = await events.__anext__()
+            await events.aclose()
+            return response, first, second
+
+        with mock.patch.object(pubsub, '_backend', pubsub.LocalBackend()):
+            # async_to_sync runs thread-sensitive DB calls back on this
+            # thread, inside the test transaction
+            response, first, second = async_to_sync(scenario)()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn(b'event: unread', first)
+        self.assertIn(b'"unread_count": 0', first)
+        self.assertIn(b'event: notification', second)
+        self.assertIn(b'"title": "Live"', second)
+
+    def test_stream_requires_token(self):
+        resp = self.client.get('/api/notifications/stream/')
+        self.assertEqual(resp.status_code, 401)
+
+    def test_stream_unavailable_under_wsgi(self):
+        from authentications.jwt_utils import generate_jwt_token
+        user = make_user()
+        resp = self.client.get(
+            '/api/notifications/stream/',
+            HTTP_AUTHORIZATION=f'Bearer {generate_jwt_token(user)}',
+        )
+        self.assertEqual(resp.status_code, 503)
+
+    def test_deliver_skips_users_without_subscribers(self):
+        from . import pubsub
+        from .utils import notify
+
+        user = make_user()
+        with mock.patch.object(pubsub, '_backend', pubsub.LocalBackend()), \
+                mock.patch('notifications.stream.NotificationSerializer') as serializer, \
+                self.captureOnCommitCallbacks(execute=True):
+            notify(user, 'system', 'Nobody listening', 'msg')
+        serializer.assert_not_called()
+
+
+class NotificationRetentionTest(TestCase):
+
+    def _run(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('prune_notifications', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_old_read_notifications(self):
+        user = make_user()
+        old = timezone.now() - timezone.timedelta(days=120)
+        old_read = Notification.objects.create(user=user, title='a', message='m', is_read=True)
+        old_unread = Notification.objects.create(user=user, title='b', message='m')
+        recent_read = Notification.objects.create(user=user, title='c', message='m', is_read=True)
+        Notification.objects.filter(pk__in=[old_read.pk, old_unread.pk]).update(created_at=old)
+
+        self.assertIn('Would reclaim 1 row(s)', self._run('--dry-run'))
+        self.assertTrue(Notification.objects.filter(pk=old_read.pk).exists())
+
+        self._run('--batch-size', '1')
+        remaining = set(Notification.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {old_unread.pk, recent_read.pk})
+
+    def test_collapses_new_post_notifications(self):
+        from .counters import unread_count
+        from .utils import notify_new_post
+        user = make_user()
+        for name in ('amy', 'bo', 'cy'):
+            notify_new_post(user, name)
+        self.assertEqual(unread_count(user.pk), 3)
+
+        self._run()
+        notify_new_post(user, 'di')
+        self._run()
+
+        rows = Notification.objects.filter(user=user)
+        self.assertEqual(rows.count(), 1)
+        self.assertEqual(rows.get().collapsed_count, 4)
+        self.assertIn('4 new posts', rows.get().message)
+        self.assertEqual(unread_count(user.pk), 1)
+
+
+class StreakReminderJobTest(TestCase):
+
+    def test_expires_broken_streaks_and_notifies_at_risk(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from challenges import streaks
+        from challenges.models import Streak, WorkoutStreak
+
+        today = streaks.today()
+        at_risk, broken, safe = make_user(), make_user(), make_user()
+        Streak.objects.create(user=at_risk, current_streak=3, longest_streak=3,
+                              last_active_date=today - timezone.timedelta(days=1))
+        Streak.objects.create(user=broken, current_streak=5, longest_streak=5,
+                              last_active_date=today - timezone.timedelta(days=3))
+        WorkoutStreak.objects.create(user=broken, current_streak=2, longest_streak=4,
+                                     last_active_date=today - timezone.timedelta(days=2))
+        Streak.objects.create(user=safe, current_streak=1, longest_streak=1, last_active_date=today)
+
+        out = StringIO()
+        call_command('send_streak_reminders', stdout=out)
+
+        self.assertIn('Sent 1 streak reminder(s)', out.getvalue())
+        self.assertEqual(Notification.objects.get(type='streak').user, at_risk)
+        self.assertEqual(Streak.objects.get(user=broken).current_streak, 0)
+        self.assertEqual(Streak.objects.get(user=broken).longest_streak, 5)
+        self.assertEqual(WorkoutStreak.objects.get(user=broken).current_streak, 0)
+        self.assertEqual(Streak.objects.get(user=at_risk).current_streak, 3)
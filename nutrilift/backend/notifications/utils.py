@@ -4,32 +4,45 @@ Usage:
     from notifications.utils import notify
     notify(user, 'challenge', 'New Challenge!', 'A new challenge has been added.', '/challenges/uuid')
 """
+from . import counters
 from .models import Notification
+from .stream import deliver
 
 
 def notify(user, ntype, title, message, action_url=''):
     """Create a notification for a user. Silently ignores errors."""
     try:
-        Notification.objects.create(
+        notification = Notification.objects.create(
             user=user,
             type=ntype,
             title=title,
             message=message,
             action_url=action_url,
         )
+        counters.created([user.pk])
+        deliver([notification])
     except Exception:
         pass
 
 
-def notify_streak_at_risk(user, streak_count):
-    notify(
-        user, 'streak',
+def _streak_at_risk(streak_count):
+    return (
         '🔥 Streak at Risk!',
         f"You have a {streak_count}-day streak. Log activity today to keep it alive!",
         '/workout',
     )
 
 
+def notify_streak_at_risk(user, streak_count):
+    notify(user, 'streak', *_streak_at_risk(streak_count))
+
+
+def notify_streaks_at_risk(user_ids, streak_count):
+    """Bulk-create the streak-at-risk notification for users sharing a streak length."""
+    from .dispatch import bulk_notify
+    return bulk_notify(user_ids, 'streak', *_streak_at_risk(streak_count))
+
+
 def notify_new_challenge(user, challenge_name, challenge_id):
     notify(
         user, 'challenge',
@@ -39,6 +52,20 @@ def notify_new_challenge(user, challenge_name, challenge_id):
     )
 
 
+def notify_all_new_challenge(challenge_name, challenge_id):
+    """Queue the new-challenge notification for every active user."""
+    from django.contrib.auth import get_user_model
+    from .dispatch import fan_out
+    User = get_user_model()
+    fan_out(
+        User.objects.filter(is_active=True).values_list('pk', flat=True),
+        'challenge',
+        '🏆 New Challenge Available',
+        f'"{challenge_name}" has been added. Join now!',
+        f'/challenges/{challenge_id}',
+    )
+
+
 def notify_challenge_expiring(user, challenge_name, days_left):
     notify(
         user, 'challenge',
@@ -57,6 +84,19 @@ def notify_new_post(user, poster_name):
     )
 
 
+def notify_followers_new_post(poster, poster_name):
+    """Queue the new-post notification for every follower of `poster`."""
+    from challenges.models import Follow
+    from .dispatch import fan_out
+    fan_out(
+        Follow.objects.filter(following=poster).values_list('follower_id', flat=True),
+        'social',
+        '📣 New Community Post',
+        f'{poster_name} shared something new in the community.',
+        '/community',
+    )
+
+
 def notify_challenge_ended_admin(admin_user, challenge_name, challenge_id, participant_count):
     notify(
         admin_user, 'challenge',
@@ -1,37 +1,57 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import CursorPagination
 from rest_framework import status
+from . import counters
 from .models import Notification
 from .serializers import NotificationSerializer
 
 
-class NotificationListView(APIView):
-    """GET /api/notifications/ — list all notifications for the user (latest first)."""
-    permission_classes = [IsAuthenticated]
+class NotificationPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
 
-    def get(self, request):
-        notifications = Notification.objects.filter(user=request.user)
-        serializer = NotificationSerializer(notifications, many=True)
-        unread_count = notifications.filter(is_read=False).count()
+    def get_paginated_response(self, data, unread_count=0):
         return Response({
-            'notifications': serializer.data,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'notifications': data,
             'unread_count': unread_count,
         })
 
 
+class NotificationListView(APIView):
+    """
+    GET /api/notifications/ — the user's notifications, latest first.
+    Cursor-paginated over (user, -created_at); follow `next` for older ones.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        paginator = NotificationPagination()
+        page = paginator.paginate_queryset(
+            Notification.objects.filter(user_id=request.user.pk), request
+        )
+        serializer = NotificationSerializer(page, many=True)
+        return paginator.get_paginated_response(
+            serializer.data, unread_count=counters.unread_count(request.user.pk)
+        )
+
+
 class NotificationMarkReadView(APIView):
     """PATCH /api/notifications/<id>/read/ — mark a single notification as read."""
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, pk):
-        try:
-            notification = Notification.objects.get(pk=pk, user=request.user)
-            notification.is_read = True
-            notification.save(update_fields=['is_read'])
-            return Response({'status': 'ok'})
-        except Notification.DoesNotExist:
+        notifications = Notification.objects.filter(pk=pk, user_id=request.user.pk)
+        updated = notifications.filter(is_read=False).update(is_read=True)
+        if not updated and not notifications.exists():
             return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        counters.marked_read(request.user.pk, updated)
+        return Response({'status': 'ok'})
 
 
 class NotificationMarkAllReadView(APIView):
@@ -39,14 +59,22 @@ class NotificationMarkAllReadView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        updated = Notification.objects.filter(user_id=request.user.pk, is_read=False).update(is_read=True)
+        counters.marked_read(request.user.pk, updated)
         return Response({'status': 'ok'})
 
 
 class UnreadCountView(APIView):
-    """GET /api/notifications/unread-count/ — lightweight poll endpoint."""
+    """
+    GET /api/notifications/unread-count/ — lightweight poll endpoint.
+    Served from the UnreadCounter row; send the returned ETag back in
+    If-None-Match to get 304 Not Modified while the count is unchanged.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'unread_count': count})
+        count = counters.unread_count(request.user.pk)
+        etag = f'"unread-{count}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response({'unread_count': count}, headers={'ETag': etag})
@@ -75,7 +75,7 @@ class IntakeLogViewSet(viewsets.ModelViewSet):
         Requirements: 2.10, 10.2, 10.4, 14.5, 16.5
         """
         user = self.request.user
-        queryset = IntakeLog.objects.filter(user=user).select_related('food_item')
+        queryset = IntakeLog.objects.filter(user_id=user.id).select_related('food_item')
         
         # Date filtering using query parameters
         date_from = self.request.query_params.get('date_from')
@@ -146,7 +146,7 @@ class HydrationLogViewSet(viewsets.ModelViewSet):
         Requirements: 4.3, 10.2
         """
         user = self.request.user
-        queryset = HydrationLog.objects.filter(user=user)
+        queryset = HydrationLog.objects.filter(user_id=user.id)
         
         # Date filtering using query parameters
         date_from = self.request.query_params.get('date_from')
@@ -186,7 +186,7 @@ class NutritionGoalsViewSet(viewsets.ModelViewSet):
         Requirements: 5.4, 10.2
         """
         user = self.request.user
-        return NutritionGoals.objects.filter(user=user)
+        return NutritionGoals.objects.filter(user_id=user.id)
     
     def list(self, request, *args, **kwargs):
         """
@@ -281,7 +281,7 @@ class NutritionProgressViewSet(viewsets.ReadOnlyModelViewSet):
         Requirements: 3.9, 10.2, 16.7
         """
         user = self.request.user
-        queryset = NutritionProgress.objects.filter(user=user)
+        queryset = NutritionProgress.objects.filter(user_id=user.id)
         
         # Date filtering using query parameters
         date_from = self.request.query_params.get('date_from')
@@ -313,7 +313,7 @@ class QuickLogViewSet(viewsets.ReadOnlyModelViewSet):
         Requirements: 10.2
         """
         user = self.request.user
-        return QuickLog.objects.filter(user=user)
+        return QuickLog.objects.filter(user_id=user.id)
     
     @action(detail=False, methods=['get'])
     def frequent(self, request):
@@ -21,6 +21,10 @@ class DisableMigrations:
 
 MIGRATION_MODULES = DisableMigrations()
 
+# Run notification and feed fan-out jobs inline: background threads would
+# write outside the test transaction and lock the sqlite database
+NOTIFICATION_DISPATCH_ASYNC = False
+
 # Ensure REST_FRAMEWORK and CORS settings are available for tests
 # These should already be imported from backend.settings, but let's be explicit
 
@@ -41,6 +45,11 @@ REST_FRAMEWORK = {
     ],
     # Custom exception handler for consistent error responses
     'EXCEPTION_HANDLER': 'authentications.exceptions.custom_exception_handler',
+    'NUM_PROXIES': 0,
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_email': '10/hour',
+    },
 }
 
 # CORS Configuration
@@ -174,7 +174,7 @@ class CustomWorkoutViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = CustomWorkout.objects.filter(user=self.request.user)
+        queryset = CustomWorkout.objects.filter(user_id=self.request.user.id)
         is_public = self.request.query_params.get('is_public', None)
         
         if is_public is not None:
@@ -205,7 +205,7 @@ class WorkoutLogViewSet(viewsets.ModelViewSet):
         
         Requirements: 12.5, 14.9
         """
-        queryset = WorkoutLog.objects.filter(user=self.request.user, is_deleted=False)
+        queryset = WorkoutLog.objects.filter(user_id=self.request.user.id, is_deleted=False)
         
         # Optimize queries with select_related for ForeignKey relationships
         queryset = queryset.select_related('user', 'custom_workout', 'gym')
@@ -481,7 +481,7 @@ class PersonalRecordViewSet(viewsets.ReadOnlyModelViewSet):
         
         Requirements: 12.5
         """
-        queryset = PersonalRecord.objects.filter(user=self.request.user)
+        queryset = PersonalRecord.objects.filter(user_id=self.request.user.id)
         
         # Optimize queries with select_related for ForeignKey relationships
         queryset = queryset.select_related('user', 'exercise', 'workout_log')
@@ -116,7 +116,9 @@ class UserProfileModel {
       followerCount: json['follower_count'] as int? ?? 0,
       followingCount: json['following_count'] as int? ?? 0,
       postCount: json['post_count'] as int? ?? 0,
-      isFollowingMe: json['is_following_me'] as bool? ?? false,
+      isFollowingMe: json['is_following_me'] as bool? ??
+          json['is_followed_by_me'] as bool? ??
+          false,
       gender: json['gender'] as String?,
       ageGroup: json['age_group'] as String?,
       height: (json['height'] as num?)?.toDouble(),
@@ -140,26 +142,28 @@ class CommunityApiService {
     _dio = _dioClient.dio;
   }
 
-  /// Fetch paginated community feed.
+  /// Fetch a page of the cursor-paginated community feed.
   ///
-  /// Returns a map with 'posts' (List<PostModel>), 'hasMore' (bool), and 'nextPage' (int?).
+  /// Pass the 'nextCursor' from the previous page to continue; omit it for
+  /// the first page.
+  /// Returns a map with 'posts' (List<PostModel>), 'hasMore' (bool), and 'nextCursor' (String?).
   ///
   /// Validates: Requirement 6.1
-  Future<Map<String, dynamic>> fetchFeed(int page) async {
+  Future<Map<String, dynamic>> fetchFeed({String? cursor}) async {
     try {
       final response = await _dio.get(
         '/community/feed/',
-        queryParameters: {'page': page},
+        queryParameters: {if (cursor != null) 'cursor': cursor},
       );
       final data = response.data as Map<String, dynamic>;
       final List<dynamic> results = data['results'] as List? ?? [];
       final posts =
           results.map((e) => PostModel.fromJson(e as Map<String, dynamic>)).toList();
-      final hasMore = data['next'] != null;
+      final next = data['next'] as String?;
       return {
         'posts': posts,
-        'hasMore': hasMore,
-        'nextPage': hasMore ? page + 1 : null,
+        'hasMore': next != null,
+        'nextCursor': next != null ? Uri.parse(next).queryParameters['cursor'] : null,
       };
     } on DioException catch (e) {
       throw _handleError(e, 'Failed to fetch feed');
@@ -346,6 +350,21 @@ class CommunityApiService {
     }
   }
 
+  /// Fetch users who follow [id] and are followed back by them.
+  Future<List<UserProfileModel>> fetchMutuals(String id) async {
+    try {
+      final response = await _dio.get('/community/users/$id/mutuals/');
+      final List<dynamic> data = response.data is List
+          ? response.data as List
+          : (response.data['results'] as List? ?? []);
+      return data
+          .map((e) => UserProfileModel.fromJson(e as Map<String, dynamic>))
+          .toList();
+    } on DioException catch (e) {
+      throw _handleError(e, 'Failed to fetch mutual followers');
+    }
+  }
+
   /// Fetch challenge achievement stats for a user's profile.
   Future<Map<String, dynamic>> fetchUserChallengeStats(String id) async {
     try {
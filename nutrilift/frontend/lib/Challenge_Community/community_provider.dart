@@ -11,7 +11,7 @@ class CommunityProvider extends ChangeNotifier {
   List<PostModel> posts = [];
   bool isLoading = false;
   String? error;
-  int currentPage = 1;
+  String? nextCursor;
   bool hasMore = true;
 
   /// Persistent local bytes cache keyed by post ID.
@@ -39,10 +39,10 @@ class CommunityProvider extends ChangeNotifier {
     notifyListeners();
 
     try {
-      final result = await _service.fetchFeed(1);
+      final result = await _service.fetchFeed();
       posts = List<PostModel>.from(result['posts'] as List);
       hasMore = result['hasMore'] as bool;
-      currentPage = 1;
+      nextCursor = result['nextCursor'] as String?;
       error = null;
     } catch (e) {
       error = e.toString();
@@ -62,12 +62,11 @@ class CommunityProvider extends ChangeNotifier {
     notifyListeners();
 
     try {
-      final nextPage = currentPage + 1;
-      final result = await _service.fetchFeed(nextPage);
+      final result = await _service.fetchFeed(cursor: nextCursor);
       final newPosts = List<PostModel>.from(result['posts'] as List);
       posts = [...posts, ...newPosts];
       hasMore = result['hasMore'] as bool;
-      currentPage = nextPage;
+      nextCursor = result['nextCursor'] as String?;
     } catch (e) {
       error = e.toString();
     } finally {
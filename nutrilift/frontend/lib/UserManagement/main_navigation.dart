@@ -43,14 +43,14 @@ class _MainNavigationState extends State<MainNavigation> with TickerProviderStat
     _tabNavService.registerTabSwitcher(_switchToTab);
     WidgetsBinding.instance.addPostFrameCallback((_) {
       provider_pkg.Provider.of<NotificationService>(context, listen: false)
-          .startPolling(intervalSeconds: 15);
+          .startLiveUpdates();
     });
   }
 
   @override
   void dispose() {
     for (final c in _iconControllers) c.dispose();
-    provider_pkg.Provider.of<NotificationService>(context, listen: false).stopPolling();
+    provider_pkg.Provider.of<NotificationService>(context, listen: false).stopLiveUpdates();
     super.dispose();
   }
 
@@ -137,6 +137,13 @@ class AuthService {
 
   // Clear authentication token and logout
   Future<void> logout() async {
+    // Revoke this device's refresh token on the server; sign out locally regardless
+    final refreshToken = await _tokenService.getRefreshToken();
+    if (refreshToken != null && refreshToken.isNotEmpty) {
+      try {
+        await _apiClient.post('/auth/logout/', body: {'refresh_token': refreshToken});
+      } catch (_) {}
+    }
     _apiClient.setAuthToken(null);
     await _tokenService.clearTokens();
     // Reset active time so it starts from 0 on next login
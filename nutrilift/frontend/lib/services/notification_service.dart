@@ -1,4 +1,6 @@
 import 'dart:async';
+import 'dart:convert';
+import 'package:dio/dio.dart';
 import 'package:flutter/material.dart';
 import 'package:flutter_local_notifications/flutter_local_notifications.dart';
 import 'dio_client.dart';
@@ -72,7 +74,8 @@ class AppNotification {
   }
 }
 
-/// Singleton notification service with polling + local push notifications.
+/// Singleton notification service with live updates (polling, replaced by
+/// server-sent events while a stream is delivering) + local push notifications.
 class NotificationService extends ChangeNotifier {
   static final NotificationService _instance = NotificationService._internal();
   factory NotificationService() => _instance;
@@ -85,6 +88,12 @@ class NotificationService extends ChangeNotifier {
   Timer? _pollTimer;
   bool _isPolling = false;
   bool _localNotifInitialized = false;
+  bool _live = false;
+  CancelToken? _streamCancel;
+  StreamSubscription<String>? _streamSub;
+  Timer? _reconnectTimer;
+  int _pollIntervalSeconds = 15;
+  static const _streamUnavailableRetry = Duration(minutes: 5);
   final Set<String> _shownIds = {}; // track which notifs we've already pushed locally
 
   List<AppNotification> get notifications => _notifications;
@@ -119,6 +128,95 @@ class NotificationService extends ChangeNotifier {
     _pollTimer = null;
   }
 
+  /// Poll every [intervalSeconds] seconds and try the server-sent events
+  /// stream alongside. Polling stops only once the stream delivers its first
+  /// event, and resumes whenever the stream closes or fails; a server that
+  /// can't stream (503) isn't retried for [_streamUnavailableRetry].
+  Future<void> startLiveUpdates({int intervalSeconds = 15}) async {
+    _live = true;
+    _pollIntervalSeconds = intervalSeconds;
+    startPolling(intervalSeconds: intervalSeconds);
+    _connectStream();
+  }
+
+  void stopLiveUpdates() {
+    _live = false;
+    stopPolling();
+    _reconnectTimer?.cancel();
+    _streamSub?.cancel();
+    _streamCancel?.cancel();
+    _streamSub = null;
+    _streamCancel = null;
+  }
+
+  Future<void> _connectStream() async {
+    if (!_live) return;
+    _streamCancel = CancelToken();
+    try {
+      final response = await _dio.dio.get<ResponseBody>(
+        '/notifications/stream/',
+        options: Options(
+          responseType: ResponseType.stream,
+          receiveTimeout: Duration.zero, // the server sends keep-alives
+          headers: {'Accept': 'text/event-stream'},
+        ),
+        cancelToken: _streamCancel,
+      );
+      String? event;
+      _streamSub = response.data!.stream
+          .cast<List<int>>()
+          .transform(utf8.decoder)
+          .transform(const LineSplitter())
+          .listen(
+        (line) {
+          if (line.startsWith('event: ')) {
+            event = line.substring(7);
+          } else if (line.startsWith('data: ')) {
+            stopPolling(); // the stream is live
+            _handleEvent(event, line.substring(6));
+          } else if (line.isEmpty) {
+            event = null;
+          }
+        },
+        onDone: _streamClosed,
+        onError: (_) => _streamClosed(),
+        cancelOnError: true,
+      );
+    } on DioException catch (e) {
+      _streamClosed(
+        delay: e.response?.statusCode == 503
+            ? _streamUnavailableRetry
+            : const Duration(seconds: 15),
+      );
+    } catch (_) {
+      _streamClosed(delay: const Duration(seconds: 15));
+    }
+  }
+
+  void _streamClosed({Duration delay = const Duration(seconds: 2)}) {
+    if (!_live) return;
+    if (_pollTimer == null) startPolling(intervalSeconds: _pollIntervalSeconds);
+    _reconnectTimer?.cancel();
+    _reconnectTimer = Timer(delay, _connectStream);
+  }
+
+  void _handleEvent(String? event, String data) {
+    final json = jsonDecode(data) as Map<String, dynamic>;
+    if (event == 'unread') {
+      _unreadCount = json['unread_count'] as int? ?? _unreadCount;
+      notifyListeners();
+    } else if (event == 'notification') {
+      final n = AppNotification.fromJson(json);
+      if (_notifications.any((e) => e.id == n.id)) return;
+      _notifications = [n, ..._notifications];
+      if (!n.isRead) _unreadCount++;
+      if (_localNotifInitialized && _shownIds.add(n.id)) {
+        _showLocalNotification(n);
+      }
+      notifyListeners();
+    }
+  }
+
   Future<void> _fetchNotifications() async {
     if (_isPolling) return;
     _isPolling = true;
@@ -177,10 +275,13 @@ class NotificationService extends ChangeNotifier {
   Future<void> markRead(String id) async {
     try {
       await _dio.dio.patch('/notifications/$id/read/');
+      // Only the latest page is loaded, so adjust the server's count rather
+      // than recounting the local list.
+      final wasUnread = _notifications.any((n) => n.id == id && !n.isRead);
       _notifications = _notifications
           .map((n) => n.id == id ? n.copyWith(isRead: true) : n)
           .toList();
-      _unreadCount = _notifications.where((n) => !n.isRead).length;
+      if (wasUnread && _unreadCount > 0) _unreadCount--;
       notifyListeners();
     } catch (_) {}
   }
@@ -13,6 +13,7 @@ class TokenService {
   static const String _refreshTokenKey = 'refresh_token';
 
   SharedPreferences? _prefs;
+  Future<String?>? _refreshInFlight;
 
   // Initialize shared preferences
   Future<void> _initPrefs() async {
@@ -131,12 +132,18 @@ class TokenService {
     return (token != null && token.isNotEmpty) || (refreshToken != null && refreshToken.isNotEmpty);
   }
 
-  // Automatic token refresh — calls backend and saves new tokens
+  // Automatic token refresh — calls backend and saves new tokens.
+  // Refresh tokens rotate on every use and the server treats a second use of
+  // the same one as a replay (ending the session), so concurrent callers
+  // (DioClient, ApiClient) share a single in-flight refresh.
   Future<String?> refreshTokenIfNeeded() async {
     if (await isTokenValid()) {
       return await getToken();
     }
+    return _refreshInFlight ??= _refresh().whenComplete(() => _refreshInFlight = null);
+  }
 
+  Future<String?> _refresh() async {
     final refreshToken = await getRefreshToken();
     if (refreshToken == null || refreshToken.isEmpty) {
       return null;